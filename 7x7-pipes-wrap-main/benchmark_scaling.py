@@ -0,0 +1,119 @@
+"""
+Benchmark khả năng mở rộng theo kích thước lưới N (NxN).
+
+Với mỗi N, sinh vài puzzle giải được bằng puzzle_generator rồi chạy từng thuật
+toán với cùng một Budget (giới hạn thời gian / bộ nhớ trong vòng lặp tìm kiếm).
+Thuật toán không giải được puzzle nào ở một N thì bỏ qua ở các N lớn hơn
+(coi như đã chạm giới hạn mở rộng).
+
+Ví dụ:
+    python benchmark_scaling.py --sizes 5 7 10 20 30 50 --repeats 3 --time-limit 10
+    python benchmark_scaling.py --algos csp tabu astar --output scaling.csv
+"""
+
+import argparse
+import csv
+import statistics
+import time
+
+from main import (Budget, anytime_astar, astar, bfs, csp_solve, dfs, greedy_best_first, hill_climbing, ida_star,
+                  make_pattern_heuristic, random_restart_hill_climbing, simulated_annealing, tabu_search,
+                  weighted_astar)
+from puzzle_generator import generate_puzzle
+
+# Tên trên dòng lệnh -> hàm chạy (state, budget) -> (goal, path, stats)
+ALGORITHMS = {
+    "csp": lambda state, budget: csp_solve(state, budget=budget),
+    "astar": lambda state, budget: astar(state, budget=budget, heuristic_fn=make_pattern_heuristic(state)),
+    "ida": lambda state, budget: ida_star(state, budget=budget, heuristic_fn=make_pattern_heuristic(state)),
+    "wastar": lambda state, budget: weighted_astar(state, 2.0, budget=budget, heuristic_fn=make_pattern_heuristic(state)),
+    "greedy": lambda state, budget: greedy_best_first(state, budget=budget, heuristic_fn=make_pattern_heuristic(state)),
+    "anytime": lambda state, budget: anytime_astar(state, budget=budget, heuristic_fn=make_pattern_heuristic(state)),
+    "tabu": lambda state, budget: tabu_search(state, seed=0, budget=budget),
+    "restart": lambda state, budget: random_restart_hill_climbing(state, seed=0, budget=budget),
+    "annealing": lambda state, budget: simulated_annealing(state, seed=0, budget=budget),
+    "hill": lambda state, budget: hill_climbing(state, budget=budget),
+    "bfs": lambda state, budget: bfs(state, budget=budget),
+    "dfs": lambda state, budget: dfs(state, budget=budget),
+}
+
+DEFAULT_SIZES = [5, 7, 10, 15, 20, 30, 40, 50]
+
+RESULT_FIELDS = ["size", "algorithm", "seed", "solved", "time_sec", "nodes_explored", "path_length", "reason"]
+
+
+def run_once(algo: str, size: int, seed: int, density: float, time_limit: float, max_memory_nodes: int):
+    """Chạy một thuật toán trên một puzzle sinh ngẫu nhiên, trả về một dòng kết quả."""
+    puzzle, _ = generate_puzzle(size, density, seed)
+    budget = Budget(time_limit=time_limit, max_memory_nodes=max_memory_nodes)
+    start = time.perf_counter()
+    goal, path, stats = ALGORITHMS[algo](puzzle, budget)
+    elapsed = time.perf_counter() - start
+    return {
+        "size": size,
+        "algorithm": algo,
+        "seed": seed,
+        "solved": goal is not None,
+        "time_sec": elapsed,
+        "nodes_explored": stats.get("nodes_explored", 0),
+        "path_length": len(path) if goal is not None and path else 0,
+        "reason": stats.get("reason", ""),
+    }
+
+
+def run_scaling(algos, sizes, repeats: int = 3, density: float = 0.5, time_limit: float = 10.0,
+                max_memory_nodes: int = 2_000_000, writer=None):
+    """
+    Chạy toàn bộ benchmark, in một dòng tổng hợp cho mỗi (N, thuật toán).
+    writer (csv.DictWriter, tùy chọn) nhận từng dòng kết quả chi tiết.
+    Trả về dict (size, algo) -> danh sách dòng kết quả.
+    """
+    results = {}
+    active = list(algos)
+    print(f"{'N':>4} {'Thuật toán':<10} {'Giải được':>9} {'Time median':>12} {'Time max':>10} "
+          f"{'Nodes median':>13} {'Lý do dừng':<12}")
+    print("-" * 78)
+    for size in sorted(sizes):
+        for algo in list(active):
+            rows = [run_once(algo, size, seed, density, time_limit, max_memory_nodes) for seed in range(repeats)]
+            results[(size, algo)] = rows
+            if writer is not None:
+                writer.writerows(rows)
+
+            solved = sum(row["solved"] for row in rows)
+            times = [row["time_sec"] for row in rows]
+            nodes = [row["nodes_explored"] for row in rows]
+            reasons = sorted({row["reason"] for row in rows if row["reason"]})
+            print(f"{size:>4} {algo:<10} {solved:>5}/{repeats:<3} {statistics.median(times):>11.3f}s "
+                  f"{max(times):>9.3f}s {int(statistics.median(nodes)):>13,} {','.join(reasons)[:30]:<12}")
+            if solved == 0:
+                active.remove(algo)
+                print(f"{'':>4} -> {algo} không giải được ở N={size}, bỏ qua các N lớn hơn")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các thuật toán Wrap Pipes theo kích thước lưới N.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="các kích thước N cần đo")
+    parser.add_argument("--algos", nargs="+", choices=sorted(ALGORITHMS), default=list(ALGORITHMS),
+                        help="các thuật toán cần đo (mặc định: tất cả)")
+    parser.add_argument("--repeats", type=int, default=3, help="số puzzle (seed 0..repeats-1) cho mỗi N")
+    parser.add_argument("--density", type=float, default=0.5, help="mật độ cạnh của puzzle sinh ra")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="giới hạn thời gian mỗi lần chạy (giây)")
+    parser.add_argument("--max-memory-nodes", type=int, default=2_000_000,
+                        help="số state lưu cùng lúc tối đa mỗi lần chạy")
+    parser.add_argument("--output", default=None, help="file CSV ghi kết quả chi tiết (tùy chọn)")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            run_scaling(args.algos, args.sizes, args.repeats, args.density, args.time_limit,
+                        args.max_memory_nodes, writer)
+    else:
+        run_scaling(args.algos, args.sizes, args.repeats, args.density, args.time_limit, args.max_memory_nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,21 @@
 
 from collections import deque
 import heapq
+import math
+import os
+import random
+import sys
+import time
 from enum import Enum
-from typing import List, Tuple, Dict, Set
+from typing import List, Tuple, Dict, Set, Optional
+
+# search_common/ (Budget, Instrumentation, TranspositionTable dùng chung với SudokuTHVK-main)
+# nằm ở thư mục gốc repo, ngay trên thư mục này
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from search_common import Budget, Instrumentation, TranspositionTable
 
 
 # ============================================================================
@@ -35,6 +48,12 @@ class TileType(Enum):
 # ============================================================================
 
 class Tile:
+    """
+    Một ô ống. Các Tile được intern: mỗi cặp (loại, độ xoay) chỉ có đúng một
+    object (5 loại x 4 độ xoay = 20 object), lấy từ bảng TILES dựng sẵn khi
+    import module. Vì vậy so sánh hai Tile chỉ là so sánh identity, và mọi
+    thông tin (connections, mask, ký tự, tile sau khi xoay) đều tra bảng.
+    """
 
     # Định nghĩa connections cho mỗi loại tile ở rotation 0
     BASE_CONNECTIONS = {
@@ -44,49 +63,113 @@ class Tile:
         TileType.T_JUNCTION: [0, 1, 2], # Up-Right-Down (├)
         TileType.CROSS: [0, 1, 2, 3]    # All directions (┼)
     }
-    
-    def __init__(self, tile_type: TileType, rotation: int = 0):
+
+    # Ký tự Unicode cho các loại ống
+    CHARS = {
+        TileType.EMPTY: [' ', ' ', ' ', ' '],
+        TileType.STRAIGHT: ['│', '─', '│', '─'],
+        TileType.CORNER: ['└', '┘', '┐', '┌'],
+        TileType.T_JUNCTION: ['├', '┬', '┤', '┴'],
+        TileType.CROSS: ['┼', '┼', '┼', '┼']
+    }
+
+    __slots__ = ('type', 'rotation', 'connections', 'mask', 'char')
+
+    def __new__(cls, tile_type: TileType, rotation: int = 0):
         """
         Args:
             tile_type: Loại tile (STRAIGHT, CORNER, etc.)
-            rotation: Độ xoay (0, 1, 2, 3)
+            rotation: Độ xoay (0, 1, 2, 3), tự động lấy modulo 4
+
+        Returns:
+            Tile singleton tương ứng trong bảng TILES
         """
-        self.type = tile_type
-        self.rotation = rotation % 4  # Đảm bảo 0-3
-    
-    def get_connections(self) -> List[int]:
+        return TILES[tile_type.value][rotation % 4]
 
-        base = self.BASE_CONNECTIONS[self.type]
+    @classmethod
+    def _create(cls, tile_type: TileType, rotation: int) -> 'Tile':
+        """Tạo object thật sự (chỉ gọi khi dựng bảng TILES)."""
+        tile = object.__new__(cls)
+        tile.type = tile_type
+        tile.rotation = rotation
         # Xoay mỗi connection theo rotation
-        return [(conn + self.rotation) % 4 for conn in base]
+        tile.connections = tuple((conn + rotation) % 4 for conn in cls.BASE_CONNECTIONS[tile_type])
+        tile.mask = _connections_to_mask(tile.connections)
+        tile.char = cls.CHARS[tile_type][rotation]
+        return tile
+
+    def get_connections(self) -> Tuple[int, ...]:
+        return self.connections
     
     def rotate(self, times: int = 1) -> 'Tile':
-        return Tile(self.type, self.rotation + times)
+        return TILES[self.type.value][(self.rotation + times) % 4]
     
-    def __eq__(self, other):
-        if not isinstance(other, Tile):
-            return False
-        return self.type == other.type and self.rotation == other.rotation
-    
-    def __hash__(self):
-        return hash((self.type, self.rotation))
+    def __reduce__(self):
+        # Pickle/copy trả về đúng singleton
+        return (Tile, (self.type, self.rotation))
     
     def __repr__(self):
         return f"Tile({self.type.name}, rot={self.rotation})"
     
     def to_char(self) -> str:
-        if self.type == TileType.EMPTY:
-            return ' '
-        
-        # Ký tự Unicode cho các loại ống
-        chars = {
-            TileType.STRAIGHT: ['│', '─', '│', '─'],
-            TileType.CORNER: ['└', '┘', '┐', '┌'],
-            TileType.T_JUNCTION: ['├', '┬', '┤', '┴'],
-            TileType.CROSS: ['┼', '┼', '┼', '┼']
-        }
-        
-        return chars[self.type][self.rotation]
+        return self.char
+
+
+# ============================================================================
+# CONNECTION MASKS - BẢNG BITMASK KẾT NỐI
+# ============================================================================
+
+# Mỗi tile được mã hoá thành mask 4 bit: bit d bật <=> tile có đầu nối theo hướng d
+# (0=Up, 1=Right, 2=Down, 3=Left). Các loại tile được đánh chỉ số theo TileType.value.
+TILE_TYPES = tuple(sorted(TileType, key=lambda t: t.value))
+
+
+def _connections_to_mask(connections) -> int:
+    mask = 0
+    for direction in connections:
+        mask |= 1 << direction
+    return mask
+
+
+# TILES[type_code][rotation] -> Tile singleton
+TILES = tuple(
+    tuple(Tile._create(tile_type, rotation) for rotation in range(4))
+    for tile_type in TILE_TYPES
+)
+
+# CONNECTION_MASKS[type_code][rotation] -> mask 4 bit
+CONNECTION_MASKS = tuple(tuple(tile.mask for tile in row) for row in TILES)
+
+# ROTATION_MASKS[type_code]: chu kỳ đối xứng - 1 (EMPTY/CROSS: 0, STRAIGHT: 1, CORNER/T: 3).
+# Độ xoay chuẩn hoá = rotation & ROTATION_MASKS[type_code], nên các hướng xoay
+# trùng hình dạng (VD STRAIGHT 0 và 2) được lưu giống hệt nhau trong PipeState.
+ROTATION_MASKS = tuple(len(set(masks)) - 1 for masks in CONNECTION_MASKS)
+
+
+# Ký tự trong file input (xem PipeState.from_string) -> (loại tile, độ xoay)
+INPUT_CHARS = {
+    '.': (TileType.EMPTY, 0),
+    ' ': (TileType.EMPTY, 0),
+    '|': (TileType.STRAIGHT, 0),
+    '-': (TileType.STRAIGHT, 1),
+    'L': (TileType.CORNER, 0),
+    'J': (TileType.CORNER, 1),
+    '7': (TileType.CORNER, 2),
+    'r': (TileType.CORNER, 3),
+    'T': (TileType.T_JUNCTION, 0),
+    'F': (TileType.T_JUNCTION, 1),
+    'H': (TileType.T_JUNCTION, 2),
+    'E': (TileType.T_JUNCTION, 3),
+    '+': (TileType.CROSS, 0),
+}
+
+# OUTPUT_CHARS[type_code][rotation] -> ký tự input (chiều ngược lại, dùng cho PipeState.to_string)
+OUTPUT_CHARS = tuple(
+    tuple(next(ch for ch, (tile_type, rot) in INPUT_CHARS.items()
+               if tile_type is t and rot == (rotation & ROTATION_MASKS[t.value]) and ch != ' ')
+          for rotation in range(4))
+    for t in TILE_TYPES
+)
 
 
 # ============================================================================
@@ -96,29 +179,70 @@ class Tile:
 class PipeState:
     """
     Trạng thái bài toán: Lưới các tile ống.
+
+    Biểu diễn nén (bit-packed):
+    - type_codes: tuple phẳng size*size mã loại tile (TileType.value), dùng chung
+      giữa mọi state sinh ra từ cùng một puzzle (xoay ống không đổi loại ống)
+    - rotations: một số nguyên duy nhất, ô i = r*size + c chiếm 2 bit từ bit 2*i
+      (độ xoay đã chuẩn hoá theo đối xứng, xem ROTATION_MASKS)
+    - open_ends: số đầu hở của lưới, cập nhật tăng dần khi xoay một ô
+    Nhờ vậy hash là O(1), copy state chỉ là tạo một int mới.
     """
-    
+
+    __slots__ = ('type_codes', 'rotations', 'size', 'open_ends')
+
     def __init__(self, grid: List[List[Tile]], size: int = 7):
         """
         Args:
             grid: 2D list của Tile objects
             size: Kích thước lưới (7 cho 7x7)
         """
-        self.grid = [row[:] for row in grid]  # Deep copy
+        type_codes = []
+        rotations = 0
+        for r in range(size):
+            for c in range(size):
+                tile = grid[r][c]
+                code = tile.type.value
+                type_codes.append(code)
+                rotations |= (tile.rotation & ROTATION_MASKS[code]) << (2 * (r * size + c))
+        self.type_codes = tuple(type_codes)
+        self.rotations = rotations
         self.size = size
-    
+        self.open_ends = _count_open_ends_full(self)
+
+    @classmethod
+    def _packed(cls, type_codes: Tuple[int, ...], rotations: int, size: int,
+                open_ends: Optional[int] = None) -> 'PipeState':
+        """
+        Tạo state trực tiếp từ dạng nén (không qua grid).
+        Nếu không truyền open_ends thì đếm lại toàn bộ lưới.
+        """
+        state = object.__new__(cls)
+        state.type_codes = type_codes
+        state.rotations = rotations
+        state.size = size
+        state.open_ends = _count_open_ends_full(state) if open_ends is None else open_ends
+        return state
+
     def __eq__(self, other):
         if not isinstance(other, PipeState):
             return False
-        return self.grid == other.grid
-    
+        return (self.rotations == other.rotations
+                and self.size == other.size
+                and (self.type_codes is other.type_codes or self.type_codes == other.type_codes))
+
     def __hash__(self):
-        return hash(tuple(tuple(row) for row in self.grid))
-    
+        return hash(self.rotations)
+
     def __lt__(self, other):
         # Cho priority queue
-        return str(self.grid) < str(other.grid)
-    
+        return self.rotations < other.rotations
+
+    @property
+    def grid(self) -> List[List[Tile]]:
+        """2D list các Tile (tạo mới mỗi lần gọi, dùng cho hiển thị)."""
+        return [[self.get_tile(r, c) for c in range(self.size)] for r in range(self.size)]
+
     @staticmethod
     def from_string(grid_str: str) -> 'PipeState':
         """
@@ -147,21 +271,7 @@ class PipeState:
         """
         lines = [line.strip() for line in grid_str.strip().splitlines() if line.strip()]
         
-        char_map = {
-            '.': (TileType.EMPTY, 0),
-            ' ': (TileType.EMPTY, 0),
-            '|': (TileType.STRAIGHT, 0),
-            '-': (TileType.STRAIGHT, 1),
-            'L': (TileType.CORNER, 0),
-            'J': (TileType.CORNER, 1),
-            '7': (TileType.CORNER, 2),
-            'r': (TileType.CORNER, 3),
-            'T': (TileType.T_JUNCTION, 0),
-            'F': (TileType.T_JUNCTION, 1),
-            'H': (TileType.T_JUNCTION, 2),
-            'E': (TileType.T_JUNCTION, 3),
-            '+': (TileType.CROSS, 0),
-        }
+        char_map = INPUT_CHARS
         
         grid = []
         for line in lines:
@@ -178,10 +288,30 @@ class PipeState:
         size = len(grid)
         return PipeState(grid, size)
     
+    def to_string(self) -> str:
+        """Chuỗi cùng format với from_string (mỗi hàng một dòng), dùng để ghi file test_inputs."""
+        rotations = self.rotations
+        size = self.size
+        return "\n".join(
+            "".join(OUTPUT_CHARS[self.type_codes[i]][(rotations >> (2 * i)) & 3]
+                    for i in range(r * size, (r + 1) * size))
+            for r in range(size)
+        )
+
+    def get_rotation(self, r: int, c: int) -> int:
+        """Lấy độ xoay (0-3) của ô (r, c)"""
+        return (self.rotations >> (2 * (r * self.size + c))) & 3
+
+    def get_mask(self, r: int, c: int) -> int:
+        """Lấy mask 4 bit các hướng nối của ô (r, c)"""
+        i = r * self.size + c
+        return CONNECTION_MASKS[self.type_codes[i]][(self.rotations >> (2 * i)) & 3]
+
     def get_tile(self, r: int, c: int) -> Tile:
         """Lấy tile tại vị trí (r, c)"""
-        return self.grid[r][c]
-    
+        i = r * self.size + c
+        return TILES[self.type_codes[i]][(self.rotations >> (2 * i)) & 3]
+
     def set_tile(self, r: int, c: int, tile: Tile) -> 'PipeState':
         """
         Tạo state mới với tile tại (r, c) được thay đổi.
@@ -189,9 +319,32 @@ class PipeState:
         Returns:
             PipeState mới
         """
-        new_grid = [row[:] for row in self.grid]
-        new_grid[r][c] = tile
-        return PipeState(new_grid, self.size)
+        i = r * self.size + c
+        shift = 2 * i
+        code = tile.type.value
+        rotations = (self.rotations & ~(3 << shift)) | ((tile.rotation & ROTATION_MASKS[code]) << shift)
+        type_codes = self.type_codes
+        if type_codes[i] != code:
+            type_codes = type_codes[:i] + (code,) + type_codes[i + 1:]
+        old_mask = self.get_mask(r, c)
+        new_mask = tile.mask
+        open_ends = self.open_ends + _open_ends_delta(self, i, old_mask, new_mask)
+        return PipeState._packed(type_codes, rotations, self.size, open_ends)
+
+    def rotate_tile(self, r: int, c: int, times: int = 1) -> 'PipeState':
+        """
+        Tạo state mới với tile tại (r, c) xoay thêm `times` lần 90°.
+        Chỉ thay đổi 2 bit trong `rotations`, không copy lưới.
+        """
+        i = r * self.size + c
+        shift = 2 * i
+        code = self.type_codes[i]
+        rotation = (self.rotations >> shift) & 3
+        new_rotation = (rotation + times) & ROTATION_MASKS[code]
+        rotations = self.rotations ^ ((rotation ^ new_rotation) << shift)
+        masks = CONNECTION_MASKS[code]
+        open_ends = self.open_ends + _open_ends_delta(self, i, masks[rotation], masks[new_rotation])
+        return PipeState._packed(self.type_codes, rotations, self.size, open_ends)
 
 
 # ============================================================================
@@ -204,79 +357,159 @@ def get_neighbor_pos(r: int, c: int, direction: int, size: int) -> Tuple[int, in
     return ((r + dr) % size, (c + dc) % size)
 
 
+_NEIGHBOR_TABLES: Dict[int, Tuple[Tuple[int, int, int, int], ...]] = {}
+
+
+def get_neighbor_table(size: int) -> Tuple[Tuple[int, int, int, int], ...]:
+    """
+    Bảng láng giềng (có wrap) theo chỉ số phẳng: table[i][d] là chỉ số ô kề
+    với ô i theo hướng d. Tính một lần cho mỗi kích thước lưới.
+    """
+    table = _NEIGHBOR_TABLES.get(size)
+    if table is None:
+        rows = []
+        for r in range(size):
+            for c in range(size):
+                rows.append(tuple(nr * size + nc
+                                  for nr, nc in (get_neighbor_pos(r, c, d, size) for d in range(4))))
+        table = tuple(rows)
+        _NEIGHBOR_TABLES[size] = table
+    return table
+
+
+def _cell_masks(state: PipeState) -> List[int]:
+    """Danh sách mask kết nối của mọi ô, theo chỉ số phẳng."""
+    rotations = state.rotations
+    return [CONNECTION_MASKS[code][(rotations >> (2 * i)) & 3]
+            for i, code in enumerate(state.type_codes)]
+
+
 def is_connected(state: PipeState, r: int, c: int, direction: int) -> bool:
     
-    tile = state.get_tile(r, c)
-    connections = tile.get_connections()
-    
     # Tile hiện tại phải có connection theo direction
-    if direction not in connections:
+    if not (state.get_mask(r, c) >> direction) & 1:
         return False
     
     # Lấy vị trí láng giềng (có wrap)
     nr, nc = get_neighbor_pos(r, c, direction, state.size)
-    neighbor_tile = state.get_tile(nr, nc)
-    neighbor_connections = neighbor_tile.get_connections()
     
     # Láng giềng phải có connection ngược lại
     opposite_direction = (direction + 2) % 4
-    return opposite_direction in neighbor_connections
+    return bool((state.get_mask(nr, nc) >> opposite_direction) & 1)
 
 
-def count_open_ends(state: PipeState) -> int:
+def _count_open_ends_full(state: PipeState) -> int:
+    """Đếm đầu hở bằng cách quét toàn bộ lưới (chỉ dùng khi tạo state ban đầu)."""
     open_count = 0
+    masks = _cell_masks(state)
+    neighbors = get_neighbor_table(state.size)
     
-    for r in range(state.size):
-        for c in range(state.size):
-            tile = state.get_tile(r, c)
-            connections = tile.get_connections()
-            
-            # Đếm số connection không nối với láng giềng
-            for direction in connections:
-                if not is_connected(state, r, c, direction):
-                    open_count += 1
+    for i, mask in enumerate(masks):
+        if not mask:
+            continue
+        # Đếm số connection không nối với láng giềng
+        for direction in range(4):
+            if (mask >> direction) & 1 and not (masks[neighbors[i][direction]] >> ((direction + 2) % 4)) & 1:
+                open_count += 1
     
     return open_count
 
 
+def _open_ends_delta(state: PipeState, i: int, old_mask: int, new_mask: int) -> int:
+    """
+    Độ thay đổi số đầu hở khi ô i đổi mask từ old_mask sang new_mask.
+    Chỉ xét 4 cạnh của ô i với 4 láng giềng (có wrap): mỗi cạnh hở đúng
+    1 đầu khi hai phía không khớp (bit ô i XOR bit láng giềng).
+    """
+    changed = old_mask ^ new_mask
+    if not changed:
+        return 0
+    size = state.size
+    if size == 1:
+        # Lưới 1x1: ô tự làm láng giềng của chính nó
+        def self_open(mask):
+            return sum(1 for d in range(4) if (mask >> d) & 1 and not (mask >> ((d + 2) % 4)) & 1)
+        return self_open(new_mask) - self_open(old_mask)
+    neighbors = get_neighbor_table(size)[i]
+    rotations = state.rotations
+    type_codes = state.type_codes
+    delta = 0
+    for direction in range(4):
+        if not (changed >> direction) & 1:
+            continue
+        n = neighbors[direction]
+        neighbor_bit = (CONNECTION_MASKS[type_codes[n]][(rotations >> (2 * n)) & 3] >> ((direction + 2) % 4)) & 1
+        # Bit của ô i đổi: cạnh này chuyển giữa khớp / không khớp
+        delta += 1 - 2 * (((old_mask >> direction) & 1) ^ neighbor_bit)
+    return delta
+
+
+def count_open_ends(state: PipeState) -> int:
+    """Số đầu hở, O(1) vì state mang sẵn giá trị được cập nhật tăng dần."""
+    return state.open_ends
+
+
 def is_goal(state: PipeState) -> bool:
-    return count_open_ends(state) == 0
+    return state.open_ends == 0
 
 
 def get_tiles_with_open_ends(state: PipeState) -> Set[Tuple[int, int]]:
     tiles_to_rotate = set()
+    size = state.size
+    masks = _cell_masks(state)
+    neighbors = get_neighbor_table(size)
+    empty = TileType.EMPTY.value
+    cross = TileType.CROSS.value
     
-    for r in range(state.size):
-        for c in range(state.size):
-            tile = state.get_tile(r, c)
-            
-            if tile.type == TileType.EMPTY or tile.type == TileType.CROSS:
-                continue
-            
-            connections = tile.get_connections()
-            has_open_end = False
-            
-            # Check nếu tile có open end
-            for direction in connections:
-                if not is_connected(state, r, c, direction):
-                    has_open_end = True
-                    break
+    for i, code in enumerate(state.type_codes):
+        if code == empty or code == cross:
+            continue
+        
+        mask = masks[i]
+        
+        # Check nếu tile có open end
+        has_open_end = False
+        for direction in range(4):
+            if (mask >> direction) & 1 and not (masks[neighbors[i][direction]] >> ((direction + 2) % 4)) & 1:
+                has_open_end = True
+                break
+        
+        if has_open_end:
+            tiles_to_rotate.add(divmod(i, size))
             
-            if has_open_end:
-                tiles_to_rotate.add((r, c))
-                
-                # Thêm láng giềng
-                for direction in range(4):
-                    nr, nc = get_neighbor_pos(r, c, direction, state.size)
-                    neighbor_tile = state.get_tile(nr, nc)
-                    if neighbor_tile.type != TileType.EMPTY:
-                        tiles_to_rotate.add((nr, nc))
+            # Thêm láng giềng
+            for n in neighbors[i]:
+                if state.type_codes[n] != empty:
+                    tiles_to_rotate.add(divmod(n, size))
     
     return tiles_to_rotate
 
 
-def get_successors(state: PipeState, optimized: bool = True) -> List[PipeState]:
+def _rotated_variants(state: PipeState, r: int, c: int, orientations: bool) -> List[PipeState]:
+    """
+    Các state sinh ra khi xoay ô (r, c):
+    - orientations=False: chỉ xoay thêm 90° (1 successor)
+    - orientations=True: nhảy thẳng tới mỗi hướng phân biệt còn lại của ô
+      (STRAIGHT: 1, CORNER/T_JUNCTION: 3), mỗi hướng tính là một nước đi
+    """
+    if not orientations:
+        return [state.rotate_tile(r, c)]
+    period = ROTATION_MASKS[state.type_codes[r * state.size + c]] + 1
+    return [state.rotate_tile(r, c, times) for times in range(1, period)]
+
+
+def get_successor_moves(state: PipeState, optimized: bool = True,
+                        orientations: bool = False) -> List[Tuple[Tuple[int, int], PipeState]]:
+    """
+    Sinh successors kèm nước đi: danh sách (ô vừa xoay (r, c), state mới).
+
+    Args:
+        optimized: Chỉ xoay các ô có đầu hở và láng giềng của chúng
+        orientations: Mỗi nước đi đặt ô về một hướng phân biệt bất kỳ thay vì
+            chỉ xoay 90° (giảm độ sâu lời giải, xem _rotated_variants)
+    """
     successors = []
+    cross = TileType.CROSS.value
     
     if optimized:
         # Chỉ xoay tiles liên quan
@@ -286,30 +519,31 @@ def get_successors(state: PipeState, optimized: bool = True) -> List[PipeState]:
             return []
         
         for r, c in tiles_to_rotate:
-            tile = state.get_tile(r, c)
-            
-            if tile.type == TileType.CROSS:
+            if state.type_codes[r * state.size + c] == cross:
                 continue
             
-            rotated_tile = tile.rotate(1)
-            new_state = state.set_tile(r, c, rotated_tile)
-            successors.append(new_state)
+            for successor in _rotated_variants(state, r, c, orientations):
+                successors.append(((r, c), successor))
     else:
         # Xoay tất cả tiles (cách cũ)
+        empty = TileType.EMPTY.value
         for r in range(state.size):
             for c in range(state.size):
-                tile = state.get_tile(r, c)
+                code = state.type_codes[r * state.size + c]
                 
-                if tile.type == TileType.EMPTY or tile.type == TileType.CROSS:
+                if code == empty or code == cross:
                     continue
                 
-                rotated_tile = tile.rotate(1)
-                new_state = state.set_tile(r, c, rotated_tile)
-                successors.append(new_state)
+                for successor in _rotated_variants(state, r, c, orientations):
+                    successors.append(((r, c), successor))
     
     return successors
 
 
+def get_successors(state: PipeState, optimized: bool = True, orientations: bool = False) -> List[PipeState]:
+    return [successor for _, successor in get_successor_moves(state, optimized, orientations)]
+
+
 # ============================================================================
 # HEURISTIC FUNCTIONS
 # ============================================================================
@@ -324,32 +558,362 @@ def heuristic_simple(state: PipeState) -> int:
     return count_open_ends(state)
 
 
+# Chi phí (số lần xoay 90°) nhỏ nhất để ô đổi trạng thái có/không có ống ở một hướng:
+# FLIP_COSTS[type][rotation][direction]. UNFIXABLE nếu không xoay được (EMPTY, CROSS).
+UNFIXABLE = 10 ** 6
+
+
+def _flip_cost_table(orientations: bool):
+    table = []
+    for code in range(len(TILE_TYPES)):
+        per_rotation = []
+        for rotation in range(4):
+            base = CONNECTION_MASKS[code][rotation]
+            costs = []
+            for d in range(4):
+                cost = UNFIXABLE
+                for k in (1, 2, 3):
+                    if (CONNECTION_MASKS[code][(rotation + k) & 3] ^ base) >> d & 1:
+                        # orientations=True: đặt thẳng về hướng bất kỳ chỉ tốn 1 nước
+                        cost = 1 if orientations else k
+                        break
+                costs.append(cost)
+            per_rotation.append(tuple(costs))
+        table.append(tuple(per_rotation))
+    return tuple(table)
+
+
+FLIP_COSTS = _flip_cost_table(orientations=False)
+FLIP_COSTS_ORIENTED = _flip_cost_table(orientations=True)
+
+
+def heuristic_matching(state: PipeState, orientations: bool = False) -> int:
+    """
+    Heuristic admissible theo số lần xoay.
+
+    Mỗi cạnh lệch (một bên có ống, bên kia không) chỉ được sửa khi xoay ít nhất
+    một trong hai ô hai đầu, tốn ít nhất w = min(chi phí lật ô u, chi phí lật ô v)
+    theo bảng FLIP_COSTS. Với một tập cạnh lệch không chung đỉnh (matching), các lần
+    xoay cần thiết là rời nhau nên tổng w là cận dưới. Matching được chọn tham lam,
+    ưu tiên cạnh có w lớn.
+
+    Cạnh lệch mà cả hai đầu đều không xoay được -> state không thể tới đích,
+    trả về UNFIXABLE.
+    """
+    size = state.size
+    neighbors = get_neighbor_table(size)
+    masks = _cell_masks(state)
+    codes = state.type_codes
+    rotations = state.rotations
+    costs = FLIP_COSTS_ORIENTED if orientations else FLIP_COSTS
+
+    edges = []
+    for i in range(size * size):
+        mask_i = masks[i]
+        cost_i = costs[codes[i]][(rotations >> 2 * i) & 3]
+        # Mỗi cạnh chỉ xét một lần: từ ô i sang phải (1) và xuống dưới (2)
+        for d in (1, 2):
+            j = neighbors[i][d]
+            d_j = (d + 2) & 3
+            if ((mask_i >> d) ^ (masks[j] >> d_j)) & 1:
+                w = cost_i[d]
+                w_j = costs[codes[j]][(rotations >> 2 * j) & 3][d_j]
+                if w_j < w:
+                    w = w_j
+                if w >= UNFIXABLE:
+                    return UNFIXABLE
+                edges.append((w, i, j))
+
+    edges.sort(reverse=True)
+    used = bytearray(size * size)
+    total = 0
+    for w, i, j in edges:
+        if not used[i] and not used[j]:
+            used[i] = used[j] = 1
+            total += w
+    return total
+
+
+# anytime_astar chỉ báo cận suboptimality với heuristic có thuộc tính admissible = True
+heuristic_matching.admissible = True
+
+
+def _rotation_cost(code: int, rotation: int, mask: int, orientations: bool) -> int:
+    """Số nước đi nhỏ nhất để ô (code, rotation) mang mask kết nối `mask`."""
+    for k in range(4):
+        if CONNECTION_MASKS[code][(rotation + k) & 3] == mask:
+            return min(k, 1) if orientations else k
+    return UNFIXABLE
+
+
+def make_pattern_heuristic(initial_state: PipeState, orientations: bool = False, block: int = 2):
+    """
+    Tạo heuristic dạng pattern database (PDB) cho riêng một puzzle.
+
+    Mỗi nước đi chỉ xoay đúng một ô, nên chi phí tới đích của các vùng ô rời nhau
+    cộng được với nhau (additive PDB). Lưới được chia thành các khối block x block;
+    với mỗi khối, giá trị PDB là số nước xoay nhỏ nhất để cả khối đạt một tổ hợp
+    hướng (a) nằm trong miền sau arc consistency của CSP và (b) khớp nhau trên mọi
+    cạnh bên trong khối. Mọi lời giải đều thoả (a) và (b) nên tổng là admissible.
+
+    Miền được lan truyền một lần cho puzzle (không phụ thuộc state); giá trị của
+    khối được tính lười theo tổ hợp độ xoay hiện tại rồi cache lại.
+    Arc consistency phát hiện vô nghiệm -> heuristic luôn trả về UNFIXABLE.
+    """
+    size = initial_state.size
+    neighbors = get_neighbor_table(size)
+    domains = _initial_domains(initial_state)
+    if not _propagate(domains, neighbors, list(range(len(domains)))):
+        return lambda state: UNFIXABLE
+
+    codes = initial_state.type_codes
+    blocks = []
+    for r0 in range(0, size, block):
+        for c0 in range(0, size, block):
+            blocks.append(tuple(r * size + c
+                                for r in range(r0, min(r0 + block, size))
+                                for c in range(c0, min(c0 + block, size))))
+
+    # Các tổ hợp mask hợp lệ trong từng khối (duyệt dần từng ô, loại sớm khi lệch)
+    block_assignments = []
+    for cells in blocks:
+        position = {i: k for k, i in enumerate(cells)}
+        partial = [()]
+        for k, i in enumerate(cells):
+            options = [m for m in range(16) if domains[i] >> m & 1]
+            extended = []
+            for assignment in partial:
+                for m in options:
+                    ok = True
+                    for d in range(4):
+                        p = position.get(neighbors[i][d])
+                        if p is None or p > k:
+                            continue
+                        other = m if p == k else assignment[p]
+                        if (m >> d & 1) != (other >> ((d + 2) & 3) & 1):
+                            ok = False
+                            break
+                    if ok:
+                        extended.append(assignment + (m,))
+            partial = extended
+        block_assignments.append(partial)
+
+    caches = [{} for _ in blocks]
+    block_of = [0] * len(codes)
+    for b, cells in enumerate(blocks):
+        for i in cells:
+            block_of[i] = b
+
+    def block_value(b: int, rotations: int) -> int:
+        cells = blocks[b]
+        key = tuple((rotations >> 2 * i) & 3 for i in cells)
+        value = caches[b].get(key)
+        if value is None:
+            value = UNFIXABLE
+            for assignment in block_assignments[b]:
+                cost = 0
+                for i, rotation, m in zip(cells, key, assignment):
+                    cost += _rotation_cost(codes[i], rotation, m, orientations)
+                if cost < value:
+                    value = cost
+            caches[b][key] = value
+        return value
+
+    # Tính tăng dần từ state được đánh giá ngay trước đó: các successor của cùng một
+    # node chỉ lệch nhau vài ô, nên chỉ cần tính lại các khối chứa ô khác nhau
+    # (O(số ô khác) thay vì O(số khối) - quan trọng với lưới lớn).
+    last = {'rotations': None, 'values': None, 'total': 0}
+    max_changed = 8
+
+    def pattern_heuristic(state: PipeState) -> int:
+        rotations = state.rotations
+        values = last['values']
+        if values is not None:
+            diff = rotations ^ last['rotations']
+            changed = set()
+            while diff and len(changed) <= max_changed:
+                i = ((diff & -diff).bit_length() - 1) >> 1
+                changed.add(block_of[i])
+                diff &= ~(3 << 2 * i)
+            if not diff:
+                total = last['total']
+                for b in changed:
+                    value = block_value(b, rotations)
+                    total += value - values[b]
+                    values[b] = value
+                last['rotations'] = rotations
+                last['total'] = total
+                return total
+
+        values = [block_value(b, rotations) for b in range(len(blocks))]
+        total = sum(values)
+        last['rotations'] = rotations
+        last['values'] = values
+        last['total'] = total
+        return total
+
+    pattern_heuristic.admissible = True
+    return pattern_heuristic
+
+
+# ============================================================================
+# SEARCH NODE
+# ============================================================================
+
+class SearchNode:
+    """
+    Node trong cây tìm kiếm (giống Node của SudokuTHVK-main/src/core/node.py):
+    chỉ giữ state, con trỏ tới node cha, nước đi tạo ra nó và g (số bước xoay).
+    Frontier không còn lưu cả đường đi, path chỉ được dựng lại khi tìm thấy đích.
+    """
+
+    __slots__ = ('state', 'parent', 'move', 'g')
+
+    def __init__(self, state: PipeState, parent: Optional['SearchNode'] = None,
+                 move: Optional[Tuple[int, int]] = None, g: int = 0):
+        self.state = state
+        self.parent = parent
+        self.move = move      # Ô (r, c) vừa được xoay để ra state này
+        self.g = g
+
+    def path(self) -> List[PipeState]:
+        """Truy vết parent để dựng đường đi từ state gốc tới node này."""
+        states = []
+        node = self
+        while node is not None:
+            states.append(node.state)
+            node = node.parent
+        states.reverse()
+        return states
+
+    def moves(self) -> List[Tuple[int, int]]:
+        """Danh sách các ô đã xoay, theo thứ tự từ gốc."""
+        moves = []
+        node = self
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return moves
+
+
+# ============================================================================
+# SEARCH BUDGET - GIỚI HẠN TÀI NGUYÊN
+# ============================================================================
+
+# Budget (time_limit / max_nodes / max_memory_nodes / cancel) dùng chung với SudokuTHVK-main,
+# xem search_common/budget.py. Ở đây max_nodes tính theo nodes_explored; khi hết ngân sách
+# thuật toán trả về (None, path_hoặc_None, stats) với stats['reason'] = budget.reason.
+
+# Callback progress(stats) được gọi mỗi PROGRESS_INTERVAL node (UI dùng để hiển thị
+# tiến độ). Callback trả về True nghĩa là người gọi muốn dừng tìm kiếm.
+PROGRESS_INTERVAL = 1000
+
+
+def _report_progress(progress, nodes_explored: int, frontier_size: int, visited_size: int) -> bool:
+    """Gửi số liệu hiện tại cho callback; trả về True nếu cần dừng."""
+    return bool(progress({
+        'nodes_explored': nodes_explored,
+        'frontier_size': frontier_size,
+        'visited_states': visited_size,
+    }))
+
+
+def _stopped_stats(reason: str, nodes_explored: int, max_frontier_size: int, visited_size: int) -> Dict:
+    """Stats trả về khi tìm kiếm bị dừng giữa chừng (hết ngân sách hoặc bị hủy)."""
+    stats = {
+        'nodes_explored': nodes_explored,
+        'max_frontier_size': max_frontier_size,
+        'visited_states': visited_size,
+        'reason': reason
+    }
+    if reason == 'cancelled':
+        stats['cancelled'] = True
+    return stats
+
+
+# ============================================================================
+# INSTRUMENTATION - ĐẾM SỐ LẦN GỌI VÀ THỜI GIAN (TÙY CHỌN)
+# ============================================================================
+
+# Instrumentation (wrap / set / summary / format) dùng chung với SudokuTHVK-main, xem
+# search_common/instrument.py (cách gắn vào vòng lặp: docstring của Instrumentation). bfs / astar /
+# bidirectional_bfs nhận instrument=None; khi None không tốn thêm chi phí nào.
+
+
+# ============================================================================
+# TRANSPOSITION TABLE - BẢNG CHUYỂN VỊ CÓ GIỚI HẠN BỘ NHỚ
+# ============================================================================
+
+# TranspositionTable (giới hạn max_entries / max_bytes, thay thế 'lru' hoặc 'depth', fingerprint)
+# dùng chung với SudokuTHVK-main, xem search_common/transposition.py. ida_star dùng nó làm
+# transposition table; bfs / astar nhận table= để thay tập visited.
+
+
 # ============================================================================
 # SEARCH ALGORITHMS
 # ============================================================================
 
-def bfs(initial_state: PipeState):
-    """BFS - Breadth-First Search"""
+def _require_budget_for_table(table: Optional[TranspositionTable], budget: Optional[Budget]) -> None:
+    """
+    Bảng có giới hạn làm tập visited có thể bỏ rồi nhận lại state đã gặp; đồ thị xoay ô có
+    chu trình nên không có budget thì tìm kiếm không chắc dừng.
+    """
+    if table is not None and table.capacity is not None and budget is None:
+        raise ValueError("table có giới hạn (capacity) cần đi kèm budget để tìm kiếm chắc chắn dừng")
+
+
+def bfs(initial_state: PipeState, orientations: bool = False, progress=None,
+        budget: Optional[Budget] = None, instrument: Optional[Instrumentation] = None,
+        table: Optional[TranspositionTable] = None):
+    """
+    BFS - Breadth-First Search.
+    instrument: đếm số lần gọi và thời gian của successors / goal_test / visited / frontier.
+    table: bảng chuyển vị có giới hạn dùng thay cho tập visited (state bị bỏ khỏi bảng có thể
+    được sinh lại, đổi lại bộ nhớ không tăng vô hạn). Xoay ô tạo chu trình trong đồ thị state
+    nên với bảng có giới hạn, puzzle vô nghiệm có thể bị duyệt mãi: bắt buộc truyền budget
+    (ValueError nếu thiếu).
+    """
+    _require_budget_for_table(table, budget)
     if is_goal(initial_state):
         return initial_state, [initial_state], {'nodes_explored': 0, 'max_frontier_size': 1}
     
-    frontier = deque([(initial_state, [initial_state])])
+    frontier = deque([SearchNode(initial_state)])
     visited = {initial_state}
+
+    successors_of, goal_test = get_successor_moves, is_goal
+    popleft, append = frontier.popleft, frontier.append
+    if instrument is not None:
+        successors_of = instrument.wrap('successors', successors_of)
+        goal_test = instrument.wrap('goal_test', goal_test)
+        visited = instrument.set('visited', visited)
+        popleft = instrument.wrap('frontier', popleft)
+        append = instrument.wrap('frontier', append)
+    if table is not None:
+        visited = table if instrument is None else instrument.table('visited', table)
+        visited.add(initial_state)
     
     nodes_explored = 0
     max_frontier_size = 1
     
     while frontier:
+        if budget is not None and budget.check(nodes_explored, len(visited)):
+            return None, None, _stopped_stats(budget.reason, nodes_explored, max_frontier_size, len(visited))
         max_frontier_size = max(max_frontier_size, len(frontier))
-        current_state, path = frontier.popleft()
+        node = popleft()
         nodes_explored += 1
+
+        if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                _report_progress(progress, nodes_explored, len(frontier), len(visited)):
+            return None, None, _stopped_stats('cancelled', nodes_explored, max_frontier_size, len(visited))
         
-        for successor in get_successors(current_state):
+        for move, successor in successors_of(node.state, orientations=orientations):
             if successor not in visited:
                 visited.add(successor)
-                new_path = path + [successor]
+                child = SearchNode(successor, node, move, node.g + 1)
                 
-                if is_goal(successor):
+                if goal_test(successor):
+                    new_path = child.path()
                     stats = {
                         'nodes_explored': nodes_explored,
                         'max_frontier_size': max_frontier_size,
@@ -358,7 +922,7 @@ def bfs(initial_state: PipeState):
                     }
                     return successor, new_path, stats
                 
-                frontier.append((successor, new_path))
+                append(child)
     
     stats = {
         'nodes_explored': nodes_explored,
@@ -368,12 +932,169 @@ def bfs(initial_state: PipeState):
     return None, None, stats
 
 
-def dfs(initial_state: PipeState, max_depth: int = 1000):
+def _predecessor_moves(state: PipeState, initial_state: PipeState,
+                       orientations: bool = False) -> List[Tuple[Tuple[int, int], PipeState]]:
+    """
+    Nước đi ngược cho nửa tìm kiếm từ phía đích: (ô (r, c), state trước đó).
+    Xoay 90° là khả nghịch: xoay thêm 3 lần 90° cho state mà từ đó xoay (r, c) một lần
+    sẽ quay lại `state` (với orientations=True tập hướng đã đối xứng sẵn).
+    Chỉ xoay các ô còn khác initial_state - ô đã khớp thì đi tiếp về phía gốc không cần đụng tới.
+    """
+    moves = []
+    size = state.size
+    diff = state.rotations ^ initial_state.rotations
+    i = 0
+    while diff:
+        if diff & 3:
+            r, c = divmod(i, size)
+            if orientations:
+                moves.extend(((r, c), predecessor) for predecessor in _rotated_variants(state, r, c, True))
+            else:
+                moves.append(((r, c), state.rotate_tile(r, c, 3)))
+        diff >>= 2
+        i += 1
+    return moves
+
+
+def _chain(parents: Dict, state: PipeState) -> List[PipeState]:
+    """Các state từ `state` lần theo parents tới gốc của nửa tìm kiếm đó (gồm cả hai đầu)."""
+    states = [state]
+    while parents[state] is not None:
+        state = parents[state][0]
+        states.append(state)
+    return states
+
+
+def bidirectional_bfs(initial_state: PipeState, goal_state: Optional[PipeState] = None,
+                      orientations: bool = False, progress=None, budget: Optional[Budget] = None,
+                      instrument: Optional[Instrumentation] = None):
+    """
+    BFS hai chiều: mở rộng xen kẽ từ initial_state (nước đi như bfs) và từ goal_state
+    (nước đi ngược, xem _predecessor_moves), mỗi lần mở rộng trọn một tầng của phía có
+    frontier nhỏ hơn. Hai phía gặp nhau qua bảng băm state -> (state cha, ô vừa xoay, độ sâu)
+    của phía kia, nên số state phải duyệt cỡ 2·b^(d/2) thay vì b^d.
+
+    goal_state: cấu hình đích đã biết (vd: lời giải của puzzle_generator); None thì lấy
+    một cấu hình đích bằng CSP. goal_state phải cùng loại tile với initial_state.
+    Trả về (goal_state, path, stats) như bfs; path gồm các bước xoay 90° từ gốc tới đích.
+
+    instrument: đếm số lần gọi và thời gian của successors / predecessors / visited (tra cứu
+    và ghi vào hai bảng state -> cha).
+    Không nhận table= như bfs / astar: hai bảng đó vừa là tập visited vừa giữ con trỏ cha để
+    dựng đường đi qua điểm gặp, bảng có giới hạn bỏ phần tử thì không dựng lại được đường đi.
+    """
+    if goal_state is None:
+        solutions, _ = _csp_search(initial_state, max_solutions=1, budget=budget)
+        if not solutions:
+            return None, None, {'nodes_explored': 0, 'max_frontier_size': 1, 'visited_states': 1,
+                                'reason': budget.reason if budget is not None and budget.reason else 'unsolvable'}
+        goal_state = _state_from_masks(initial_state, solutions[0])
+    elif goal_state.size != initial_state.size or goal_state.type_codes != initial_state.type_codes:
+        raise ValueError("goal_state phải có cùng kích thước và loại tile với initial_state")
+    elif not is_goal(goal_state):
+        raise ValueError("goal_state không phải cấu hình đích (còn đầu hở)")
+
+    if initial_state == goal_state:
+        return initial_state, [initial_state], {'nodes_explored': 0, 'max_frontier_size': 1}
+
+    forward = {}
+    backward = {}
+
+    successors_of, predecessors_of = get_successor_moves, _predecessor_moves
+    if instrument is not None:
+        successors_of = instrument.wrap('successors', successors_of)
+        predecessors_of = instrument.wrap('predecessors', predecessors_of)
+        forward = instrument.dict('visited')
+        backward = instrument.dict('visited')
+    forward[initial_state] = None
+    backward[goal_state] = None
+    forward_frontier = [initial_state]
+    backward_frontier = [goal_state]
+    forward_depth = backward_depth = 0
+
+    nodes_explored = 0
+    forward_nodes = backward_nodes = 0
+    max_frontier_size = 2
+
+    def stopped(reason):
+        stats = _stopped_stats(reason, nodes_explored, max_frontier_size, len(forward) + len(backward))
+        stats['forward_nodes'] = forward_nodes
+        stats['backward_nodes'] = backward_nodes
+        return None, None, stats
+
+    while forward_frontier and backward_frontier:
+        max_frontier_size = max(max_frontier_size, len(forward_frontier) + len(backward_frontier))
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, parents, others, depth = forward_frontier, forward, backward, forward_depth
+        else:
+            frontier, parents, others, depth = backward_frontier, backward, forward, backward_depth
+
+        # Mở rộng trọn một tầng rồi mới chọn điểm gặp có tổng độ sâu nhỏ nhất
+        # (điểm gặp đầu tiên chưa chắc cho đường đi ngắn nhất)
+        meet = None
+        meet_length = None
+        next_frontier = []
+        for state in frontier:
+            if budget is not None and budget.check(nodes_explored, len(forward) + len(backward)):
+                return stopped(budget.reason)
+            nodes_explored += 1
+            if expand_forward:
+                forward_nodes += 1
+                moves = successors_of(state, orientations=orientations)
+            else:
+                backward_nodes += 1
+                moves = predecessors_of(state, initial_state, orientations)
+
+            if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                    _report_progress(progress, nodes_explored, len(next_frontier), len(forward) + len(backward)):
+                return stopped('cancelled')
+
+            for move, child in moves:
+                if child in parents:
+                    continue
+                parents[child] = (state, move, depth + 1)
+                if child in others:
+                    other = others[child]
+                    length = depth + 1 + (other[2] if other is not None else 0)
+                    if meet_length is None or length < meet_length:
+                        meet, meet_length = child, length
+                next_frontier.append(child)
+
+        if expand_forward:
+            forward_frontier, forward_depth = next_frontier, forward_depth + 1
+        else:
+            backward_frontier, backward_depth = next_frontier, backward_depth + 1
+
+        if meet is not None:
+            path = _chain(forward, meet)[::-1] + _chain(backward, meet)[1:]
+            stats = {
+                'nodes_explored': nodes_explored,
+                'max_frontier_size': max_frontier_size,
+                'path_length': len(path),
+                'visited_states': len(forward) + len(backward),
+                'forward_nodes': forward_nodes,
+                'backward_nodes': backward_nodes,
+            }
+            return goal_state, path, stats
+
+    stats = {
+        'nodes_explored': nodes_explored,
+        'max_frontier_size': max_frontier_size,
+        'visited_states': len(forward) + len(backward),
+        'forward_nodes': forward_nodes,
+        'backward_nodes': backward_nodes,
+    }
+    return None, None, stats
+
+
+def dfs(initial_state: PipeState, max_depth: int = 1000, orientations: bool = False, progress=None,
+        budget: Optional[Budget] = None):
     """DFS - Depth-First Search"""
     if is_goal(initial_state):
         return initial_state, [initial_state], {'nodes_explored': 0, 'max_depth': 0}
     
-    frontier = [(initial_state, [initial_state], 0)]
+    frontier = [SearchNode(initial_state)]
     visited = {initial_state}
     
     nodes_explored = 0
@@ -381,20 +1102,28 @@ def dfs(initial_state: PipeState, max_depth: int = 1000):
     max_depth_reached = 0
     
     while frontier:
+        if budget is not None and budget.check(nodes_explored, len(visited)):
+            return None, None, _stopped_stats(budget.reason, nodes_explored, max_frontier_size, len(visited))
         max_frontier_size = max(max_frontier_size, len(frontier))
-        current_state, path, depth = frontier.pop()
+        node = frontier.pop()
+        depth = node.g
         nodes_explored += 1
         max_depth_reached = max(max_depth_reached, depth)
+
+        if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                _report_progress(progress, nodes_explored, len(frontier), len(visited)):
+            return None, None, _stopped_stats('cancelled', nodes_explored, max_frontier_size, len(visited))
         
         if depth >= max_depth:
             continue
         
-        for successor in get_successors(current_state):
+        for move, successor in get_successor_moves(node.state, orientations=orientations):
             if successor not in visited:
                 visited.add(successor)
-                new_path = path + [successor]
+                child = SearchNode(successor, node, move, depth + 1)
                 
                 if is_goal(successor):
+                    new_path = child.path()
                     stats = {
                         'nodes_explored': nodes_explored,
                         'max_frontier_size': max_frontier_size,
@@ -404,7 +1133,7 @@ def dfs(initial_state: PipeState, max_depth: int = 1000):
                     }
                     return successor, new_path, stats
                 
-                frontier.append((successor, new_path, depth + 1))
+                frontier.append(child)
     
     stats = {
         'nodes_explored': nodes_explored,
@@ -415,42 +1144,89 @@ def dfs(initial_state: PipeState, max_depth: int = 1000):
     return None, None, stats
 
 
-def astar(initial_state: PipeState, show_progress: bool = False):
+def astar(initial_state: PipeState, show_progress: bool = False, orientations: bool = False, progress=None,
+          budget: Optional[Budget] = None, heuristic_fn=None, instrument: Optional[Instrumentation] = None,
+          table: Optional[TranspositionTable] = None, weight: Optional[float] = 1.0):
+    """
+    A* với g = số nước đi. heuristic_fn(state) mặc định là `heuristic`
+    (open_ends // 2); heuristic_matching và make_pattern_heuristic(initial_state)
+    là các heuristic admissible. Khi f bằng nhau, ưu tiên node có h nhỏ hơn (sâu hơn).
+    State có h >= UNFIXABLE bị loại vì không thể tới đích.
+    weight: f = g + weight·h (xem weighted_astar); None là greedy best-first, f = h.
+    instrument: đếm số lần gọi và thời gian của successors / heuristic / goal_test / visited / heap.
+    table: bảng chuyển vị có giới hạn dùng thay cho tập visited, như bfs (bắt buộc có budget).
+    """
+    _require_budget_for_table(table, budget)
+    if heuristic_fn is None:
+        heuristic_fn = heuristic
     if is_goal(initial_state):
         return initial_state, [initial_state], {'nodes_explored': 0, 'max_frontier_size': 1}
     
     counter = 0
     g_score = 0
-    h_score = heuristic(initial_state)
-    f_score = g_score + h_score
+    h_score = heuristic_fn(initial_state)
+    if h_score >= UNFIXABLE:
+        # Heuristic chứng minh được không thể tới đích
+        return None, None, {'nodes_explored': 0, 'max_frontier_size': 1, 'visited_states': 1,
+                            'reason': 'unsolvable'}
+    # f = g_factor·g + h_factor·h: A* (1, 1), weighted A* (1, w), greedy (0, 1)
+    g_factor, h_factor = (0, 1) if weight is None else (1, weight)
+    f_score = g_factor * g_score + h_factor * h_score
     
-    frontier = [(f_score, counter, g_score, initial_state, [initial_state])]
+    frontier = [(f_score, h_score, counter, SearchNode(initial_state))]
     visited = {initial_state}
+
+    successors_of, goal_test = get_successor_moves, is_goal
+    heappush, heappop = heapq.heappush, heapq.heappop
+    if instrument is not None:
+        successors_of = instrument.wrap('successors', successors_of)
+        heuristic_fn = instrument.wrap('heuristic', heuristic_fn)
+        goal_test = instrument.wrap('goal_test', goal_test)
+        visited = instrument.set('visited', visited)
+        heappush = instrument.wrap('heap', heappush)
+        heappop = instrument.wrap('heap', heappop)
+    if table is not None:
+        visited = table if instrument is None else instrument.table('visited', table)
+        visited.add(initial_state)
     
     nodes_explored = 0
     max_frontier_size = 1
     
     while frontier:
+        if budget is not None and budget.check(nodes_explored, len(visited)):
+            if show_progress:
+                print()  # Newline
+            return None, None, _stopped_stats(budget.reason, nodes_explored, max_frontier_size, len(visited))
         max_frontier_size = max(max_frontier_size, len(frontier))
         
-        current_f, _, current_g, current_state, path = heapq.heappop(frontier)
+        _, current_h, _, node = heappop(frontier)
+        current_g = node.g
         nodes_explored += 1
         
         # Progress indicator
         if show_progress and nodes_explored % 1000 == 0:
-            print(f"\rNodes: {nodes_explored:,}, Frontier: {len(frontier):,}, h={current_f - current_g}", end="", flush=True)
+            print(f"\rNodes: {nodes_explored:,}, Frontier: {len(frontier):,}, h={current_h}", end="", flush=True)
+
+        if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                _report_progress(progress, nodes_explored, len(frontier), len(visited)):
+            if show_progress:
+                print()  # Newline
+            return None, None, _stopped_stats('cancelled', nodes_explored, max_frontier_size, len(visited))
         
-        for successor in get_successors(current_state):
+        for move, successor in successors_of(node.state, orientations=orientations):
             if successor not in visited:
                 visited.add(successor)
                 counter += 1
                 
                 new_g = current_g + 1
-                new_h = heuristic(successor)
-                new_f = new_g + new_h
-                new_path = path + [successor]
+                new_h = heuristic_fn(successor)
+                if new_h >= UNFIXABLE:
+                    continue
+                new_f = g_factor * new_g + h_factor * new_h
+                child = SearchNode(successor, node, move, new_g)
                 
-                if is_goal(successor):
+                if goal_test(successor):
+                    new_path = child.path()
                     if show_progress:
                         print()  # Newline
                     stats = {
@@ -462,7 +1238,7 @@ def astar(initial_state: PipeState, show_progress: bool = False):
                     }
                     return successor, new_path, stats
                 
-                heapq.heappush(frontier, (new_f, counter, new_g, successor, new_path))
+                heappush(frontier, (new_f, new_h, counter, child))
     
     if show_progress:
         print()  # Newline
@@ -474,7 +1250,196 @@ def astar(initial_state: PipeState, show_progress: bool = False):
     return None, None, stats
 
 
-def hill_climbing(initial_state: PipeState, max_iterations: int = 10000):
+def weighted_astar(initial_state: PipeState, weight: float = 2.0, **kwargs):
+    """
+    Weighted A*: f = g + w·h với w > 1 đẩy tìm kiếm về phía đích, mở rộng ít node hơn
+    nhiều; nếu h admissible thì lời giải dài không quá w lần lời giải tối ưu.
+    heuristic_fn mặc định là make_pattern_heuristic(initial_state) (admissible), không phải
+    `heuristic` như astar. Các tham số khác giống astar.
+    """
+    if kwargs.get('heuristic_fn') is None:
+        kwargs['heuristic_fn'] = make_pattern_heuristic(initial_state, kwargs.get('orientations', False))
+    return astar(initial_state, weight=weight, **kwargs)
+
+
+def greedy_best_first(initial_state: PipeState, **kwargs):
+    """Greedy best-first: chỉ xét h (f = h), nhanh nhất nhưng không có cận về độ dài lời giải."""
+    return astar(initial_state, weight=None, **kwargs)
+
+
+def anytime_astar(initial_state: PipeState, start_weight: float = 3.0, weight_step: float = 0.5,
+                  orientations: bool = False, progress=None, budget: Optional[Budget] = None, heuristic_fn=None,
+                  admissible: Optional[bool] = None):
+    """
+    Anytime Repairing A* (ARA*): weighted A* với w = start_weight cho lời giải đầu tiên
+    thật nhanh, sau đó giảm w mỗi vòng weight_step tới 1 để cải thiện lời giải.
+    Mỗi vòng dùng lại g và frontier của vòng trước: chỉ các state có g giảm sau khi đã
+    mở rộng (INCONS) được đưa lại vào frontier, không tìm lại từ đầu.
+
+    Nên dùng cùng budget (vd: Budget(time_limit=10)): hết budget thì trả về lời giải tốt
+    nhất đã có (stats['reason'] cho biết lý do dừng); chỉ khi chưa có lời giải nào mới trả về
+    (None, None, stats) như các thuật toán khác.
+    stats['solutions']: các lời giải lần lượt tìm được (weight, path_cost, nodes_explored, time_sec,
+    suboptimality - None nếu h không admissible).
+    stats['suboptimality']: cận trên của path_cost / tối ưu (1.0 = tối ưu), chỉ có khi h admissible.
+
+    heuristic_fn mặc định là make_pattern_heuristic(initial_state) (admissible), không phải `heuristic`
+    như astar; heuristic_matching cũng admissible nhưng quá yếu trên lưới 7x7 (không ra lời giải đầu tiên).
+    admissible: h có admissible không; None thì lấy thuộc tính `admissible` của heuristic_fn
+    (heuristic_matching, make_pattern_heuristic). Không admissible thì không có cận
+    suboptimality và w luôn giảm tới 1 (không dừng sớm vì "đã tối ưu").
+    """
+    if start_weight < 1 or weight_step <= 0:
+        raise ValueError("Cần start_weight >= 1 và weight_step > 0")
+    if heuristic_fn is None:
+        heuristic_fn = make_pattern_heuristic(initial_state, orientations)
+    if admissible is None:
+        admissible = getattr(heuristic_fn, 'admissible', False)
+    if is_goal(initial_state):
+        return initial_state, [initial_state], {'nodes_explored': 0, 'max_frontier_size': 1}
+    root_h = heuristic_fn(initial_state)
+    if root_h >= UNFIXABLE:
+        return None, None, {'nodes_explored': 0, 'max_frontier_size': 1, 'visited_states': 1,
+                            'reason': 'unsolvable'}
+
+    start = time.perf_counter()
+    # state -> [g, h, parent]: một lần tra cứu cho mỗi successor thay vì ba dict riêng
+    nodes: Dict[PipeState, list] = {initial_state: [0, root_h, None]}
+    # State có h >= UNFIXABLE: không bao giờ tới đích, gặp lại thì bỏ qua ngay
+    dead: Set[PipeState] = set()
+    weight = start_weight
+    # Heap xoá lười: phần tử (f, h, counter, state) chỉ còn hiệu lực nếu open_f[state] == f
+    frontier = [(weight * root_h, root_h, 0, initial_state)]
+    open_f = {initial_state: weight * root_h}
+    closed = set()
+    incons = set()
+    counter = 0
+
+    best_goal = None
+    best_g = math.inf
+    best_path = None
+    solutions = []
+    nodes_explored = 0
+    max_frontier_size = 1
+    reason = None
+
+    def record(suboptimality):
+        nonlocal best_path
+        path = []
+        state = best_goal
+        while state is not None:
+            path.append(state)
+            state = nodes[state][2]
+        path.reverse()
+        best_path = path
+        solutions.append({'weight': weight, 'path_cost': len(path) - 1, 'nodes_explored': nodes_explored,
+                          'time_sec': time.perf_counter() - start, 'suboptimality': suboptimality})
+
+    while True:
+        # ImprovePath: mở rộng tới khi không còn state nào có f nhỏ hơn g của đích tốt nhất
+        while frontier:
+            top_f, _, _, state = frontier[0]
+            if open_f.get(state) != top_f:
+                heapq.heappop(frontier)
+                continue
+            if top_f >= best_g:
+                break
+            if budget is not None and budget.check(nodes_explored, len(nodes) + len(dead)):
+                reason = budget.reason
+                break
+            heapq.heappop(frontier)
+            del open_f[state]
+            closed.add(state)
+            nodes_explored += 1
+            max_frontier_size = max(max_frontier_size, len(open_f) + 1)
+            if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                    _report_progress(progress, nodes_explored, len(open_f), len(nodes)):
+                reason = 'cancelled'
+                break
+
+            child_g = nodes[state][0] + 1
+            for _, child in get_successor_moves(state, orientations=orientations):
+                info = nodes.get(child)
+                if info is None:
+                    if child in dead:
+                        continue
+                    h = heuristic_fn(child)
+                    if h >= UNFIXABLE:
+                        dead.add(child)
+                        continue
+                    nodes[child] = [child_g, h, state]
+                elif child_g >= info[0]:
+                    continue
+                else:
+                    h = info[1]
+                    info[0], info[2] = child_g, state
+                if is_goal(child):
+                    # Đích không cần mở rộng, chỉ cập nhật lời giải tốt nhất
+                    if child_g < best_g:
+                        best_goal, best_g = child, child_g
+                elif child in closed:
+                    incons.add(child)
+                else:
+                    counter += 1
+                    f = child_g + weight * h
+                    open_f[child] = f
+                    heapq.heappush(frontier, (f, h, counter, child))
+
+        # Cận dưới của lời giải tối ưu: min(g + h) trên các state chưa được mở rộng xong
+        pending = [nodes[s][0] + nodes[s][1] for s in open_f]
+        pending.extend(nodes[s][0] + nodes[s][1] for s in incons)
+        lower_bound = min(pending) if pending else best_g
+        # Cận w chỉ đúng khi vòng ImprovePath chạy xong; bị dừng giữa chừng thì chỉ còn g / cận dưới
+        # Không admissible thì g + h không phải cận dưới, không có cận nào
+        ratio = best_g / lower_bound if lower_bound > 0 else math.inf
+        suboptimality = None
+        if admissible:
+            suboptimality = ratio if reason is not None else min(weight, ratio)
+        if best_goal is not None and (best_path is None or best_g < len(best_path) - 1):
+            record(suboptimality)
+
+        if reason is not None or best_goal is None or weight <= 1 or \
+                (suboptimality is not None and suboptimality <= 1):
+            break
+
+        # Vòng sau: w nhỏ hơn, frontier = OPEN ∪ INCONS với f tính lại, CLOSED làm lại từ đầu
+        weight = max(1.0, weight - weight_step)
+        states = list(open_f)
+        states.extend(incons)
+        open_f.clear()
+        incons.clear()
+        closed.clear()
+        frontier = []
+        for state in states:
+            counter += 1
+            state_g, h, _ = nodes[state]
+            f = state_g + weight * h
+            open_f[state] = f
+            frontier.append((f, h, counter, state))
+        heapq.heapify(frontier)
+
+    stats = {
+        'nodes_explored': nodes_explored,
+        'max_frontier_size': max_frontier_size,
+        'visited_states': len(nodes) + len(dead),
+        'weight': weight,
+        'solutions': solutions,
+    }
+    if reason is not None:
+        stats['reason'] = reason
+    if best_goal is None:
+        if reason == 'cancelled':
+            stats['cancelled'] = True
+        return None, None, stats
+    stats['path_length'] = len(best_path)
+    stats['path_cost'] = len(best_path) - 1
+    if suboptimality is not None:
+        stats['suboptimality'] = suboptimality
+    return best_goal, best_path, stats
+
+
+def hill_climbing(initial_state: PipeState, max_iterations: int = 10000, orientations: bool = False,
+                  progress=None, budget: Optional[Budget] = None):
     if is_goal(initial_state):
         return initial_state, [initial_state], {'nodes_explored': 0, 'iterations': 0}
     
@@ -485,9 +1450,12 @@ def hill_climbing(initial_state: PipeState, max_iterations: int = 10000):
     nodes_explored = 0
     iterations = 0
     max_successors_size = 0
+    # nodes_explored tăng theo số successor mỗi vòng nên không dùng được `% PROGRESS_INTERVAL == 0`
+    # như các thuật toán khác: báo mỗi khi vượt thêm PROGRESS_INTERVAL node (như _LocalSearchMonitor)
+    next_report = PROGRESS_INTERVAL
     
     for iterations in range(max_iterations):
-        successors = get_successors(current_state)
+        successors = get_successors(current_state, orientations=orientations)
         unvisited_successors = [s for s in successors if s not in visited]
         
         if not unvisited_successors:
@@ -501,6 +1469,16 @@ def hill_climbing(initial_state: PipeState, max_iterations: int = 10000):
             return None, path, stats
         
         max_successors_size = max(max_successors_size, len(unvisited_successors))
+
+        reason = budget.check(nodes_explored, len(visited)) if budget is not None else None
+        if reason is None and progress is not None and nodes_explored >= next_report:
+            next_report = nodes_explored + PROGRESS_INTERVAL
+            if _report_progress(progress, nodes_explored, len(unvisited_successors), len(visited)):
+                reason = 'cancelled'
+        if reason is not None:
+            stats = _stopped_stats(reason, nodes_explored, max_successors_size, len(visited))
+            stats['iterations'] = iterations
+            return None, path, stats
         
         successors_with_h = []
         for successor in unvisited_successors:
@@ -545,3 +1523,581 @@ def hill_climbing(initial_state: PipeState, max_iterations: int = 10000):
         'reason': 'Max iterations reached'
     }
     return None, path, stats
+
+
+# Giá trị trả về đặc biệt của hàm tìm kiếm đệ quy trong IDA*
+_IDA_FOUND = -1
+_IDA_STOPPED = -2
+# Số frame dự trữ ngoài độ sâu tìm kiếm (các hàm gọi bên trong search, code gọi ida_star)
+_IDA_STACK_MARGIN = 200
+
+
+def ida_star(initial_state: PipeState, orientations: bool = False, max_table_size: int = 100000,
+             progress=None, budget: Optional[Budget] = None, heuristic_fn=None,
+             table: Optional[TranspositionTable] = None):
+    """
+    IDA* - Iterative Deepening A*: DFS giới hạn theo ngưỡng f = g + h, mỗi vòng
+    nâng ngưỡng lên f nhỏ nhất đã vượt ngưỡng ở vòng trước.
+
+    Bộ nhớ chỉ gồm đường đi hiện tại (tỉ lệ với độ sâu) và một bảng chuyển vị
+    (transposition table) state -> g nhỏ nhất đã gặp trong vòng hiện tại.
+    table mặc định là TranspositionTable(max_table_size) (LRU); có thể truyền bảng
+    policy='depth' (ưu tiên giữ state có ngưỡng - g lớn, tức gần gốc) hoặc bảng
+    fingerprint=True. Phần tử bị bỏ chỉ làm cắt tỉa ít hơn, kết quả vẫn đúng.
+    heuristic_fn mặc định là `heuristic`, giống astar.
+    """
+    if heuristic_fn is None:
+        heuristic_fn = heuristic
+    if is_goal(initial_state):
+        return initial_state, [initial_state], {'nodes_explored': 0, 'iterations': 0}
+
+    path = [initial_state]
+    on_path = {initial_state}
+    if table is None:
+        table = TranspositionTable(max_entries=max_table_size)
+    nodes_explored = 0
+    max_depth_reached = 0
+    reason = None
+
+    def search(g: int, bound: int) -> int:
+        nonlocal nodes_explored, max_depth_reached, reason
+        state = path[-1]
+        nodes_explored += 1
+        if g > max_depth_reached:
+            max_depth_reached = g
+
+        if budget is not None and budget.check(nodes_explored, len(path) + len(table)):
+            reason = budget.reason
+            return _IDA_STOPPED
+        if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                _report_progress(progress, nodes_explored, len(path), len(table)):
+            reason = 'cancelled'
+            return _IDA_STOPPED
+
+        # Sắp xếp con theo h để đi vào nhánh hứa hẹn trước
+        children = []
+        for _, successor in get_successor_moves(state, orientations=orientations):
+            if successor not in on_path:
+                h = heuristic_fn(successor)
+                if h < UNFIXABLE:
+                    children.append((h, successor))
+        children.sort(key=lambda item: item[0])
+
+        next_bound = _IDA_FOUND
+        child_g = g + 1
+        for h, successor in children:
+            f = child_g + h
+            if f > bound:
+                # Con đã sắp xếp theo h nên các con sau cũng vượt ngưỡng
+                if next_bound == _IDA_FOUND or f < next_bound:
+                    next_bound = f
+                break
+
+            seen_g = table.get(successor)
+            if seen_g is not None and seen_g <= child_g:
+                continue
+            table.store(successor, child_g, depth=bound - child_g)
+
+            path.append(successor)
+            if is_goal(successor):
+                return _IDA_FOUND
+            on_path.add(successor)
+            t = search(child_g, bound)
+            if t == _IDA_FOUND or t == _IDA_STOPPED:
+                return t
+            on_path.discard(successor)
+            path.pop()
+            if next_bound == _IDA_FOUND or t < next_bound:
+                next_bound = t
+        # Không còn con nào vượt ngưỡng -> nhánh cụt, trả về "vô hạn"
+        return next_bound if next_bound != _IDA_FOUND else float('inf')
+
+    bound = heuristic_fn(initial_state)
+    if bound >= UNFIXABLE:
+        return None, None, {'nodes_explored': 0, 'iterations': 0, 'reason': 'unsolvable'}
+    iterations = 0
+    recursion_limit = sys.getrecursionlimit()
+    while True:
+        iterations += 1
+        table.clear()
+        # Độ sâu đệ quy tối đa là ngưỡng hiện tại (g <= bound); lưới lớn có thể vượt
+        # giới hạn mặc định 1000 của Python nên nâng giới hạn theo ngưỡng
+        if bound + _IDA_STACK_MARGIN > sys.getrecursionlimit():
+            sys.setrecursionlimit(bound + _IDA_STACK_MARGIN)
+        try:
+            t = search(0, bound)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        if t == _IDA_FOUND:
+            goal = path[-1]
+            stats = {
+                'nodes_explored': nodes_explored,
+                'iterations': iterations,
+                'max_depth_reached': max_depth_reached,
+                'transposition_size': len(table),
+                'transposition_evictions': table.evictions,
+                'path_length': len(path),
+                'path_cost': len(path) - 1
+            }
+            return goal, list(path), stats
+        if t == _IDA_STOPPED or t == float('inf'):
+            stats = {
+                'nodes_explored': nodes_explored,
+                'iterations': iterations,
+                'max_depth_reached': max_depth_reached,
+                'transposition_size': len(table),
+                'transposition_evictions': table.evictions,
+                'threshold': bound
+            }
+            if reason is not None:
+                stats['reason'] = reason
+                if reason == 'cancelled':
+                    stats['cancelled'] = True
+            return None, None, stats
+        bound = t
+
+
+# ============================================================================
+# LOCAL SEARCH - RANDOM RESTART, SIMULATED ANNEALING, TABU
+# ============================================================================
+
+# Các thuật toán local search không quan tâm độ dài đường đi: mỗi nước đi đặt một ô
+# về một hướng phân biệt khác, ứng viên được chấm điểm bằng _open_ends_delta (O(1),
+# chỉ xét 4 cạnh của ô) thay vì tạo state mới rồi gọi heuristic. Chỉ nước đi được
+# chọn mới tạo state. Khi tìm thấy đích, đường đi từng bước 90° được dựng lại bằng
+# build_rotation_path. Stats: nodes_explored = số ứng viên đã chấm điểm.
+
+def _rotatable_cells(state: PipeState) -> List[int]:
+    """Chỉ số các ô có nhiều hơn một hướng phân biệt (bỏ EMPTY, CROSS)."""
+    return [i for i, code in enumerate(state.type_codes) if ROTATION_MASKS[code]]
+
+
+def _move_delta(state: PipeState, i: int, times: int) -> int:
+    """Độ thay đổi số đầu hở nếu xoay ô i thêm `times` lần 90°."""
+    code = state.type_codes[i]
+    rotation = (state.rotations >> (2 * i)) & 3
+    masks = CONNECTION_MASKS[code]
+    return _open_ends_delta(state, i, masks[rotation], masks[(rotation + times) & 3])
+
+
+def _apply_move(state: PipeState, i: int, times: int) -> PipeState:
+    return state.rotate_tile(i // state.size, i % state.size, times)
+
+
+def _random_state(state: PipeState, rng: random.Random) -> PipeState:
+    """Cùng loại tile, hướng xoay ngẫu nhiên (dùng cho random restart)."""
+    rotations = 0
+    for i, code in enumerate(state.type_codes):
+        rotations |= (rng.randrange(4) & ROTATION_MASKS[code]) << (2 * i)
+    return PipeState._packed(state.type_codes, rotations, state.size)
+
+
+def _best_moves(state: PipeState, cells: List[int], tabu_until: Optional[List[int]] = None,
+                step: int = 0, aspiration: Optional[int] = None):
+    """
+    Chấm điểm mọi nước đi (ô, số lần xoay); trả về (delta tốt nhất, danh sách nước đạt delta đó,
+    số ứng viên đã chấm). Với tabu: ô đang bị cấm bị bỏ qua, trừ khi nước đi đưa số đầu hở
+    xuống dưới `aspiration` (kỷ lục hiện tại).
+    """
+    best_delta = None
+    best = []
+    evaluated = 0
+    for i in cells:
+        tabu = tabu_until is not None and tabu_until[i] > step
+        for times in range(1, ROTATION_MASKS[state.type_codes[i]] + 1):
+            delta = _move_delta(state, i, times)
+            evaluated += 1
+            if tabu and (aspiration is None or state.open_ends + delta >= aspiration):
+                continue
+            if best_delta is None or delta < best_delta:
+                best_delta = delta
+                best = [(i, times)]
+            elif delta == best_delta:
+                best.append((i, times))
+    return best_delta, best, evaluated
+
+
+def _local_search_result(initial_state: PipeState, goal: Optional[PipeState], stats: Dict,
+                         reason: Optional[str]):
+    """Thêm lý do dừng vào stats (như _stopped_stats) và dựng đường đi nếu tìm thấy đích."""
+    if reason is not None:
+        stats['reason'] = reason
+        if reason == 'cancelled':
+            stats['cancelled'] = True
+    if goal is None:
+        return None, None, stats
+    path = build_rotation_path(initial_state, goal)
+    stats['path_length'] = len(path)
+    return goal, path, stats
+
+
+class _LocalSearchMonitor:
+    """
+    Kiểm tra budget / progress của local search. Đơn vị là số ứng viên đã chấm điểm
+    (nodes_explored), như số node mở rộng ở các thuật toán khác; local search chỉ giữ
+    một state nên memory_nodes luôn là 1. Progress được gửi mỗi khi số ứng viên vượt
+    thêm PROGRESS_INTERVAL, kèm iterations và best_open_ends thay cho frontier / visited.
+    """
+
+    __slots__ = ('budget', 'progress', 'next_report')
+
+    def __init__(self, budget: Optional[Budget], progress):
+        self.budget = budget
+        self.progress = progress
+        self.next_report = PROGRESS_INTERVAL
+
+    def stopped(self, evaluated: int, steps: int, best_open_ends: int) -> Optional[str]:
+        """Trả về lý do dừng nếu hết budget hoặc người gọi yêu cầu hủy, ngược lại None."""
+        if self.budget is not None and self.budget.check(evaluated, 1):
+            return self.budget.reason
+        if self.progress is not None and evaluated >= self.next_report:
+            self.next_report = evaluated + PROGRESS_INTERVAL
+            if self.progress({'nodes_explored': evaluated, 'iterations': steps,
+                              'best_open_ends': best_open_ends}):
+                return 'cancelled'
+        return None
+
+
+def random_restart_hill_climbing(initial_state: PipeState, max_restarts: int = 100, max_sideways: int = 50,
+                                 seed: Optional[int] = None, progress=None, budget: Optional[Budget] = None):
+    """
+    Steepest-descent hill climbing (chọn ngẫu nhiên giữa các nước tốt ngang nhau), cho
+    phép tối đa `max_sideways` nước đi ngang liên tiếp để thoát vùng bằng phẳng.
+    Kẹt tại cực tiểu địa phương -> khởi động lại từ một cấu hình xoay ngẫu nhiên.
+    """
+    rng = random.Random(seed)
+    cells = _rotatable_cells(initial_state)
+    state = initial_state
+    best_open_ends = state.open_ends
+    evaluated = steps = restarts = 0
+    reason = None
+    monitor = _LocalSearchMonitor(budget, progress)
+
+    while not is_goal(state):
+        reason = monitor.stopped(evaluated, steps, best_open_ends)
+        if reason is not None:
+            break
+        sideways = 0
+        while True:
+            delta, moves, count = _best_moves(state, cells)
+            evaluated += count
+            if delta is None or delta > 0 or (delta == 0 and sideways >= max_sideways):
+                break
+            sideways = sideways + 1 if delta == 0 else 0
+            state = _apply_move(state, *rng.choice(moves))
+            steps += 1
+            best_open_ends = min(best_open_ends, state.open_ends)
+            if is_goal(state):
+                break
+            reason = monitor.stopped(evaluated, steps, best_open_ends)
+            if reason is not None:
+                break
+        if is_goal(state) or reason is not None or restarts >= max_restarts:
+            break
+        restarts += 1
+        state = _random_state(initial_state, rng)
+
+    stats = {
+        'nodes_explored': evaluated,
+        'iterations': steps,
+        'restarts': restarts,
+        'best_open_ends': best_open_ends,
+    }
+    return _local_search_result(initial_state, state if is_goal(state) else None, stats, reason)
+
+
+def simulated_annealing(initial_state: PipeState, max_steps: int = 200000, start_temperature: float = 2.0,
+                        cooling: float = 0.9995, min_temperature: float = 0.05,
+                        seed: Optional[int] = None, progress=None, budget: Optional[Budget] = None):
+    """
+    Simulated annealing: mỗi bước chọn ngẫu nhiên một ô và một hướng mới; nhận nước đi
+    nếu delta <= 0, hoặc với xác suất exp(-delta / T). T giảm theo cấp số nhân `cooling`;
+    khi T xuống dưới `min_temperature` thì hâm nóng lại (tính là một lần restart).
+    """
+    rng = random.Random(seed)
+    cells = _rotatable_cells(initial_state)
+    state = initial_state
+    best_open_ends = state.open_ends
+    temperature = start_temperature
+    evaluated = steps = restarts = 0
+    reason = None
+    monitor = _LocalSearchMonitor(budget, progress)
+
+    while cells and not is_goal(state) and steps < max_steps:
+        reason = monitor.stopped(evaluated, steps, best_open_ends)
+        if reason is not None:
+            break
+        i = rng.choice(cells)
+        times = rng.randint(1, ROTATION_MASKS[state.type_codes[i]])
+        delta = _move_delta(state, i, times)
+        evaluated += 1
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            state = _apply_move(state, i, times)
+            best_open_ends = min(best_open_ends, state.open_ends)
+        steps += 1
+        temperature *= cooling
+        if temperature < min_temperature:
+            temperature = start_temperature
+            restarts += 1
+
+    stats = {
+        'nodes_explored': evaluated,
+        'iterations': steps,
+        'restarts': restarts,
+        'best_open_ends': best_open_ends,
+    }
+    return _local_search_result(initial_state, state if is_goal(state) else None, stats, reason)
+
+
+def tabu_search(initial_state: PipeState, max_steps: int = 20000, tenure: int = 7,
+                seed: Optional[int] = None, progress=None, budget: Optional[Budget] = None):
+    """
+    Tabu search: mỗi bước thực hiện nước đi tốt nhất (kể cả khi làm tệ đi), rồi cấm xoay
+    lại ô đó trong `tenure` bước để không quay vòng. Nước đi bị cấm vẫn được phép nếu
+    nó cho kết quả tốt hơn kỷ lục (aspiration).
+    """
+    rng = random.Random(seed)
+    cells = _rotatable_cells(initial_state)
+    state = initial_state
+    best_open_ends = state.open_ends
+    tabu_until = [0] * len(initial_state.type_codes)
+    evaluated = steps = 0
+    reason = None
+    monitor = _LocalSearchMonitor(budget, progress)
+
+    while cells and not is_goal(state) and steps < max_steps:
+        reason = monitor.stopped(evaluated, steps, best_open_ends)
+        if reason is not None:
+            break
+        delta, moves, count = _best_moves(state, cells, tabu_until, steps, best_open_ends)
+        evaluated += count
+        if delta is None:
+            # Mọi ô đều bị cấm: bỏ qua một bước cho tabu hết hạn dần
+            steps += 1
+            continue
+        i, times = rng.choice(moves)
+        state = _apply_move(state, i, times)
+        # Tenure dao động nhẹ để tránh chu kỳ cố định
+        tabu_until[i] = steps + tenure + rng.randint(0, 2)
+        best_open_ends = min(best_open_ends, state.open_ends)
+        steps += 1
+
+    stats = {
+        'nodes_explored': evaluated,
+        'iterations': steps,
+        'best_open_ends': best_open_ends,
+    }
+    return _local_search_result(initial_state, state if is_goal(state) else None, stats, reason)
+
+
+# ============================================================================
+# CONSTRAINT PROPAGATION (CSP) SOLVER
+# ============================================================================
+
+# Miền giá trị của mỗi ô được biểu diễn bằng bitset 16 bit trên các mask kết nối:
+# bit m bật <=> ô còn có thể mang mask m. Nhờ vậy STRAIGHT chỉ có 2 giá trị,
+# CROSS/EMPTY chỉ 1 (các rotation đối xứng tự gộp lại).
+_ALL_MASKS = range(16)
+
+# MASKS_WITH_BIT[d]: tập các mask có đầu nối theo hướng d
+MASKS_WITH_BIT = tuple(sum(1 << m for m in _ALL_MASKS if (m >> d) & 1) for d in range(4))
+# MASKS_WITHOUT_BIT[d]: tập các mask không có đầu nối theo hướng d
+MASKS_WITHOUT_BIT = tuple(0xFFFF & ~with_bit for with_bit in MASKS_WITH_BIT)
+# MASKS_SELF_LOOP[d]: mask có bit d == bit (d+2)%4 (cạnh tự nối với chính ô đó, lưới 1x1)
+MASKS_SELF_LOOP = tuple(
+    sum(1 << m for m in _ALL_MASKS if ((m >> d) & 1) == ((m >> ((d + 2) % 4)) & 1))
+    for d in range(4)
+)
+
+
+def _initial_domains(state: PipeState) -> List[int]:
+    """Miền ban đầu: mọi mask mà loại tile của ô có thể đạt được khi xoay."""
+    return [sum(1 << mask for mask in set(CONNECTION_MASKS[code])) for code in state.type_codes]
+
+
+def _propagate(domains: List[int], neighbors, queue: List[int]) -> bool:
+    """
+    Arc consistency (AC-3 theo ô) trên các cạnh chung, có wrap.
+    Ràng buộc: bit d của ô i == bit (d+2)%4 của láng giềng theo hướng d.
+    Sửa trực tiếp `domains`; trả về False nếu có miền rỗng (mâu thuẫn).
+    """
+    pending = set(queue)
+    while queue:
+        j = queue.pop()
+        pending.discard(j)
+        domain_j = domains[j]
+        for d in range(4):
+            # Ô i nhìn sang j theo hướng ngược lại
+            i = neighbors[j][d]
+            d_i = (d + 2) % 4
+            old = domains[i]
+            if i == j:
+                new = old & MASKS_SELF_LOOP[d_i]
+            else:
+                allowed = 0
+                if domain_j & MASKS_WITH_BIT[d]:
+                    allowed |= MASKS_WITH_BIT[d_i]
+                if domain_j & MASKS_WITHOUT_BIT[d]:
+                    allowed |= MASKS_WITHOUT_BIT[d_i]
+                new = old & allowed
+            if new != old:
+                if not new:
+                    return False
+                domains[i] = new
+                if i not in pending:
+                    pending.add(i)
+                    queue.append(i)
+    return True
+
+
+def _csp_search(initial_state: PipeState, max_solutions: int = 1, budget: Optional[Budget] = None,
+                progress=None):
+    """
+    Backtracking với MRV + duy trì arc consistency sau mỗi phép gán.
+    Dùng stack tường minh (không đệ quy) nên chạy được với lưới lớn.
+    Hết ngân sách hoặc progress trả về True: trả về các nghiệm đã tìm được, stats có thêm
+    'reason' (và 'cancelled' nếu bị hủy). CSP không có tập visited nên progress báo visited_states = 0.
+
+    Returns:
+        (danh sách nghiệm dạng list mask theo ô, stats)
+    """
+    size = initial_state.size
+    neighbors = get_neighbor_table(size)
+    domains = _initial_domains(initial_state)
+
+    nodes_explored = 0
+    backtracks = 0
+    max_frontier_size = 1
+    solutions = []
+
+    if not _propagate(domains, neighbors, list(range(len(domains)))):
+        return solutions, {'nodes_explored': 0, 'backtracks': 0, 'max_frontier_size': 1}
+
+    reason = None
+    stack = [domains]
+    while stack:
+        if budget is not None and budget.check(nodes_explored, len(stack)):
+            reason = budget.reason
+            break
+        max_frontier_size = max(max_frontier_size, len(stack))
+        domains = stack.pop()
+        nodes_explored += 1
+        if progress is not None and nodes_explored % PROGRESS_INTERVAL == 0 and \
+                _report_progress(progress, nodes_explored, len(stack), 0):
+            reason = 'cancelled'
+            break
+
+        # MRV: ô chưa gán có ít giá trị nhất
+        best_cell = -1
+        best_count = 17
+        for i, domain in enumerate(domains):
+            if domain & (domain - 1):
+                count = bin(domain).count('1')
+                if count < best_count:
+                    best_cell, best_count = i, count
+                    if count == 2:
+                        break
+
+        if best_cell < 0:
+            # Mọi ô đều chỉ còn 1 giá trị -> nghiệm
+            solutions.append([domain.bit_length() - 1 for domain in domains])
+            if len(solutions) >= max_solutions:
+                break
+            continue
+
+        children = []
+        domain = domains[best_cell]
+        while domain:
+            value = domain & -domain
+            domain ^= value
+            child = domains[:]
+            child[best_cell] = value
+            if _propagate(child, neighbors, [best_cell]):
+                children.append(child)
+            else:
+                backtracks += 1
+        # Đảo thứ tự để giá trị nhỏ nhất được thử trước
+        stack.extend(reversed(children))
+
+    stats = {
+        'nodes_explored': nodes_explored,
+        'backtracks': backtracks,
+        'max_frontier_size': max_frontier_size,
+    }
+    if reason is not None:
+        stats['reason'] = reason
+        if reason == 'cancelled':
+            stats['cancelled'] = True
+    return solutions, stats
+
+
+def _state_from_masks(initial_state: PipeState, masks: List[int]) -> PipeState:
+    """Chọn độ xoay gần nhất (theo chiều kim đồng hồ) để mỗi ô đạt mask mong muốn."""
+    rotations = initial_state.rotations
+    for i, code in enumerate(initial_state.type_codes):
+        shift = 2 * i
+        rotation = (rotations >> shift) & 3
+        for k in range(4):
+            if CONNECTION_MASKS[code][(rotation + k) & 3] == masks[i]:
+                break
+        rotations = (rotations & ~(3 << shift)) | (((rotation + k) & ROTATION_MASKS[code]) << shift)
+    return PipeState._packed(initial_state.type_codes, rotations, initial_state.size)
+
+
+def build_rotation_path(initial_state: PipeState, goal_state: PipeState) -> List[PipeState]:
+    """
+    Dựng đường đi từng bước (mỗi bước xoay 1 ô 90°) từ initial_state tới
+    một state có cùng mask kết nối với goal_state, duyệt ô theo hàng.
+    """
+    path = [initial_state]
+    state = initial_state
+    size = initial_state.size
+    for r in range(size):
+        for c in range(size):
+            target = goal_state.get_mask(r, c)
+            for _ in range(3):
+                if state.get_mask(r, c) == target:
+                    break
+                state = state.rotate_tile(r, c)
+                path.append(state)
+    return path
+
+
+def csp_solve(initial_state: PipeState, budget: Optional[Budget] = None, progress=None):
+    """
+    Giải bằng CSP: mỗi ô là một biến với miền là các hướng xoay phân biệt,
+    ràng buộc là hai đầu của mọi cạnh chung (có wrap) phải khớp nhau.
+    progress: callback như các thuật toán khác, gọi mỗi PROGRESS_INTERVAL node; trả về True để hủy.
+
+    Returns:
+        (goal_state, path, stats) giống các thuật toán tìm kiếm khác;
+        path là chuỗi xoay từng ô 90° từ trạng thái ban đầu tới đích.
+    """
+    solutions, stats = _csp_search(initial_state, max_solutions=1, budget=budget, progress=progress)
+    if not solutions:
+        return None, None, stats
+
+    goal_state = _state_from_masks(initial_state, solutions[0])
+    path = build_rotation_path(initial_state, goal_state)
+    stats['path_length'] = len(path)
+    return goal_state, path, stats
+
+
+def find_solutions(initial_state: PipeState, limit: int = 2,
+                   budget: Optional[Budget] = None) -> List[List[int]]:
+    """
+    Tìm tối đa `limit` cấu hình đích khác nhau, mỗi cấu hình là list mask kết nối theo ô.
+    Tập nghiệm chỉ phụ thuộc loại tile của từng ô, không phụ thuộc độ xoay hiện tại.
+    Hết budget giữa chừng thì chỉ trả về các nghiệm đã tìm được (xem budget.reason).
+    """
+    solutions, _ = _csp_search(initial_state, max_solutions=limit, budget=budget)
+    return solutions
+
+
+def count_solutions(initial_state: PipeState, limit: int = 2, budget: Optional[Budget] = None) -> int:
+    """
+    Đếm số cấu hình đích (tính theo mask kết nối), dừng sớm khi đạt `limit`.
+    Dùng limit=2 để kiểm tra puzzle có nghiệm duy nhất hay không.
+    Nếu hết budget giữa chừng thì kết quả chỉ là cận dưới (xem budget.reason).
+    """
+    return len(find_solutions(initial_state, limit, budget))
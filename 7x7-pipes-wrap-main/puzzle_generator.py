@@ -0,0 +1,291 @@
+"""
+Sinh puzzle Wrap Pipes kích thước NxN bất kỳ (không giới hạn 7x7), luôn giải được.
+
+Cách làm: dựng trước một mạng ống đã nối kín (không còn đầu hở) trên lưới
+xuyến, suy ra loại tile của từng ô từ mạng đó rồi xoay ngẫu nhiên các ô.
+Vì lời giải gốc đã biết nên puzzle chắc chắn có nghiệm.
+
+Game không có tile đầu cụt (1 đầu nối), nên mạng phải có mọi ô bậc 0, 2, 3 hoặc 4.
+Hai kiểu mạng:
+- random_network: giữ ngẫu nhiên các cạnh rồi bỏ đầu cụt (nhanh, có thể nhiều mảnh rời)
+- spanning_network: cây khung ngẫu nhiên + nối các lá (một mạng liên thông), có thể
+  sửa tiếp cho tới khi nghiệm duy nhất (make_unique)
+
+Ví dụ:
+    python puzzle_generator.py --size 30 --density 0.5 --seed 1 --network random
+    python puzzle_generator.py --size 7 --unique --count 20 --seed 100 --output-dir test_inputs
+"""
+
+import argparse
+import os
+import random
+from typing import List, Optional, Tuple
+
+from main import PipeState, Budget, CONNECTION_MASKS, ROTATION_MASKS, find_solutions, get_neighbor_table
+
+# MASK_TILES[mask] -> (type_code, rotation) có đúng mask kết nối đó.
+# None cho các mask 1 đầu nối (không có loại tile tương ứng).
+MASK_TILES = [None] * 16
+for _code, _masks in enumerate(CONNECTION_MASKS):
+    for _rotation, _mask in enumerate(_masks):
+        if MASK_TILES[_mask] is None:
+            MASK_TILES[_mask] = (_code, _rotation)
+
+
+def _remove_edge(masks: List[int], neighbors, i: int, d: int) -> int:
+    """Xoá cạnh của ô i theo hướng d (ở cả hai đầu), trả về ô kề."""
+    j = neighbors[i][d]
+    masks[i] &= ~(1 << d)
+    masks[j] &= ~(1 << ((d + 2) & 3))
+    return j
+
+
+def prune_dead_ends(masks: List[int], neighbors) -> None:
+    """
+    Xoá dần các cạnh dẫn tới ô chỉ có 1 đầu nối (sửa tại chỗ).
+    Xoá một cạnh có thể làm ô kề thành đầu cụt, nên dùng hàng đợi tới khi hết.
+    """
+    queue = [i for i, mask in enumerate(masks) if MASK_TILES[mask] is None]
+    while queue:
+        i = queue.pop()
+        mask = masks[i]
+        if MASK_TILES[mask] is not None:
+            continue
+        d = (mask & -mask).bit_length() - 1
+        j = _remove_edge(masks, neighbors, i, d)
+        if MASK_TILES[masks[j]] is None:
+            queue.append(j)
+
+
+def random_network(size: int, density: float, rng: random.Random) -> List[int]:
+    """
+    Mạng ống ngẫu nhiên: mỗi cạnh của lưới xuyến (mỗi ô sở hữu cạnh Right và Down)
+    được chọn với xác suất `density`, sau đó bỏ các đầu cụt.
+    Trả về danh sách mask kết nối theo chỉ số phẳng; mạng không có đầu hở.
+    """
+    neighbors = get_neighbor_table(size)
+    masks = [0] * (size * size)
+    for i in range(size * size):
+        for d in (1, 2):
+            if rng.random() < density:
+                j = neighbors[i][d]
+                masks[i] |= 1 << d
+                masks[j] |= 1 << ((d + 2) & 3)
+    prune_dead_ends(masks, neighbors)
+    return masks
+
+
+def spanning_network(size: int, rng: random.Random, coverage: float = 1.0, extra: float = 0.0) -> List[int]:
+    """
+    Mạng ống liên thông: cây khung ngẫu nhiên (Prim ngẫu nhiên trên lưới xuyến)
+    phủ khoảng `coverage` số ô, rồi nối mỗi lá (ô bậc 1) thêm một cạnh - ưu tiên
+    tới một lá kề, sau đó tới ô bất kỳ trong mạng, cuối cùng mới kéo ra ô mới.
+    Thêm cạnh chỉ làm tăng bậc nên mạng cuối cùng không còn đầu cụt và vẫn liên thông.
+    `extra`: xác suất thêm mỗi cạnh còn thiếu giữa hai ô trong mạng (nhiều vòng, nhiều T/CROSS hơn).
+    """
+    neighbors = get_neighbor_table(size)
+    n_cells = size * size
+    target = max(1, min(n_cells, round(coverage * n_cells)))
+    masks = [0] * n_cells
+    in_tree = [False] * n_cells
+
+    def add_edge(i: int, d: int) -> None:
+        masks[i] |= 1 << d
+        masks[neighbors[i][d]] |= 1 << ((d + 2) & 3)
+
+    start = rng.randrange(n_cells)
+    in_tree[start] = True
+    tree_size = 1
+    frontier = [(start, d) for d in range(4)]
+    while frontier and tree_size < target:
+        k = rng.randrange(len(frontier))
+        frontier[k], frontier[-1] = frontier[-1], frontier[k]
+        i, d = frontier.pop()
+        j = neighbors[i][d]
+        if in_tree[j]:
+            continue
+        add_edge(i, d)
+        in_tree[j] = True
+        tree_size += 1
+        frontier.extend((j, e) for e in range(4))
+
+    leaves = [i for i in range(n_cells) if MASK_TILES[masks[i]] is None]
+    rng.shuffle(leaves)
+    while leaves:
+        i = leaves.pop()
+        if MASK_TILES[masks[i]] is not None:
+            continue
+        free = [d for d in range(4) if not masks[i] >> d & 1]
+        rng.shuffle(free)
+        to_leaf = [d for d in free if in_tree[neighbors[i][d]] and MASK_TILES[masks[neighbors[i][d]]] is None]
+        to_tree = [d for d in free if in_tree[neighbors[i][d]]]
+        d = (to_leaf or to_tree or free)[0]
+        j = neighbors[i][d]
+        add_edge(i, d)
+        if not in_tree[j]:
+            # Ô mới có đúng 1 cạnh -> thành lá, xử lý tiếp
+            in_tree[j] = True
+            leaves.append(j)
+
+    if extra > 0:
+        for i in range(n_cells):
+            for d in (1, 2):
+                if in_tree[i] and in_tree[neighbors[i][d]] and not masks[i] >> d & 1 and rng.random() < extra:
+                    add_edge(i, d)
+    return masks
+
+
+def state_from_network(masks: List[int], size: int) -> PipeState:
+    """PipeState có đúng các mask kết nối đã cho (chính là lời giải của puzzle)."""
+    type_codes = []
+    rotations = 0
+    for i, mask in enumerate(masks):
+        code, rotation = MASK_TILES[mask]
+        type_codes.append(code)
+        rotations |= rotation << (2 * i)
+    return PipeState._packed(tuple(type_codes), rotations, size)
+
+
+def scramble(state: PipeState, rng: random.Random) -> PipeState:
+    """Xoay ngẫu nhiên mọi ô (giữ nguyên loại tile)."""
+    rotations = 0
+    for i, code in enumerate(state.type_codes):
+        rotations |= (rng.randrange(4) & ROTATION_MASKS[code]) << (2 * i)
+    return PipeState._packed(state.type_codes, rotations, state.size)
+
+
+def generate_puzzle(size: int, density: float = 0.5,
+                    seed: Optional[int] = None) -> Tuple[PipeState, PipeState]:
+    """
+    Sinh một puzzle size x size giải được.
+
+    Args:
+        size: Kích thước lưới
+        density: Xác suất giữ mỗi cạnh của lưới (càng cao càng nhiều T/CROSS)
+        seed: Seed cho random (None = ngẫu nhiên)
+
+    Returns:
+        (puzzle, solution): state đã xoay ngẫu nhiên và state đích ban đầu
+    """
+    rng = random.Random(seed)
+    solution = state_from_network(random_network(size, density, rng), size)
+    return scramble(solution, rng), solution
+
+
+def _add_disambiguating_edge(masks: List[int], neighbors, other: List[int], rng: random.Random) -> bool:
+    """
+    Phá một nghiệm thừa `other`: tại một ô mà `other` khác mạng gốc, nối thêm một cạnh
+    tới ô kề đang nằm trong mạng. Bậc của ô đổi (loại tile đổi) nên cấu hình của ô
+    trong `other` không còn hợp lệ; mạng gốc vẫn kín và liên thông.
+    Trả về False nếu không còn ô nào thêm cạnh được.
+    """
+    cells = [i for i, (mask, alt) in enumerate(zip(masks, other)) if mask != alt]
+    rng.shuffle(cells)
+    for i in cells:
+        free = [d for d in range(4) if not masks[i] >> d & 1 and masks[neighbors[i][d]]]
+        if free:
+            d = rng.choice(free)
+            masks[i] |= 1 << d
+            masks[neighbors[i][d]] |= 1 << ((d + 2) & 3)
+            return True
+    return False
+
+
+def make_unique(masks: List[int], size: int, rng: random.Random, max_repairs: Optional[int] = None,
+                time_limit: Optional[float] = None) -> bool:
+    """
+    Sửa mạng (tại chỗ) tới khi puzzle suy ra từ nó có nghiệm duy nhất.
+    Mỗi vòng: CSP tìm tối đa 2 nghiệm; nếu có nghiệm thứ hai thì thêm một cạnh để loại nó.
+    Tập nghiệm chỉ phụ thuộc loại tile nên không cần xoay lại puzzle giữa các vòng.
+
+    Returns:
+        True nếu đã duy nhất; False nếu hết số lần sửa, hết thời gian hoặc không sửa được
+    """
+    neighbors = get_neighbor_table(size)
+    if max_repairs is None:
+        max_repairs = size * size
+    for _ in range(max_repairs + 1):
+        budget = Budget(time_limit=time_limit) if time_limit else None
+        solutions = find_solutions(state_from_network(masks, size), limit=2, budget=budget)
+        if budget is not None and budget.reason:
+            return False
+        if len(solutions) < 2:
+            return True
+        other = solutions[1] if solutions[0] == masks else solutions[0]
+        if not _add_disambiguating_edge(masks, neighbors, other, rng):
+            return False
+    return False
+
+
+def generate_spanning_puzzle(size: int, coverage: float = 1.0, extra: float = 0.0, unique: bool = False,
+                             seed: Optional[int] = None, max_attempts: int = 10,
+                             time_limit: Optional[float] = None) -> Tuple[PipeState, PipeState]:
+    """
+    Sinh puzzle từ một mạng liên thông (spanning_network), xoay ngẫu nhiên các ô.
+
+    Args:
+        size: Kích thước lưới
+        coverage: Tỉ lệ ô nằm trong mạng (phần còn lại là ô trống)
+        extra: Xác suất thêm cạnh tạo vòng (càng cao càng nhiều T/CROSS)
+        unique: Đảm bảo nghiệm duy nhất (kiểm tra và sửa bằng CSP, xem make_unique)
+        seed: Seed cho random (None = ngẫu nhiên)
+        max_attempts: Số mạng thử lại khi không sửa được về nghiệm duy nhất
+        time_limit: Giới hạn thời gian (giây) cho mỗi lần CSP kiểm tra tính duy nhất
+
+    Returns:
+        (puzzle, solution)
+
+    Raises:
+        RuntimeError: unique=True nhưng không tạo được puzzle nghiệm duy nhất
+    """
+    rng = random.Random(seed)
+    for _ in range(max_attempts):
+        masks = spanning_network(size, rng, coverage, extra)
+        if not unique or make_unique(masks, size, rng, time_limit=time_limit):
+            solution = state_from_network(masks, size)
+            return scramble(solution, rng), solution
+    raise RuntimeError(f"Không tạo được puzzle {size}x{size} nghiệm duy nhất sau {max_attempts} lần thử")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh puzzle Wrap Pipes NxN giải được.")
+    parser.add_argument("--size", type=int, default=7, help="kích thước lưới (mặc định 7)")
+    parser.add_argument("--network", choices=["spanning", "random"], default="spanning",
+                        help="spanning: mạng liên thông từ cây khung (mặc định); random: cạnh ngẫu nhiên")
+    parser.add_argument("--density", type=float, default=0.5,
+                        help="[random] xác suất giữ mỗi cạnh (mặc định 0.5)")
+    parser.add_argument("--coverage", type=float, default=1.0,
+                        help="[spanning] tỉ lệ ô nằm trong mạng (mặc định 1.0)")
+    parser.add_argument("--extra", type=float, default=0.0,
+                        help="[spanning] xác suất thêm cạnh tạo vòng (mặc định 0)")
+    parser.add_argument("--unique", action="store_true", help="[spanning] đảm bảo nghiệm duy nhất")
+    parser.add_argument("--count", type=int, default=1, help="số puzzle cần sinh")
+    parser.add_argument("--seed", type=int, default=None, help="seed cho random (puzzle thứ k dùng seed + k)")
+    parser.add_argument("--output-dir", default=None,
+                        help="thư mục ghi file (format test_inputs/); bỏ trống thì in ra màn hình")
+    parser.add_argument("--prefix", default="gen", help="tiền tố tên file (mặc định 'gen')")
+    args = parser.parse_args()
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    for k in range(args.count):
+        seed = None if args.seed is None else args.seed + k
+        if args.network == "random":
+            puzzle, _ = generate_puzzle(args.size, args.density, seed)
+        else:
+            puzzle, _ = generate_spanning_puzzle(args.size, args.coverage, args.extra, args.unique, seed)
+
+        if args.output_dir:
+            path = os.path.join(args.output_dir, f"{args.prefix}{k + 1:03d}_{args.size}x{args.size}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(puzzle.to_string() + "\n")
+            print(f"{path}: {puzzle.open_ends} open ends")
+        else:
+            if k:
+                print()
+            print(puzzle.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from main import PipeState, bfs, dfs, astar, hill_climbing, is_goal, count_open_ends, Tile, TileType
+from main import PipeState, Budget, bfs, dfs, astar, hill_climbing, is_goal, count_open_ends, Tile, TileType
+from puzzle_generator import generate_spanning_puzzle
 import time
 
 def print_state(state, title=""):
@@ -45,7 +46,8 @@ def print_comparison_table(results):
 
 def generate_random_puzzle(size: int, density: float = 0.7):
     """
-    Tạo puzzle ngẫu nhiên.
+    Tạo puzzle ngẫu nhiên GIẢI ĐƯỢC (xoay ngẫu nhiên một mạng ống liên thông,
+    xem puzzle_generator.generate_spanning_puzzle).
     
     Args:
         size: Kích thước lưới
@@ -54,26 +56,8 @@ def generate_random_puzzle(size: int, density: float = 0.7):
     Returns:
         PipeState ngẫu nhiên
     """
-    import random
-    
-    grid = []
-    for r in range(size):
-        row = []
-        for c in range(size):
-            if random.random() < density:
-                # Chọn ngẫu nhiên loại tile
-                tile_type = random.choice([
-                    TileType.STRAIGHT,
-                    TileType.CORNER,
-                    TileType.T_JUNCTION,
-                ])
-                rotation = random.randint(0, 3)
-                row.append(Tile(tile_type, rotation))
-            else:
-                row.append(Tile(TileType.EMPTY, 0))
-        grid.append(row)
-    
-    return PipeState(grid, size)
+    puzzle, _ = generate_spanning_puzzle(size, coverage=density)
+    return puzzle
 
 def test_puzzle(puzzle_name, initial_state, timeout=60):
     """Test một puzzle với tất cả các thuật toán"""
@@ -91,10 +75,13 @@ def test_puzzle(puzzle_name, initial_state, timeout=60):
     print("-"*50)
     start_time = time.time()
     try:
-        solution, path, stats = astar(initial_state)
+        solution, path, stats = astar(initial_state, budget=Budget(time_limit=timeout))
         astar_time = time.time() - start_time
         
-        if solution:
+        if stats.get('reason') == 'time_limit':
+            print(f"[TIMEOUT] A* QUÁ LÂU (>{timeout}s), dừng lại...")
+            results['A*'] = {'found': False, 'nodes': stats['nodes_explored'], 'path_length': None, 'time': astar_time}
+        elif solution:
             print(f"[OK] A* TÌM THẤY GIẢI PHÁP!")
             print(f"   Nodes explored: {stats['nodes_explored']:,}")
             print(f"   Path length: {stats['path_length']}")
@@ -153,17 +140,17 @@ def test_puzzle(puzzle_name, initial_state, timeout=60):
         print(f"[ERROR] HILL CLIMBING LỖI: {e}")
         results['Hill Climbing'] = {'found': False, 'nodes': 0, 'path_length': None, 'time': 0}
     
-    # Test BFS (với timeout)
+    # Test BFS (dừng thật sự khi quá timeout nhờ Budget)
     print("\n" + "-"*50)
     print("CHẠY BFS...")
     print("-"*50)
     start_time = time.time()
     try:
-        solution, path, stats = bfs(initial_state)
+        solution, path, stats = bfs(initial_state, budget=Budget(time_limit=timeout))
         bfs_time = time.time() - start_time
         
-        if bfs_time > timeout:
-            print(f"[TIMEOUT] BFS QUÁ LÂU (>{timeout}s), bỏ qua...")
+        if stats.get('reason') == 'time_limit':
+            print(f"[TIMEOUT] BFS QUÁ LÂU (>{timeout}s), dừng lại...")
             results['BFS'] = {'found': False, 'nodes': stats['nodes_explored'], 'path_length': None, 'time': bfs_time}
         elif solution:
             print(f"[OK] BFS TÌM THẤY GIẢI PHÁP!")
@@ -189,10 +176,13 @@ def test_puzzle(puzzle_name, initial_state, timeout=60):
     print("-"*50)
     start_time = time.time()
     try:
-        solution, path, stats = dfs(initial_state, max_depth=100)
+        solution, path, stats = dfs(initial_state, max_depth=100, budget=Budget(time_limit=timeout))
         dfs_time = time.time() - start_time
         
-        if solution:
+        if stats.get('reason') == 'time_limit':
+            print(f"[TIMEOUT] DFS QUÁ LÂU (>{timeout}s), dừng lại...")
+            results['DFS'] = {'found': False, 'nodes': stats['nodes_explored'], 'path_length': None, 'time': dfs_time}
+        elif solution:
             print(f"[OK] DFS TÌM THẤY GIẢI PHÁP!")
             print(f"   Nodes explored: {stats['nodes_explored']:,}")
             print(f"   Path length: {stats['path_length']}")
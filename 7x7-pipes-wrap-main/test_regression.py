@@ -0,0 +1,338 @@
+"""
+Test hồi quy cho các phần tối ưu của solver Wrap Pipes:
+- CSP đếm nghiệm đúng như vét cạn mọi cách xoay
+- _open_ends_delta (cập nhật tăng dần) khớp với đếm lại toàn lưới
+- bidirectional_bfs / ida_star cho đường đi hợp lệ và ngắn nhất (so với bfs và với
+  tổng số lần xoay tối thiểu từng ô tới lời giải duy nhất)
+- generate_spanning_puzzle(unique=True) thật sự có nghiệm duy nhất
+- anytime_astar / weighted_astar (heuristic mặc định) ra lời giải nhanh, trong cận so với tối ưu
+- local search (random restart, simulated annealing, tabu): giải được, tất định theo seed, dừng khi bị hủy
+- hill_climbing chỉ gọi progress mỗi PROGRESS_INTERVAL node
+
+Chạy: python -m pytest -q test_regression.py
+"""
+
+import glob
+import os
+import random
+from itertools import product
+
+import pytest
+
+from main import (
+    CONNECTION_MASKS, PROGRESS_INTERVAL, ROTATION_MASKS, TILE_TYPES, Budget, PipeState, _count_open_ends_full,
+    _open_ends_delta, anytime_astar, bfs, bidirectional_bfs, count_solutions, csp_solve, heuristic_matching,
+    hill_climbing, ida_star, is_goal, make_pattern_heuristic, random_restart_hill_climbing, simulated_annealing,
+    tabu_search, weighted_astar,
+)
+from puzzle_generator import generate_spanning_puzzle
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_inputs")
+
+# Vét cạn chỉ chạy trên lưới có tối đa chừng này cấu hình xoay
+BRUTE_FORCE_LIMIT = 1 << 14
+
+# Lưới nhỏ viết tay có nhiều nghiệm (ống thẳng / góc trên lưới xuyến 2x2)
+MULTI_SOLUTION_BOARDS = ("||\n||", "LL\nLL")
+
+# (seed, số lần xoay xáo trộn) của puzzle 4x4 dùng so sánh với bfs: chọn sao cho bfs chạy < 2s
+SCRAMBLED_CASES = ((0, 2), (0, 3), (0, 4), (1, 2), (2, 4), (2, 5), (3, 3))
+
+
+def _load(path):
+    with open(path) as f:
+        return PipeState.from_string(f.read())
+
+
+def _configurations(state):
+    """Số cấu hình xoay khác nhau của lưới (tích số hướng phân biệt của từng ô)."""
+    total = 1
+    for code in state.type_codes:
+        total *= ROTATION_MASKS[code] + 1
+    return total
+
+
+def _brute_force_count(state):
+    """Đếm số cấu hình không còn đầu hở bằng cách thử mọi cách xoay, đếm lại toàn lưới."""
+    cells = [i for i, code in enumerate(state.type_codes) if ROTATION_MASKS[code]]
+    count = 0
+    for choice in product(*(range(ROTATION_MASKS[state.type_codes[i]] + 1) for i in cells)):
+        rotations = 0
+        for i, rotation in zip(cells, choice):
+            rotations |= rotation << (2 * i)
+        if PipeState._packed(state.type_codes, rotations, state.size).open_ends == 0:
+            count += 1
+    return count
+
+
+def _random_state(size, rng):
+    """Lưới ngẫu nhiên (loại tile và độ xoay ngẫu nhiên, thường là vô nghiệm)."""
+    type_codes = tuple(rng.choice(TILE_TYPES).value for _ in range(size * size))
+    rotations = 0
+    for i, code in enumerate(type_codes):
+        rotations |= rng.randint(0, ROTATION_MASKS[code]) << (2 * i)
+    return PipeState._packed(type_codes, rotations, size)
+
+
+def _small_boards():
+    """Các lưới nhỏ đủ để vét cạn: test_inputs nhỏ, puzzle sinh có vòng và lưới ngẫu nhiên."""
+    boards = [(os.path.basename(path), state) for path in sorted(glob.glob(os.path.join(TEST_DIR, "*.txt")))
+              for state in [_load(path)]]
+    boards.extend((f"multi-{n}", PipeState.from_string(board)) for n, board in enumerate(MULTI_SOLUTION_BOARDS))
+    for seed in range(6):
+        puzzle, _ = generate_spanning_puzzle(3 + seed % 2, coverage=0.8, extra=0.4, seed=seed)
+        boards.append((f"spanning-{seed}", puzzle))
+    rng = random.Random(7)
+    for n in range(12):
+        boards.append((f"random-{n}", _random_state(1 + n % 3, rng)))
+    return [(name, state) for name, state in boards if _configurations(state) <= BRUTE_FORCE_LIMIT]
+
+
+def _scrambled(size, seed, moves):
+    """Puzzle nghiệm duy nhất, lời giải cách gốc tối đa `moves` lần xoay (để bfs chạy nhanh)."""
+    rng = random.Random(seed)
+    _, solution = generate_spanning_puzzle(size, unique=True, seed=seed)
+    state = solution
+    cells = [i for i, code in enumerate(state.type_codes) if ROTATION_MASKS[code]]
+    for _ in range(moves):
+        r, c = divmod(rng.choice(cells), size)
+        state = state.rotate_tile(r, c)
+    return state
+
+
+def _search_cases():
+    cases = [("test01_easy_tiny", _load(os.path.join(TEST_DIR, "test01_easy_tiny.txt")))]
+    for seed, moves in SCRAMBLED_CASES:
+        cases.append((f"scrambled-{seed}-{moves}", _scrambled(4, seed, moves)))
+    return cases
+
+
+def _rotation_distance(state, goal):
+    """Số lần xoay 90° tối thiểu từ state tới goal: mỗi ô xoay độc lập, chỉ xoay một chiều."""
+    total = 0
+    for i, code in enumerate(state.type_codes):
+        period = ROTATION_MASKS[code] + 1
+        total += (((goal.rotations >> (2 * i)) & 3) - ((state.rotations >> (2 * i)) & 3)) % period
+    return total
+
+
+def _with_mask(state, i, mask):
+    """state với ô i xoay tới hướng có mask kết nối `mask` (mask phải thuộc loại tile của ô)."""
+    rotation = CONNECTION_MASKS[state.type_codes[i]].index(mask) & ROTATION_MASKS[state.type_codes[i]]
+    shift = 2 * i
+    return PipeState._packed(state.type_codes, (state.rotations & ~(3 << shift)) | (rotation << shift), state.size)
+
+
+def _assert_valid_path(initial_state, goal, path):
+    """path đi từ initial_state tới goal, mỗi bước xoay đúng một ô 90°."""
+    assert path[0] == initial_state
+    assert path[-1] == goal and is_goal(goal)
+    size = initial_state.size
+    for before, after in zip(path, path[1:]):
+        assert any(before.rotate_tile(r, c) == after for r in range(size) for c in range(size))
+
+
+# ============================================================================
+# CSP
+# ============================================================================
+
+@pytest.mark.parametrize("name,state", _small_boards(), ids=lambda value: value if isinstance(value, str) else "")
+def test_csp_count_matches_brute_force(name, state):
+    """count_solutions (CSP + lan truyền ràng buộc) đếm đúng số nghiệm như vét cạn."""
+    expected = _brute_force_count(state)
+    assert count_solutions(state, limit=BRUTE_FORCE_LIMIT + 1) == expected
+
+
+def test_brute_force_covers_solvable_and_unsolvable():
+    """Bộ lưới vét cạn phải có cả lưới vô nghiệm và lưới nhiều nghiệm, nếu không test trên vô nghĩa."""
+    counts = [_brute_force_count(state) for _, state in _small_boards()]
+    assert 0 in counts
+    assert any(count > 1 for count in counts)
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(TEST_DIR, "*.txt"))), ids=os.path.basename)
+def test_csp_solve_test_inputs(path):
+    """csp_solve giải được đúng các test_inputs có nghiệm, đường đi hợp lệ."""
+    state = _load(path)
+    goal, solution_path, stats = csp_solve(state, budget=Budget(time_limit=10))
+    if count_solutions(state, limit=1) == 0:
+        assert goal is None
+    else:
+        assert goal is not None
+        _assert_valid_path(state, goal, solution_path)
+
+
+# ============================================================================
+# ĐẾM ĐẦU HỞ TĂNG DẦN
+# ============================================================================
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_open_ends_delta_matches_full_recount(size):
+    """Sau mỗi lần xoay / đặt mask ngẫu nhiên, open_ends tăng dần bằng đếm lại toàn lưới."""
+    rng = random.Random(size)
+    for _ in range(20):
+        state = _random_state(size, rng)
+        assert state.open_ends == _count_open_ends_full(state)
+        for _ in range(50):
+            i = rng.randrange(size * size)
+            r, c = divmod(i, size)
+            code = state.type_codes[i]
+            old_mask = state.get_mask(r, c)
+            new_mask = CONNECTION_MASKS[code][rng.randrange(4)]
+            rotated = state.rotate_tile(r, c, rng.randint(1, 3))
+            moved = PipeState._packed(state.type_codes, rotated.rotations, size)
+            assert rotated.open_ends == moved.open_ends
+            assert state.open_ends + _open_ends_delta(state, i, old_mask, new_mask) == \
+                _count_open_ends_full(_with_mask(state, i, new_mask))
+            state = rotated
+
+
+# ============================================================================
+# TÌM KIẾM ĐƯỜNG ĐI NGẮN NHẤT
+# ============================================================================
+
+@pytest.mark.parametrize("name,state", _search_cases(), ids=lambda value: value if isinstance(value, str) else "")
+def test_bidirectional_bfs_is_optimal(name, state):
+    """
+    bidirectional_bfs cho đường đi hợp lệ, ngắn nhất: đúng bằng tổng số lần xoay tối thiểu.
+    bfs chỉ xoay các ô có đầu hở (get_successor_moves optimized) nên có thể dài hơn, không ngắn hơn.
+    """
+    goal, path, _ = bfs(state, budget=Budget(time_limit=30))
+    assert goal is not None
+    bi_goal, bi_path, stats = bidirectional_bfs(state, budget=Budget(time_limit=30))
+    assert bi_goal is not None, stats
+    _assert_valid_path(state, bi_goal, bi_path)
+    assert bi_goal == goal
+    assert len(bi_path) - 1 == _rotation_distance(state, goal)
+    assert len(bi_path) <= len(path)
+
+
+@pytest.mark.parametrize("name,state", _search_cases(), ids=lambda value: value if isinstance(value, str) else "")
+@pytest.mark.parametrize("heuristic_name", ["matching", "pattern"])
+def test_ida_star_matches_bfs(name, state, heuristic_name):
+    """ida_star (cùng tập nước đi với bfs) với heuristic chấp nhận được: đường đi hợp lệ, dài bằng bfs."""
+    if heuristic_name == "pattern":
+        heuristic_fn = make_pattern_heuristic(state)
+    else:
+        heuristic_fn = heuristic_matching
+    assert heuristic_fn.admissible
+    goal, path, _ = bfs(state, budget=Budget(time_limit=30))
+    ida_goal, ida_path, stats = ida_star(state, heuristic_fn=heuristic_fn, budget=Budget(time_limit=30))
+    assert goal is not None and ida_goal is not None, stats
+    _assert_valid_path(state, ida_goal, ida_path)
+    assert len(ida_path) == len(path)
+    assert len(ida_path) - 1 >= _rotation_distance(state, goal)
+
+
+# ============================================================================
+# SINH PUZZLE
+# ============================================================================
+
+@pytest.mark.parametrize("size,seed", [(4, 1), (5, 2), (6, 3), (7, 4)])
+def test_generate_spanning_puzzle_unique(size, seed):
+    """unique=True: puzzle có đúng một nghiệm và đó là lời giải trả về kèm."""
+    puzzle, solution = generate_spanning_puzzle(size, unique=True, seed=seed)
+    assert puzzle.type_codes == solution.type_codes
+    assert is_goal(solution)
+    assert count_solutions(puzzle, limit=2) == 1
+    goal, _, _ = csp_solve(puzzle)
+    assert goal == solution
+
+
+# ============================================================================
+# ANYTIME / WEIGHTED A*
+# ============================================================================
+
+@pytest.mark.parametrize("seed", [3, 5])
+def test_anytime_astar_default_heuristic(seed):
+    """
+    Heuristic mặc định: lời giải đầu tiên có ngay trong budget nhỏ, và độ dài cuối cùng
+    không vượt quá suboptimality lần độ dài tối ưu (ida_star, heuristic admissible).
+    """
+    puzzle, _ = generate_spanning_puzzle(7, seed=seed)
+    goal, path, stats = anytime_astar(puzzle, budget=Budget(time_limit=2))
+    assert goal is not None, stats
+    _assert_valid_path(puzzle, goal, path)
+    assert stats["solutions"] and stats["solutions"][0]["time_sec"] < 2
+
+    _, optimal_path, _ = ida_star(puzzle, heuristic_fn=make_pattern_heuristic(puzzle), budget=Budget(time_limit=30))
+    optimal_cost = len(optimal_path) - 1
+    assert optimal_cost <= stats["path_cost"] <= stats["suboptimality"] * optimal_cost
+
+    wa_goal, wa_path, _ = weighted_astar(puzzle, weight=2.0, budget=Budget(time_limit=2))
+    assert wa_goal is not None
+    assert len(wa_path) - 1 <= 2.0 * optimal_cost
+
+
+# ============================================================================
+# LOCAL SEARCH
+# ============================================================================
+
+LOCAL_SEARCHES = (random_restart_hill_climbing, simulated_annealing, tabu_search)
+
+
+def _local_search_ids(value):
+    return value.__name__ if callable(value) else ""
+
+
+@pytest.mark.parametrize("search", LOCAL_SEARCHES, ids=_local_search_ids)
+@pytest.mark.parametrize("seed", [0, 2])
+def test_local_search_solves_generated_puzzle(search, seed):
+    """Puzzle 7x7 sinh ngẫu nhiên (có nghiệm): tìm được đích, đường đi xoay từng bước hợp lệ."""
+    puzzle, _ = generate_spanning_puzzle(7, seed=seed)
+    goal, path, stats = search(puzzle, seed=seed, budget=Budget(time_limit=10))
+    assert goal is not None, stats
+    assert "reason" not in stats
+    _assert_valid_path(puzzle, goal, path)
+    assert stats["path_length"] == len(path)
+
+
+@pytest.mark.parametrize("search", LOCAL_SEARCHES, ids=_local_search_ids)
+def test_local_search_is_deterministic_with_seed(search):
+    """Cùng seed -> cùng lời giải và cùng số liệu; seed khác vẫn ra đích hợp lệ."""
+    puzzle, _ = generate_spanning_puzzle(7, seed=1)
+    first = search(puzzle, seed=4, budget=Budget(time_limit=10))
+    second = search(puzzle, seed=4, budget=Budget(time_limit=10))
+    assert first[0] is not None
+    assert first[0] == second[0]
+    assert first[1] == second[1]
+    assert first[2] == second[2]
+
+
+@pytest.mark.parametrize("search", LOCAL_SEARCHES, ids=_local_search_ids)
+def test_local_search_stops_when_cancelled(search):
+    """budget.cancel() hoặc progress trả về True -> (None, None, stats) với reason 'cancelled'."""
+    puzzle, _ = generate_spanning_puzzle(7, seed=1)
+    budget = Budget()
+    budget.cancel()
+    goal, path, stats = search(puzzle, seed=0, budget=budget)
+    assert goal is None and path is None
+    assert stats["reason"] == "cancelled" and stats["cancelled"]
+    assert stats["nodes_explored"] == 0
+
+    reports = []
+    goal, path, stats = search(puzzle, seed=0, progress=lambda report: reports.append(report) or True)
+    assert goal is None and path is None
+    assert stats["reason"] == "cancelled" and stats["cancelled"]
+    assert len(reports) == 1 and reports[0]["nodes_explored"] == stats["nodes_explored"]
+
+
+@pytest.mark.parametrize("search", LOCAL_SEARCHES, ids=_local_search_ids)
+def test_local_search_node_budget(search):
+    """max_nodes tính theo số ứng viên đã chấm điểm (nodes_explored)."""
+    puzzle, _ = generate_spanning_puzzle(7, seed=1)
+    goal, _, stats = search(puzzle, seed=0, budget=Budget(max_nodes=500))
+    assert goal is None
+    assert stats["reason"] == "node_limit"
+    assert 500 <= stats["nodes_explored"] < 500 + 4 * len(puzzle.type_codes)
+
+
+def test_hill_climbing_progress_is_throttled():
+    """progress được gọi mỗi PROGRESS_INTERVAL node chứ không phải mỗi vòng lặp."""
+    puzzle, _ = generate_spanning_puzzle(14, seed=1)
+    reports = []
+    _, _, stats = hill_climbing(puzzle, progress=lambda report: reports.append(report) or False)
+    assert stats["iterations"] > len(reports) > 0
+    assert len(reports) <= stats["nodes_explored"] // PROGRESS_INTERVAL
+    counts = [report["nodes_explored"] for report in reports]
+    assert all(later - earlier >= PROGRESS_INTERVAL for earlier, later in zip(counts, counts[1:]))
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -6,8 +7,13 @@ from src.sudoku.parser import load_puzzle
 from src.sudoku.state import SudokuState
 from src.core.blind import bfs
 from src.core.heuristic import a_star
-from src.core.metrics import measure_performance
-from src.core.io_utils import append_to_benchmark
+from src.core.dlx import dlx
+from src.core.metrics import METRIC_MODES, measure_split, run_with_mode
+from src.core.io_utils import BENCHMARK_FILE, record_benchmark
+from src.core.report import write_report
+from src.core.instrument import Instrumentation
+from src.core.batch import SOLVERS, run_batch
+from src.core.generator import run_generate
 from src.sudoku.demo import run_step_by_step_demo
 
 def print_board(board: tuple):
@@ -76,7 +82,8 @@ def main():
         print(f"[-] Bài toán có {empty_count} ô trống. Quá khó để BFS giải quyết trong thời gian ngắn.")
     else:
         print("\n>>> ĐANG CHẠY BLIND SEARCH (BFS)...")
-        (bfs_out, bfs_time, bfs_mem) = measure_performance(bfs, initial_state)
+        (bfs_out, bfs_metrics) = measure_split(bfs, initial_state)
+        bfs_time, bfs_mem = bfs_metrics['time_sec'], bfs_metrics['peak_memory_mb']
         bfs_goal_node, bfs_nodes_gen, bfs_max_nodes = bfs_out
         
         if bfs_goal_node:
@@ -90,14 +97,16 @@ def main():
         print(f"Số Node đã tạo:      {bfs_nodes_gen}")
         
         # Ghi vào file benchmark
-        append_to_benchmark("benchmark.md", "BFS", selected_file, bfs_time, bfs_mem, bfs_nodes_gen)
+        record_benchmark(BENCHMARK_FILE, "BFS", selected_file, initial_state.board, bfs_metrics,
+                         bfs_nodes_gen, bfs_max_nodes, bfs_goal_node is not None)
     
     # ==========================================
     # CHẠY HEURISTIC SEARCH (A*)
     # ==========================================
     print("\n" + "="*40)
     print(">>> ĐANG CHẠY HEURISTIC SEARCH (A*)...")
-    (astar_out, astar_time, astar_mem) = measure_performance(a_star, initial_state)
+    (astar_out, astar_metrics) = measure_split(a_star, initial_state)
+    astar_time, astar_mem = astar_metrics['time_sec'], astar_metrics['peak_memory_mb']
     astar_goal_node, astar_nodes_gen, astar_max_nodes = astar_out
     
     if astar_goal_node:
@@ -111,12 +120,170 @@ def main():
     print(f"Số Node đã tạo:      {astar_nodes_gen}")
     
     # Ghi vào file benchmark
-    append_to_benchmark("benchmark.md", "A*", selected_file, astar_time, astar_mem, astar_nodes_gen)
+    record_benchmark(BENCHMARK_FILE, "A*", selected_file, initial_state.board, astar_metrics,
+                     astar_nodes_gen, astar_max_nodes, astar_goal_node is not None)
+
+    # ==========================================
+    # CHẠY EXACT COVER (DANCING LINKS)
+    # ==========================================
+    print("\n" + "="*40)
+    print(">>> ĐANG CHẠY DANCING LINKS (DLX)...")
+    (dlx_out, dlx_metrics) = measure_split(dlx, initial_state)
+    dlx_time, dlx_mem = dlx_metrics['time_sec'], dlx_metrics['peak_memory_mb']
+    dlx_goal_node, dlx_nodes_gen, dlx_max_nodes = dlx_out
+
+    if dlx_goal_node:
+        print("[+] DLX TÌM THẤY ĐÁP ÁN:")
+        print_board(dlx_goal_node.state.board)
+    else:
+        print("[-] DLX không tìm thấy đáp án.")
+
+    print(f"Thời gian (Runtime): {dlx_time:.4f} giây")
+    print(f"Bộ nhớ RAM (Memory): {dlx_mem:.4f} MB")
+    print(f"Số Node đã tạo:      {dlx_nodes_gen}")
+
+    record_benchmark(BENCHMARK_FILE, "DLX", selected_file, initial_state.board, dlx_metrics,
+                     dlx_nodes_gen, dlx_max_nodes, dlx_goal_node is not None)
 
     # Khởi chạy giao diện UI
     if astar_goal_node:
         print("\n>>> ĐANG MỞ GIAO DIỆN DEMO...")
         run_step_by_step_demo(astar_goal_node, delay=0.05)
 
+def cli_main(argv):
+    """
+    Chế độ dòng lệnh (không tương tác):
+      - batch: giải cả file nhiều puzzle, mỗi dòng 81 ký tự
+        python main.py --batch puzzles.txt --algo dlx --workers 4 --output results.csv
+      - generate: sinh puzzle có lời giải duy nhất, chia file theo độ khó
+        python main.py --generate 1000 --output-dir generated --workers 4
+      - report: tổng hợp benchmark.jsonl thành bảng Markdown
+        python main.py --report benchmark.jsonl --output benchmark_report.md
+      - measure: đo một thuật toán trên một puzzle theo chế độ (time / memory / split / full / profile)
+        python main.py --measure input/hard.txt --algo astar --mode time --repeats 10
+    """
+    parser = argparse.ArgumentParser(description="Giải / sinh hàng loạt Sudoku bằng nhiều process.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--batch", help="File puzzle, mỗi dòng một puzzle 81 ký tự")
+    mode.add_argument("--generate", type=int, metavar="COUNT", help="Sinh COUNT puzzle có lời giải duy nhất")
+    mode.add_argument("--report", metavar="JSONL", help="Tổng hợp file benchmark JSON Lines thành bảng Markdown")
+    mode.add_argument("--measure", metavar="PUZZLE", help="Đo một thuật toán trên một file puzzle")
+    parser.add_argument("--algo", default="dlx", choices=sorted(SOLVERS), help="[batch/measure] Thuật toán (mặc định: dlx)")
+    parser.add_argument("--workers", type=int, default=None, help="Số process (mặc định: số lõi CPU)")
+    parser.add_argument("--output", default=None,
+                        help="[batch] File CSV kết quả (mặc định batch_results.csv); "
+                             "[report] file Markdown (mặc định benchmark_report.md)")
+    parser.add_argument("--propagate", action="store_true", help="[batch/measure] Bật lan truyền ràng buộc cho bfs / astar")
+    parser.add_argument("--time-limit", type=float, default=None, help="[batch] Giới hạn thời gian cho mỗi puzzle (giây)")
+    parser.add_argument("--table-entries", type=int, default=None,
+                        help="[batch] Giới hạn tập explored của bfs / astar (bảng chuyển vị LRU, lưu fingerprint)")
+    parser.add_argument("--output-dir", default="generated", help="[generate] Thư mục ghi easy/medium/hard/expert.txt")
+    parser.add_argument("--seed", type=int, default=0, help="[generate] Seed của puzzle đầu tiên")
+    parser.add_argument("--min-clues", type=int, default=17, help="[generate] Số gợi ý tối thiểu giữ lại")
+    parser.add_argument("--symmetric", action="store_true", help="[generate] Xoá gợi ý theo cặp đối xứng tâm")
+    parser.add_argument("--mode", default="time", choices=METRIC_MODES,
+                        help="[measure] time: chỉ thời gian, lặp lại (mặc định); memory: chỉ RAM; "
+                             "split: time + memory chạy riêng; full: tracemalloc + thời gian; profile: cProfile")
+    parser.add_argument("--repeats", type=int, default=5, help="[measure] Số lần đo ở chế độ time / split")
+    parser.add_argument("--warmup", type=int, default=1, help="[measure] Số lần chạy bỏ đi trước khi đo")
+    parser.add_argument("--memory-method", default="tracemalloc", choices=["tracemalloc", "rss"],
+                        help="[measure] Cách đo RAM ở chế độ memory / split")
+    parser.add_argument("--profile-output", default=None, help="[measure] Ghi file .prof ở chế độ profile")
+    parser.add_argument("--instrument", action="store_true",
+                        help="[measure] Chạy thêm một lần bfs / astar có bộ đếm, in thời gian theo từng thao tác")
+    parser.add_argument("--by-revision", action="store_true", help="[report] Tách dòng theo git revision")
+    parser.add_argument("--revision", default=None, help="[report] Chỉ lấy các lần chạy của revision này")
+    args = parser.parse_args(argv)
+
+    if args.generate is not None:
+        generate_main(args)
+    elif args.report is not None:
+        report_main(args)
+    elif args.measure is not None:
+        measure_main(args)
+    else:
+        batch_main(args)
+
+def batch_main(args):
+    if not os.path.exists(args.batch):
+        print(f"[-] Lỗi: Không tìm thấy file '{args.batch}'")
+        return
+
+    output = args.output or "batch_results.csv"
+    print(f">>> Đang giải batch '{args.batch}' bằng {args.algo.upper()}...")
+    summary = run_batch(args.batch, output, algo=args.algo,
+                        workers=args.workers, propagate=args.propagate, time_limit=args.time_limit,
+                        table_entries=args.table_entries)
+    print(f"[+] Đã giải {summary['solved']}/{summary['puzzles']} puzzle "
+          f"({summary['errors']} lỗi, {summary['timeouts']} hết giờ) trong {summary['wall_time_sec']:.2f}s "
+          f"(tổng thời gian giải: {summary['solver_time_sec']:.2f}s)")
+    print(f"[+] Kết quả đã lưu tại: {output}")
+
+def generate_main(args):
+    print(f">>> Đang sinh {args.generate} puzzle vào '{args.output_dir}'...")
+    summary = run_generate(args.generate, args.output_dir, workers=args.workers, seed=args.seed,
+                           min_clues=args.min_clues, symmetric=args.symmetric)
+    grades = ", ".join(f"{grade}: {n}" for grade, n in summary["grades"].items())
+    print(f"[+] Đã sinh {summary['puzzles']} puzzle ({grades}), "
+          f"trung bình {summary['avg_clues']:.1f} gợi ý, trong {summary['wall_time_sec']:.2f}s")
+    print(f"[+] Mỗi mức độ khó một file <độ khó>.txt trong: {args.output_dir}")
+
+def report_main(args):
+    if not os.path.exists(args.report):
+        print(f"[-] Lỗi: Không tìm thấy file '{args.report}'")
+        return
+
+    output = args.output or "benchmark_report.md"
+    n_rows = write_report(args.report, output, by_revision=args.by_revision, revision=args.revision)
+    print(f"[+] Đã tổng hợp {n_rows} dòng (median / p95 qua các lần chạy) vào: {output}")
+
+def measure_main(args):
+    if not os.path.exists(args.measure):
+        print(f"[-] Lỗi: Không tìm thấy file '{args.measure}'")
+        return
+
+    board = load_puzzle(args.measure)
+    solver, accepts_propagate = SOLVERS[args.algo]
+    kwargs = {"propagate": args.propagate} if accepts_propagate else {}
+    print(f">>> Đang đo {args.algo.upper()} trên '{args.measure}' (chế độ {args.mode})...")
+    (goal_node, nodes_gen, max_nodes), metrics = run_with_mode(
+        args.mode, solver, SudokuState(board), repeats=args.repeats, warmup=args.warmup,
+        memory_method=args.memory_method, profile_path=args.profile_output, **kwargs)
+
+    print(f"[{'+' if goal_node else '-'}] {'Tìm thấy' if goal_node else 'Không tìm thấy'} đáp án, "
+          f"{nodes_gen} node đã tạo, tối đa {max_nodes} node trong RAM")
+    if metrics.get("time_sec") is not None:
+        print(f"Thời gian (Runtime): {metrics['time_sec']:.6f} giây"
+              + (f" (median của {metrics['repeats']} lần, min {metrics['time_min_sec']:.6f})" if "repeats" in metrics else ""))
+    if metrics.get("cpu_time_sec") is not None:
+        print(f"Thời gian CPU:       {metrics['cpu_time_sec']:.6f} giây")
+    if metrics.get("peak_memory_mb") is not None:
+        print(f"Bộ nhớ RAM (Memory): {metrics['peak_memory_mb']:.4f} MB")
+
+    # Lần chạy có bộ đếm tách riêng để overhead của nó không lẫn vào số liệu ở trên
+    extra = {}
+    if args.instrument and accepts_propagate:
+        instrument = Instrumentation()
+        solver(SudokuState(board), instrument=instrument, **kwargs)
+        print("Thời gian theo thao tác:")
+        print(instrument.format())
+        extra["instrumentation"] = instrument.summary()
+
+    if args.mode == "profile":
+        print(metrics["report"])
+        if args.profile_output:
+            print(f"[+] File profile: {args.profile_output}")
+        return
+
+    label = {"bfs": "BFS", "astar": "A*", "dlx": "DLX"}[args.algo]
+    label += "+CP" if args.propagate and accepts_propagate else ""
+    record_benchmark(BENCHMARK_FILE, label, os.path.basename(args.measure), board, metrics,
+                     nodes_gen, max_nodes, goal_node is not None, propagate=args.propagate and accepts_propagate,
+                     **extra)
+    print(f"[+] Đã ghi vào: {BENCHMARK_FILE}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        cli_main(sys.argv[1:])
+    else:
+        main()
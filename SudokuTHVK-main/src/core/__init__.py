@@ -1 +1,9 @@
-#hi, em biết là Python 3 không cần __init__.py nữa nhưng em vẫn muốn giữ file này để đánh dấu thư mục này là một package ạ :D
\ No newline at end of file
+#hi, em biết là Python 3 không cần __init__.py nữa nhưng em vẫn muốn giữ file này để đánh dấu thư mục này là một package ạ :D
+import os
+import sys
+
+# Budget / Instrumentation / TranspositionTable nằm ở search_common/ trong thư mục gốc repo
+# (dùng chung với 7x7-pipes-wrap-main), thư mục đó không nằm sẵn trong sys.path
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
@@ -0,0 +1,119 @@
+import csv
+import os
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .blind import bfs
+from .heuristic import a_star
+from .dlx import dlx
+from .budget import Budget
+from .transposition import TranspositionTable
+from src.sudoku.parser import parse_puzzle
+from src.sudoku.state import SudokuState
+
+# Tên thuật toán dùng trên dòng lệnh -> (hàm giải, có nhận tham số propagate hay không)
+SOLVERS = {
+    "bfs": (bfs, True),
+    "astar": (a_star, True),
+    "dlx": (dlx, False),
+}
+
+RESULT_FIELDS = [
+    "index", "puzzle", "solved", "solution", "algorithm",
+    "nodes_generated", "max_memory_nodes", "time_sec", "cpu_time_sec", "reason", "error",
+]
+
+
+def iter_puzzles(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Đọc file puzzle theo từng dòng (không nạp cả file vào RAM).
+    Mỗi dòng là một puzzle 81 ký tự; bỏ qua dòng trống và dòng bắt đầu bằng '#'.
+    Trả về (số thứ tự dòng, nội dung).
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            text = line.strip()
+            if text and not text.startswith("#"):
+                yield line_no, text
+
+
+def solve_one(task: Tuple[int, str, str, bool, Optional[float], Optional[int]]) -> Dict[str, Any]:
+    """
+    Giải một puzzle trong process con. Không dùng tracemalloc để thời gian
+    đo được là thời gian của thuật toán, không bị overhead của việc theo dõi bộ nhớ.
+    time_limit (giây, tùy chọn) được áp dụng bằng Budget ngay trong vòng lặp tìm kiếm;
+    puzzle bị dừng vì hết giờ có cột reason = 'time_limit'.
+    table_entries (tùy chọn): giới hạn tập explored của bfs / astar bằng TranspositionTable,
+    để worker chạy lâu không bị hết RAM.
+    """
+    index, text, algo, propagate, time_limit, table_entries = task
+    row: Dict[str, Any] = {
+        "index": index, "puzzle": text, "solved": False, "solution": "", "algorithm": algo,
+        "nodes_generated": 0, "max_memory_nodes": 0, "time_sec": 0.0, "cpu_time_sec": 0.0, "reason": "", "error": "",
+    }
+    try:
+        board = parse_puzzle(text)
+    except ValueError as e:
+        row["error"] = str(e)
+        return row
+
+    solver, accepts_propagate = SOLVERS[algo]
+    kwargs = {"propagate": propagate} if accepts_propagate else {}
+    budget = Budget(time_limit=time_limit) if time_limit else None
+    kwargs["budget"] = budget
+    if table_entries and accepts_propagate:
+        kwargs["table"] = TranspositionTable(max_entries=table_entries, fingerprint=True)
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    goal_node, nodes_generated, max_memory_nodes = solver(SudokuState(board), **kwargs)
+    row["time_sec"] = time.perf_counter() - start_wall
+    row["cpu_time_sec"] = time.process_time() - start_cpu
+
+    row["reason"] = budget.reason if budget is not None and budget.reason else ""
+    row["nodes_generated"] = nodes_generated
+    row["max_memory_nodes"] = max_memory_nodes
+    if goal_node is not None:
+        row["solved"] = True
+        row["solution"] = "".join(str(v) for v in goal_node.state.board)
+    return row
+
+
+def run_batch(input_path: str, output_path: str, algo: str = "dlx", workers: Optional[int] = None,
+              propagate: bool = False, chunksize: int = 16,
+              time_limit: Optional[float] = None, table_entries: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Giải hàng loạt puzzle bằng một pool process (mặc định: số lõi CPU).
+    Kết quả được ghi ra CSV ngay khi từng puzzle xong (theo đúng thứ tự input),
+    nên có thể theo dõi / dừng giữa chừng mà không mất phần đã giải.
+
+    time_limit: giới hạn thời gian cho từng puzzle (giây).
+    table_entries: số state tối đa trong tập explored của bfs / astar (xem solve_one).
+
+    Trả về thống kê tổng: số puzzle, số giải được, số lỗi, số bị dừng vì hết giờ, tổng thời gian.
+    """
+    if algo not in SOLVERS:
+        raise ValueError(f"Thuật toán không hợp lệ: {algo}. Chọn một trong {sorted(SOLVERS)}")
+
+    workers = workers or os.cpu_count() or 1
+    tasks = ((index, text, algo, propagate, time_limit, table_entries) for index, text in iter_puzzles(input_path))
+
+    summary = {"puzzles": 0, "solved": 0, "errors": 0, "timeouts": 0, "solver_time_sec": 0.0, "wall_time_sec": 0.0}
+    start = time.perf_counter()
+
+    with open(output_path, "w", newline="", encoding="utf-8") as out, Pool(processes=workers) as pool:
+        writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        for row in pool.imap(solve_one, tasks, chunksize=chunksize):
+            writer.writerow(row)
+            out.flush()
+
+            summary["puzzles"] += 1
+            summary["solved"] += int(row["solved"])
+            summary["errors"] += int(bool(row["error"]))
+            summary["timeouts"] += int(row["reason"] == "time_limit")
+            summary["solver_time_sec"] += row["time_sec"]
+
+    summary["wall_time_sec"] = time.perf_counter() - start
+    return summary
@@ -1,10 +1,32 @@
 from collections import deque
 from typing import Optional, Tuple, Set
 from .node import Node
+from .metrics import report_progress
+from .budget import Budget
+from .instrument import Instrumentation
+from .transposition import TranspositionTable
 from src.sudoku.state import SudokuState, select_first_unassigned_cell
 
-def bfs(initial_state: SudokuState) -> Tuple[Optional[Node], int, int]:
+def bfs(initial_state: SudokuState, propagate: bool = False, progress=None,
+        budget: Optional[Budget] = None,
+        instrument: Optional[Instrumentation] = None,
+        table: Optional[TranspositionTable] = None) -> Tuple[Optional[Node], int, int]:
+    """
+    Breadth-First Search.
+    propagate=True: lan truyền naked/hidden singles ở gốc và sau mỗi phép gán.
+    progress: callback nhận dict số liệu định kỳ; trả về True để dừng (kết quả như không tìm thấy).
+    budget: giới hạn thời gian / số node / bộ nhớ; khi hết, lý do nằm ở budget.reason.
+    instrument: đếm số lần gọi và thời gian của successors / goal_test / visited / frontier.
+    table: bảng chuyển vị có giới hạn dùng thay cho tập explored, xem search_common/transposition.py.
+    Trả về: (Goal_Node, số_node_đã_tạo, số_node_lưu_trữ_tối_đa_trong_RAM)
+    """
     root = Node(state=initial_state)
+    if propagate:
+        propagated = initial_state.propagate()
+        if propagated is None:
+            return None, 1, 1
+        if propagated is not initial_state:
+            root = Node(state=propagated, parent=root)
     if root.state.is_goal():
         return root, 1, 1
 
@@ -12,29 +34,48 @@ def bfs(initial_state: SudokuState) -> Tuple[Optional[Node], int, int]:
     # TỐI ƯU HÓA: Dùng thêm set để kiểm tra node có trong frontier hay không với tốc độ O(1)
     frontier_states: Set[SudokuState] = {root.state} 
     explored: Set[SudokuState] = set()
+
+    get_successors, is_goal = SudokuState.get_successors, SudokuState.is_goal
+    popleft, append = frontier.popleft, frontier.append
+    if instrument is not None:
+        get_successors = instrument.wrap("successors", get_successors)
+        is_goal = instrument.wrap("goal_test", is_goal)
+        frontier_states = instrument.set("visited", frontier_states)
+        explored = instrument.set("visited")
+        popleft = instrument.wrap("frontier", popleft)
+        append = instrument.wrap("frontier", append)
+    if table is not None:
+        explored = table if instrument is None else instrument.table("visited", table)
     
     nodes_generated = 1
     max_memory_nodes = 1
+    # Đếm riêng số node đã mở rộng: len(explored) đứng yên khi table đầy nên không dùng để báo tiến độ
+    expanded = 0
 
     while frontier:
         current_memory = len(frontier) + len(explored)
         if current_memory > max_memory_nodes:
             max_memory_nodes = current_memory
+        if budget is not None and budget.check(nodes_generated, current_memory):
+            return None, nodes_generated, max_memory_nodes
 
-        node = frontier.popleft()
+        node = popleft()
         frontier_states.remove(node.state)
         explored.add(node.state)
+        expanded += 1
+        if report_progress(progress, expanded, nodes_generated, len(frontier)):
+            return None, nodes_generated, max_memory_nodes
 
-        for child_state in node.state.get_successors(select_first_unassigned_cell):
+        for child_state in get_successors(node.state, select_first_unassigned_cell, propagate=propagate):
             # Tra cứu siêu tốc nhờ Hash Set thay vì duyệt mảng
             if child_state not in explored and child_state not in frontier_states:
                 child_node = Node(state=child_state, parent=node, g_cost=node.g_cost + 1)
                 nodes_generated += 1
                 
-                if child_state.is_goal():
+                if is_goal(child_state):
                     return child_node, nodes_generated, max_memory_nodes
                 
-                frontier.append(child_node)
+                append(child_node)
                 frontier_states.add(child_state)
 
     return None, nodes_generated, max_memory_nodes
\ No newline at end of file
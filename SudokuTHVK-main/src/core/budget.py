@@ -0,0 +1,4 @@
+# Budget dùng chung với 7x7-pipes-wrap-main, xem search_common/budget.py ở thư mục gốc repo
+from search_common.budget import Budget
+
+__all__ = ["Budget"]
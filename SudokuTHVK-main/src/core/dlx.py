@@ -0,0 +1,243 @@
+from typing import Callable, List, Optional, Tuple
+from .node import Node
+from .budget import Budget
+from .metrics import report_progress
+from src.sudoku.state import SudokuState
+from src.sudoku.rules import BOARD_SIZE, EMPTY, UNITS_OF_CELL, assign_unit_masks
+
+# ---------------------------------------------------------------------------
+# Dancing Links (Algorithm X của Knuth) cho Sudoku dạng Exact Cover.
+#
+# Ma trận exact cover:
+#   - 729 hàng: mỗi hàng là một lựa chọn (ô idx, chữ số d) -> row_id = idx*9 + d-1
+#   - 324 cột ràng buộc, mỗi cột phải được phủ đúng 1 lần:
+#       [0..80]    ô idx đã có số
+#       [81..161]  hàng r có chữ số d
+#       [162..242] cột c có chữ số d
+#       [243..323] khối b có chữ số d
+# Danh sách liên kết 4 chiều được lưu bằng các mảng số nguyên (L, R, U, D, C, ROW)
+# thay vì object, node 0 là root, node 1..324 là header của các cột.
+# ---------------------------------------------------------------------------
+
+N_CELLS = BOARD_SIZE * BOARD_SIZE
+N_COLUMNS = 4 * N_CELLS
+
+_TEMPLATE = None
+
+
+def _row_columns(idx: int, digit: int) -> Tuple[int, int, int, int]:
+    """4 cột ràng buộc mà lựa chọn (ô idx, chữ số digit) phủ."""
+    r, c, b = UNITS_OF_CELL[idx]
+    d = digit - 1
+    # r, c, b là chỉ số mask trong rules.py: hàng 0..8, cột 9..17, khối 18..26
+    return (idx,
+            N_CELLS + r * BOARD_SIZE + d,
+            N_CELLS + c * BOARD_SIZE + d,
+            N_CELLS + b * BOARD_SIZE + d)
+
+
+def _build_template():
+    """Dựng ma trận đầy đủ một lần; mỗi lần giải chỉ copy các mảng."""
+    n_headers = N_COLUMNS + 1
+    L = [i - 1 for i in range(n_headers)]
+    R = [i + 1 for i in range(n_headers)]
+    L[0] = N_COLUMNS
+    R[N_COLUMNS] = 0
+    U = list(range(n_headers))
+    D = list(range(n_headers))
+    C = list(range(n_headers))
+    ROW = [-1] * n_headers
+    S = [0] * n_headers
+    # ROW_START[row_id] = node đầu tiên của hàng (để cover các cột của một lựa chọn có sẵn)
+    row_start = []
+
+    for idx in range(N_CELLS):
+        for digit in range(1, BOARD_SIZE + 1):
+            row_id = idx * BOARD_SIZE + digit - 1
+            first = len(C)
+            row_start.append(first)
+            for k, col in enumerate(_row_columns(idx, digit)):
+                header = col + 1
+                node = first + k
+                # Nối ngang (vòng tròn 4 node)
+                L.append(first + (k - 1) % 4)
+                R.append(first + (k + 1) % 4)
+                # Nối dọc: chèn vào cuối cột
+                U.append(U[header])
+                D.append(header)
+                D[U[header]] = node
+                U[header] = node
+                C.append(header)
+                ROW.append(row_id)
+                S[header] += 1
+    return L, R, U, D, C, ROW, S, row_start
+
+
+class _DancingLinks:
+    def __init__(self):
+        global _TEMPLATE
+        if _TEMPLATE is None:
+            _TEMPLATE = _build_template()
+        L, R, U, D, C, ROW, S, row_start = _TEMPLATE
+        self.L, self.R, self.U, self.D = L[:], R[:], U[:], D[:]
+        self.C, self.ROW, self.S = C, ROW, S[:]
+        self.row_start = row_start
+
+    def cover(self, header: int) -> None:
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[header]] = R[header]
+        L[R[header]] = L[header]
+        i = D[header]
+        while i != header:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, header: int) -> None:
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[header]
+        while i != header:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[header]] = header
+        L[R[header]] = header
+
+    def preselect(self, idx: int, digit: int) -> bool:
+        """Chọn sẵn một ô đề bài. False nếu đề bài tự mâu thuẫn."""
+        first = self.row_start[idx * BOARD_SIZE + digit - 1]
+        L, R = self.L, self.R
+        for k in range(4):
+            header = self.C[first + k]
+            # Cột đã bị phủ (bị gỡ khỏi danh sách header) -> hai ô đề bài xung đột
+            if R[L[header]] != header:
+                return False
+            self.cover(header)
+        return True
+
+    def search(self, max_solutions: int, budget: Optional[Budget] = None,
+               progress: Optional[Callable[[dict], bool]] = None):
+        """
+        Algorithm X (chọn cột có ít hàng nhất). Độ sâu đệ quy tối đa 81.
+        Trả về (danh sách lời giải [list row_id theo thứ tự chọn], số node đã tạo, độ sâu tối đa).
+        Hết ngân sách (budget) hoặc progress trả về True thì dừng và trả về các lời giải đã tìm được.
+        progress được gọi mỗi PROGRESS_INTERVAL node như bfs / a_star (frontier_size = độ sâu hiện tại).
+        """
+        L, R, D, C, ROW, S = self.L, self.R, self.D, self.C, self.ROW, self.S
+        solutions: List[List[int]] = []
+        partial: List[int] = []
+        counters = {'nodes': 0, 'depth': 0}
+
+        def recurse() -> bool:
+            if R[0] == 0:
+                solutions.append(partial[:])
+                return len(solutions) >= max_solutions
+
+            # Chọn cột có S nhỏ nhất
+            header = R[0]
+            best = header
+            best_size = S[header]
+            while header != 0:
+                if S[header] < best_size:
+                    best, best_size = header, S[header]
+                    if best_size <= 1:
+                        break
+                header = R[header]
+            if best_size == 0:
+                return False
+
+            self.cover(best)
+            r = D[best]
+            while r != best:
+                if budget is not None and budget.check(counters['nodes'], counters['depth']):
+                    self.uncover(best)
+                    return True
+                counters['nodes'] += 1
+                if report_progress(progress, counters['nodes'], counters['nodes'], len(partial)):
+                    self.uncover(best)
+                    return True
+                partial.append(ROW[r])
+                if len(partial) > counters['depth']:
+                    counters['depth'] = len(partial)
+                j = R[r]
+                while j != r:
+                    self.cover(C[j])
+                    j = R[j]
+                done = recurse()
+                j = L[r]
+                while j != r:
+                    self.uncover(C[j])
+                    j = L[j]
+                partial.pop()
+                if done:
+                    self.uncover(best)
+                    return True
+                r = D[r]
+            self.uncover(best)
+            return False
+
+        recurse()
+        return solutions, counters['nodes'], counters['depth']
+
+
+def _prepare(initial_state: SudokuState) -> Optional[_DancingLinks]:
+    links = _DancingLinks()
+    for idx, val in enumerate(initial_state.board):
+        if val != EMPTY and not links.preselect(idx, val):
+            return None
+    return links
+
+
+def dlx(initial_state: SudokuState, budget: Optional[Budget] = None,
+        progress: Optional[Callable[[dict], bool]] = None) -> Tuple[Optional[Node], int, int]:
+    """
+    Giải Sudoku bằng Dancing Links (Exact Cover).
+    Trả về giống bfs / a_star: (Goal_Node, số_node_đã_tạo, số_node_lưu_trữ_tối_đa_trong_RAM).
+    Goal_Node có chuỗi parent điền lần lượt từng ô theo thứ tự DLX đã chọn,
+    nên demo / UI có thể phát lại lời giải như với BFS và A*.
+    Bộ nhớ tìm kiếm gần như cố định: ma trận ~3000 node + ngăn xếp độ sâu <= 81.
+    progress: callback nhận dict số liệu định kỳ; trả về True để dừng (kết quả như không tìm thấy).
+    """
+    root = Node(state=initial_state)
+    if initial_state.is_goal():
+        return root, 1, 1
+
+    links = _prepare(initial_state)
+    if links is None:
+        return None, 1, 1
+
+    solutions, nodes, depth = links.search(max_solutions=1, budget=budget, progress=progress)
+    nodes_generated = nodes + 1
+    max_memory_nodes = depth + 1
+    if not solutions:
+        return None, nodes_generated, max_memory_nodes
+
+    node = root
+    board = list(initial_state.board)
+    masks = initial_state.masks
+    for row_id in solutions[0]:
+        idx, d = divmod(row_id, BOARD_SIZE)
+        board[idx] = d + 1
+        masks = assign_unit_masks(masks, idx, d + 1)
+        node = Node(state=SudokuState(tuple(board), masks), parent=node, g_cost=node.g_cost + 1)
+    return node, nodes_generated, max_memory_nodes
+
+
+def count_solutions(initial_state: SudokuState, limit: int = 2, budget: Optional[Budget] = None) -> int:
+    """
+    Đếm số lời giải, dừng sớm khi đạt `limit` (limit=2 để kiểm tra tính duy nhất).
+    Nếu hết budget giữa chừng thì kết quả chỉ là cận dưới (xem budget.reason).
+    """
+    links = _prepare(initial_state)
+    if links is None:
+        return 0
+    solutions, _, _ = links.search(max_solutions=limit, budget=budget)
+    return len(solutions)
@@ -0,0 +1,154 @@
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional, Tuple
+
+from .dlx import dlx, count_solutions
+from .heuristic import a_star
+from src.sudoku.state import SudokuState
+from src.sudoku.rules import BOARD_SIZE, BOX_SIZE, EMPTY, compute_unit_masks, propagate_singles
+
+# Các mức độ khó, theo thứ tự tăng dần:
+#   easy   - chỉ cần naked single
+#   medium - cần thêm hidden single
+#   hard   - phải tìm kiếm, A* (propagate) tạo không quá HARD_NODE_LIMIT node
+#   expert - A* (propagate) tạo nhiều hơn HARD_NODE_LIMIT node
+GRADES = ("easy", "medium", "hard", "expert")
+HARD_NODE_LIMIT = 5
+
+N_CELLS = BOARD_SIZE * BOARD_SIZE
+
+
+def random_solution(rng: random.Random) -> Tuple[int, ...]:
+    """
+    Bảng Sudoku đầy đủ ngẫu nhiên: điền hoán vị ngẫu nhiên vào 3 khối trên đường chéo
+    (độc lập với nhau nên luôn hợp lệ) rồi để DLX điền nốt phần còn lại.
+    """
+    board = [EMPTY] * N_CELLS
+    for box in range(BOX_SIZE):
+        digits = list(range(1, BOARD_SIZE + 1))
+        rng.shuffle(digits)
+        r0 = c0 = box * BOX_SIZE
+        for k, d in enumerate(digits):
+            board[(r0 + k // BOX_SIZE) * BOARD_SIZE + c0 + k % BOX_SIZE] = d
+    goal_node, _, _ = dlx(SudokuState(tuple(board)))
+    return goal_node.state.board
+
+
+def _solved_by_propagation(board: Tuple[int, ...], hidden: bool = True) -> bool:
+    result = propagate_singles(board, compute_unit_masks(board), hidden=hidden)
+    return result is not None and EMPTY not in result[0]
+
+
+def is_unique(board: Tuple[int, ...]) -> bool:
+    """
+    Puzzle có đúng một lời giải? Lan truyền singles là suy luận chắc chắn nên nếu nó
+    điền kín bảng thì lời giải là duy nhất; chỉ khi bị kẹt mới phải đếm bằng DLX.
+    """
+    if _solved_by_propagation(board):
+        return True
+    return count_solutions(SudokuState(board), limit=2) == 1
+
+
+def remove_clues(solution: Tuple[int, ...], rng: random.Random, min_clues: int = 17,
+                 symmetric: bool = False) -> Tuple[int, ...]:
+    """
+    Xoá dần gợi ý theo thứ tự ngẫu nhiên, chỉ giữ phép xoá nếu puzzle vẫn có lời giải duy nhất.
+    symmetric=True: xoá theo cặp đối xứng tâm (ô idx và 80 - idx).
+    Dừng khi còn min_clues gợi ý hoặc đã thử hết các ô.
+    """
+    board = list(solution)
+    clues = N_CELLS
+    order = list(range(N_CELLS // 2 + 1 if symmetric else N_CELLS))
+    rng.shuffle(order)
+    for idx in order:
+        cells = {idx, N_CELLS - 1 - idx} if symmetric else {idx}
+        if clues - len(cells) < min_clues:
+            continue
+        saved = [(i, board[i]) for i in cells]
+        for i in cells:
+            board[i] = EMPTY
+        if is_unique(tuple(board)):
+            clues -= len(cells)
+        else:
+            for i, v in saved:
+                board[i] = v
+    return tuple(board)
+
+
+def grade_puzzle(board: Tuple[int, ...]) -> Tuple[str, int]:
+    """
+    Chấm độ khó theo kỹ thuật lan truyền cần dùng và số node A* (propagate=True) phải tạo.
+    Trả về (mức độ khó, số node A* đã tạo).
+    """
+    if _solved_by_propagation(board, hidden=False):
+        return "easy", 1
+    if _solved_by_propagation(board):
+        return "medium", 1
+    _, nodes_generated, _ = a_star(SudokuState(board), propagate=True)
+    return ("hard" if nodes_generated <= HARD_NODE_LIMIT else "expert"), nodes_generated
+
+
+def puzzle_to_line(board: Tuple[int, ...]) -> str:
+    """Một dòng 81 ký tự ('.' là ô trống), đọc lại được bằng parse_puzzle / chế độ batch."""
+    return "".join(str(v) if v != EMPTY else "." for v in board)
+
+
+def generate_one(task: Tuple[int, int, bool]) -> Dict[str, Any]:
+    """Sinh và chấm một puzzle trong process con. Mỗi puzzle có seed riêng nên tái lập được."""
+    seed, min_clues, symmetric = task
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    puzzle = remove_clues(random_solution(rng), rng, min_clues, symmetric)
+    grade, nodes_generated = grade_puzzle(puzzle)
+    return {
+        "seed": seed,
+        "puzzle": puzzle_to_line(puzzle),
+        "clues": N_CELLS - puzzle.count(EMPTY),
+        "grade": grade,
+        "nodes_generated": nodes_generated,
+        "time_sec": time.perf_counter() - start,
+    }
+
+
+def run_generate(count: int, output_dir: str, workers: Optional[int] = None, seed: int = 0,
+                 min_clues: int = 17, symmetric: bool = False, chunksize: int = 8) -> Dict[str, Any]:
+    """
+    Sinh `count` puzzle bằng một pool process và ghi vào output_dir, mỗi mức độ khó một file
+    (<grade>.txt, mỗi dòng một puzzle, dùng trực tiếp được với --batch).
+    Puzzle thứ k dùng seed + k.
+
+    Trả về thống kê: số puzzle theo từng mức độ khó, số gợi ý trung bình, thời gian.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = ((seed + k, min_clues, symmetric) for k in range(count))
+
+    summary: Dict[str, Any] = {"puzzles": 0, "grades": {grade: 0 for grade in GRADES},
+                               "avg_clues": 0.0, "wall_time_sec": 0.0}
+    total_clues = 0
+    start = time.perf_counter()
+
+    files = {grade: open(os.path.join(output_dir, f"{grade}.txt"), "w", encoding="utf-8") for grade in GRADES}
+    try:
+        with Pool(processes=workers) as pool:
+            for row in pool.imap_unordered(generate_one, tasks, chunksize=chunksize):
+                files[row["grade"]].write(row["puzzle"] + "\n")
+                summary["puzzles"] += 1
+                summary["grades"][row["grade"]] += 1
+                total_clues += row["clues"]
+    finally:
+        for f in files.values():
+            f.close()
+
+    if summary["puzzles"]:
+        summary["avg_clues"] = total_clues / summary["puzzles"]
+    summary["wall_time_sec"] = time.perf_counter() - start
+    return summary
+
+
+def generate_puzzles(count: int, seed: int = 0, min_clues: int = 17,
+                     symmetric: bool = False) -> List[Dict[str, Any]]:
+    """Bản tuần tự (một process) của run_generate, trả về luôn danh sách kết quả."""
+    return [generate_one((seed + k, min_clues, symmetric)) for k in range(count)]
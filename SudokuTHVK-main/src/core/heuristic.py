@@ -1,61 +1,102 @@
 import heapq
 from typing import Optional, Tuple, Set, Dict
 from .node import Node
+from .metrics import report_progress
+from .budget import Budget
+from .instrument import Instrumentation
+from .transposition import TranspositionTable
 from src.sudoku.state import SudokuState
 from src.sudoku.rules import select_unassigned_cell_mrv
 from src.sudoku.heuristic_rule import heuristic_empty_cells
 
-def a_star(initial_state: SudokuState) -> Tuple[Optional[Node], int, int]:
+def a_star(initial_state: SudokuState, propagate: bool = False, progress=None,
+           budget: Optional[Budget] = None,
+           instrument: Optional[Instrumentation] = None,
+           table: Optional[TranspositionTable] = None) -> Tuple[Optional[Node], int, int]:
     """
     A* Search Algorithm
+    propagate=True: lan truyền naked/hidden singles ở gốc và sau mỗi phép gán
+    (mỗi bước có thể điền nhiều ô nên h(n) không còn bằng đúng h*(n)).
+    progress: callback nhận dict số liệu định kỳ; trả về True để dừng (kết quả như không tìm thấy).
+    budget: giới hạn thời gian / số node / bộ nhớ; khi hết, lý do nằm ở budget.reason.
+    instrument: đếm số lần gọi và thời gian của successors / heuristic / goal_test / visited / heap.
+    table: bảng chuyển vị có giới hạn dùng thay cho tập explored, xem search_common/transposition.py.
     Trả về: (Goal_Node, số_node_đã_tạo, số_node_lưu_trữ_tối_đa_trong_RAM)
     """
+    parent = None
+    if propagate:
+        propagated = initial_state.propagate()
+        if propagated is None:
+            return None, 1, 1
+        if propagated is not initial_state:
+            parent = Node(state=initial_state)
+            initial_state = propagated
+
+    get_successors, h_fn, is_goal = SudokuState.get_successors, heuristic_empty_cells, SudokuState.is_goal
+    heappush, heappop = heapq.heappush, heapq.heappop
+    if instrument is not None:
+        get_successors = instrument.wrap("successors", get_successors)
+        h_fn = instrument.wrap("heuristic", h_fn)
+        is_goal = instrument.wrap("goal_test", is_goal)
+        heappush = instrument.wrap("heap", heappush)
+        heappop = instrument.wrap("heap", heappop)
+
     # Tính h(n) cho state gốc
-    root_h = heuristic_empty_cells(initial_state.board)
-    root = Node(state=initial_state, g_cost=0, h_cost=root_h)
+    root_h = h_fn(initial_state.board)
+    root = Node(state=initial_state, parent=parent, g_cost=0, h_cost=root_h)
     
     # Priority Queue (Min-Heap) cho frontier
     frontier = []
-    heapq.heappush(frontier, root)
+    heappush(frontier, root)
     
     # Dùng dictionary để tra cứu nhanh chi phí g(n) hiện tại của các state trong frontier
-    frontier_states: Dict[SudokuState, int] = {initial_state: root.g_cost}
-    explored: Set[SudokuState] = set()
+    frontier_states: Dict[SudokuState, int] = {} if instrument is None else instrument.dict("visited")
+    frontier_states[initial_state] = root.g_cost
+    explored: Set[SudokuState] = set() if instrument is None else instrument.set("visited")
+    if table is not None:
+        explored = table if instrument is None else instrument.table("visited", table)
     
     nodes_generated = 1
     max_memory_nodes = 1
+    # Đếm riêng số node đã mở rộng: len(explored) đứng yên khi table đầy nên không dùng để báo tiến độ
+    expanded = 0
 
     while frontier:
         # Cập nhật thông số bộ nhớ (đo lường RAM)
         current_memory = len(frontier) + len(explored)
         if current_memory > max_memory_nodes:
             max_memory_nodes = current_memory
+        if budget is not None and budget.check(nodes_generated, current_memory):
+            return None, nodes_generated, max_memory_nodes
 
         # Lấy Node có f_cost nhỏ nhất
-        node = heapq.heappop(frontier)
+        node = heappop(frontier)
         
         # Nếu node này đã được pop, gỡ khỏi dict tra cứu
         if node.state in frontier_states:
             del frontier_states[node.state]
             
         # A* kiểm tra đích KHI POP Node ra khỏi frontier
-        if node.state.is_goal():
+        if is_goal(node.state):
             return node, nodes_generated, max_memory_nodes
             
         explored.add(node.state)
+        expanded += 1
+        if report_progress(progress, expanded, nodes_generated, len(frontier)):
+            return None, nodes_generated, max_memory_nodes
 
         # Mở rộng (Expand) node hiện tại. Dùng MRV để tối ưu hóa việc chọn ô (Variable Ordering).
-        for child_state in node.state.get_successors(select_unassigned_cell_mrv):
+        for child_state in get_successors(node.state, select_unassigned_cell_mrv, propagate=propagate):
             if child_state in explored:
                 continue
                 
             child_g = node.g_cost + 1
-            child_h = heuristic_empty_cells(child_state.board)
+            child_h = h_fn(child_state.board)
             child_node = Node(state=child_state, parent=node, g_cost=child_g, h_cost=child_h)
             
             # Nếu child_state chưa có trong frontier, hoặc tìm được đường đi tốt hơn (g_cost nhỏ hơn)
             if child_state not in frontier_states or child_g < frontier_states[child_state]:
-                heapq.heappush(frontier, child_node)
+                heappush(frontier, child_node)
                 frontier_states[child_state] = child_g
                 nodes_generated += 1
 
@@ -0,0 +1,4 @@
+# Instrumentation dùng chung với 7x7-pipes-wrap-main, xem search_common/instrument.py ở thư mục gốc repo
+from search_common.instrument import Instrumentation
+
+__all__ = ["Instrumentation"]
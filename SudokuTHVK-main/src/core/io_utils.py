@@ -1,7 +1,22 @@
+import datetime
+import hashlib
+import json
 import os
+import platform
+import subprocess
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# File kết quả benchmark dạng JSON Lines: mỗi dòng là một lần chạy (xem record_benchmark)
+BENCHMARK_FILE = "benchmark.jsonl"
+
+_MACHINE_INFO: Optional[Dict[str, Any]] = None
+_GIT_REVISIONS: Dict[str, Optional[str]] = {}
 
 def append_to_benchmark(filename: str, algorithm: str, puzzle_name: str, time_sec: float, memory_mb: float, nodes: int):
-    """Ghi thêm một dòng kết quả đo lường vào file Markdown để tạo bảng chuyên nghiệp."""
+    """
+    Ghi thêm một dòng kết quả đo lường vào file Markdown để tạo bảng chuyên nghiệp.
+    (Định dạng cũ, không truy vấn được - dùng record_benchmark + report.py thay thế.)
+    """
     file_exists = os.path.isfile(filename)
     
     with open(filename, mode='a', encoding='utf-8') as f:
@@ -12,4 +27,90 @@ def append_to_benchmark(filename: str, algorithm: str, puzzle_name: str, time_se
             f.write("|:---------:|:-------------|---------:|------------:|----------------:|\n")
         
         # Ghi dữ liệu với padding (khoảng trắng) để các cột luôn thẳng hàng nhau khi xem dạng text
-        f.write(f"| {algorithm:^9} | {puzzle_name:<12} | {time_sec:>8.5f} | {memory_mb:>11.5f} | {nodes:>15} |\n")
\ No newline at end of file
+        f.write(f"| {algorithm:^9} | {puzzle_name:<12} | {time_sec:>8.5f} | {memory_mb:>11.5f} | {nodes:>15} |\n")
+
+def puzzle_hash(board: Tuple[int, ...]) -> str:
+    """Mã băm ngắn của nội dung puzzle, để nhóm các lần chạy cùng một đề dù tên file khác nhau."""
+    return hashlib.sha1("".join(map(str, board)).encode("ascii")).hexdigest()[:12]
+
+def machine_info() -> Dict[str, Any]:
+    """Thông tin máy / Python (tính một lần cho mỗi process)."""
+    global _MACHINE_INFO
+    if _MACHINE_INFO is None:
+        _MACHINE_INFO = {
+            "hostname": platform.node(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+        }
+    return _MACHINE_INFO
+
+def git_revision(path: str = ".") -> Optional[str]:
+    """Commit hiện tại của repo chứa `path` (thêm '-dirty' nếu có thay đổi chưa commit); None nếu không có git."""
+    path = os.path.abspath(path)
+    if path not in _GIT_REVISIONS:
+        try:
+            rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=path,
+                                 capture_output=True, text=True, timeout=5, check=True).stdout.strip()
+            dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=path,
+                                   capture_output=True, text=True, timeout=5, check=True).stdout.strip()
+            _GIT_REVISIONS[path] = rev + ("-dirty" if dirty else "")
+        except (OSError, subprocess.SubprocessError):
+            _GIT_REVISIONS[path] = None
+    return _GIT_REVISIONS[path]
+
+def _samples(metrics: Dict[str, Any], samples_key: str, value_key: str) -> Optional[List[float]]:
+    """Các lần đo của một chỉ số: metrics[samples_key] nếu có, không thì một lần metrics[value_key]."""
+    if metrics.get(samples_key) is not None:
+        return list(metrics[samples_key])
+    value = metrics.get(value_key)
+    return None if value is None else [value]
+
+def record_benchmark(filename: str, algorithm: str, puzzle_name: str, board: Tuple[int, ...],
+                     metrics: Dict[str, float], nodes_generated: int, max_memory_nodes: int,
+                     solved: bool, **extra: Any) -> Dict[str, Any]:
+    """
+    Ghi một lần chạy vào file JSON Lines (mỗi dòng một object, chỉ append nên an toàn khi chạy nhiều lần).
+    metrics: dict từ các hàm đo trong metrics.py (time_sec, cpu_time_sec, peak_memory_mb, mode);
+    chỉ số nào chế độ đo không có thì ghi null. times_sec / cpu_times_sec là từng lần đo (chế độ
+    time / split lặp lại nhiều lần; các chế độ khác chỉ có một lần) để report tính phân vị trên
+    các lần chạy thật thay vì trên median của từng record.
+    extra: các trường tùy chọn khác (vd: propagate=True).
+    Trả về record đã ghi.
+    """
+    record = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "algorithm": algorithm,
+        "puzzle": puzzle_name,
+        "puzzle_hash": puzzle_hash(board),
+        "solved": solved,
+        "nodes_generated": nodes_generated,
+        "max_memory_nodes": max_memory_nodes,
+        "time_sec": metrics.get("time_sec"),
+        "cpu_time_sec": metrics.get("cpu_time_sec"),
+        "peak_memory_mb": metrics.get("peak_memory_mb"),
+        "metrics_mode": metrics.get("mode", "full"),
+        "repeats": metrics.get("repeats", 1),
+        "times_sec": _samples(metrics, "times_sec", "time_sec"),
+        "cpu_times_sec": _samples(metrics, "cpu_times_sec", "cpu_time_sec"),
+        "git_revision": git_revision(os.path.dirname(os.path.abspath(filename))),
+        "machine": machine_info(),
+    }
+    record.update(extra)
+    with open(filename, mode='a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
+def load_benchmark(filename: str) -> Iterator[Dict[str, Any]]:
+    """Đọc từng record của file JSON Lines (bỏ qua dòng trống / dòng hỏng)."""
+    with open(filename, mode='r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
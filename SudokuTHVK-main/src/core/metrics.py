@@ -1,23 +1,233 @@
+import cProfile
+import io
+import os
+import pstats
+import statistics
+import threading
 import time
 import tracemalloc
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, Dict, Optional, Tuple
 
-def measure_performance(func: Callable, *args, **kwargs) -> Tuple[Any, float, float]:
+# Callback progress(stats) được gọi mỗi PROGRESS_INTERVAL node được mở rộng
+# (UI dùng để hiển thị tiến độ). Callback trả về True nghĩa là cần dừng tìm kiếm.
+PROGRESS_INTERVAL = 200
+
+def report_progress(progress: Optional[Callable[[dict], Any]], expanded: int,
+                    nodes_generated: int, frontier_size: int) -> bool:
+    """Gửi số liệu hiện tại cho callback (nếu tới lượt); trả về True nếu cần dừng."""
+    if progress is None or expanded % PROGRESS_INTERVAL != 0:
+        return False
+    return bool(progress({
+        'nodes_generated': nodes_generated,
+        'frontier_size': frontier_size,
+        'explored_states': expanded,
+    }))
+
+# Các chế độ đo (xem measure_run):
+#   full    - một lần chạy dưới tracemalloc, đo cả thời gian lẫn RAM (thời gian bị
+#             overhead của tracemalloc làm chậm đi nhiều lần, chỉ để tương thích)
+#   time    - chỉ đo thời gian, lặp lại nhiều lần có warm-up, không theo dõi bộ nhớ
+#   memory  - chỉ đo RAM đỉnh (tracemalloc, hoặc RSS của process lấy mẫu định kỳ)
+#   split   - time rồi memory trong hai lần chạy riêng (thời gian + RAM đều không bị lệch)
+#   profile - chạy dưới cProfile, trả về bảng các hàm tốn thời gian nhất
+METRIC_MODES = ("full", "time", "memory", "split", "profile")
+
+# Chu kỳ lấy mẫu RSS (giây) ở chế độ memory với method="rss"
+RSS_SAMPLE_INTERVAL = 0.005
+
+def measure_run(func: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
     """
-    Đo lường thời gian thực thi (Runtime) và bộ nhớ (Memory).
-    Trả về: (Kết_quả_của_hàm, Thời_gian_chạy_giây, Dung_lượng_RAM_đỉnh_MB)
+    Chế độ full: chạy func một lần và đo thời gian thực (time_sec), thời gian CPU của
+    process (cpu_time_sec), RAM đỉnh theo tracemalloc (peak_memory_mb).
+    Thời gian đo được bao gồm overhead của tracemalloc; so sánh tốc độ thì dùng time_run.
+    Trả về: (Kết_quả_của_hàm, dict số liệu) - dict dùng trực tiếp cho io_utils.record_benchmark.
     """
     tracemalloc.start()
     start_time = time.perf_counter()
+    start_cpu = time.process_time()
     
     # Thực thi thuật toán tìm kiếm (BFS hoặc A*)
     result = func(*args, **kwargs)
     
+    cpu_time = time.process_time() - start_cpu
     end_time = time.perf_counter()
     _, peak_memory = tracemalloc.get_traced_memory()
     tracemalloc.stop()
     
-    execution_time = end_time - start_time
-    peak_memory_mb = peak_memory / (1024 * 1024) # Chuyển đổi từ Byte sang Megabyte
-    
-    return result, execution_time, peak_memory_mb
\ No newline at end of file
+    return result, {
+        'mode': 'full',
+        'time_sec': end_time - start_time,
+        'cpu_time_sec': cpu_time,
+        'peak_memory_mb': peak_memory / (1024 * 1024),  # Chuyển đổi từ Byte sang Megabyte
+    }
+
+def time_run(func: Callable, *args, repeats: int = 5, warmup: int = 1, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Chế độ time: chỉ dùng perf_counter + process_time, không bật tracemalloc.
+    Chạy `warmup` lần bỏ đi (nạp cache, dựng bảng tra như template của DLX) rồi đo `repeats` lần.
+    time_sec / cpu_time_sec là median; kèm min và toàn bộ các lần đo (times_sec, cpu_times_sec).
+    Trả về kết quả của lần chạy cuối cùng.
+    """
+    for _ in range(warmup):
+        func(*args, **kwargs)
+
+    times = []
+    cpu_times = []
+    result = None
+    for _ in range(max(1, repeats)):
+        start_cpu = time.process_time()
+        start_time = time.perf_counter()
+        result = func(*args, **kwargs)
+        times.append(time.perf_counter() - start_time)
+        cpu_times.append(time.process_time() - start_cpu)
+
+    return result, {
+        'mode': 'time',
+        'time_sec': statistics.median(times),
+        'time_min_sec': min(times),
+        'cpu_time_sec': statistics.median(cpu_times),
+        'repeats': len(times),
+        'warmup': warmup,
+        'times_sec': times,
+        'cpu_times_sec': cpu_times,
+    }
+
+def _current_rss_mb() -> Optional[float]:
+    """RSS hiện tại của process (MB), đọc từ /proc (Linux); None nếu không đọc được."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def memory_run(func: Callable, *args, method: str = "tracemalloc", **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Chế độ memory: chỉ đo RAM đỉnh, không báo thời gian.
+      - method="tracemalloc": đỉnh bộ nhớ do Python cấp phát trong lúc chạy (peak_memory_mb)
+      - method="rss": một thread lấy mẫu RSS của process mỗi RSS_SAMPLE_INTERVAL giây,
+        peak_memory_mb = RSS đỉnh - RSS lúc bắt đầu (gần với RAM thật, overhead thấp)
+    """
+    if method == "tracemalloc":
+        tracemalloc.start()
+        try:
+            result = func(*args, **kwargs)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, {'mode': 'memory', 'method': method, 'peak_memory_mb': peak_memory / (1024 * 1024)}
+
+    if method != "rss":
+        raise ValueError(f"method không hợp lệ: {method}. Chọn 'tracemalloc' hoặc 'rss'")
+    baseline = _current_rss_mb()
+    if baseline is None:
+        raise RuntimeError("Không đọc được RSS của process trên hệ điều hành này (dùng method='tracemalloc')")
+
+    peak = baseline
+    done = threading.Event()
+
+    def sample() -> None:
+        nonlocal peak
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            rss = _current_rss_mb()
+            if rss is not None and rss > peak:
+                peak = rss
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        done.set()
+        sampler.join()
+    peak = max(peak, _current_rss_mb() or peak)
+    return result, {'mode': 'memory', 'method': method, 'peak_memory_mb': peak - baseline,
+                    'rss_baseline_mb': baseline}
+
+def profile_run(func: Callable, *args, sort: str = "cumulative", limit: int = 25,
+                dump_path: Optional[str] = None, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Chế độ profile: chạy func dưới cProfile.
+    Trả về dict có 'report' (bảng `limit` hàm tốn thời gian nhất, sắp theo `sort`)
+    và time_sec (có overhead của profiler, chỉ để tham khảo).
+    dump_path: ghi thêm file .prof (mở bằng pstats / snakeviz).
+    """
+    profiler = cProfile.Profile()
+    start_time = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - start_time
+
+    if dump_path:
+        profiler.dump_stats(dump_path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return result, {'mode': 'profile', 'time_sec': elapsed, 'report': out.getvalue(), 'dump_path': dump_path}
+
+def _first_run_progress(func: Callable, progress: Callable[[dict], Any]) -> Callable:
+    """
+    Bọc func (chạy nhiều lần) để chỉ lần chạy đầu tiên báo số liệu thật cho progress; các lần
+    sau gửi lại số liệu cuối cùng của lần đầu. Tiến độ trên UI không quay về 0 giữa chừng,
+    còn progress vẫn được hỏi định kỳ nên hủy vẫn có hiệu lực ở mọi lần chạy.
+    """
+    runs = 0
+    last: Dict[str, Any] = {}
+
+    def report(stats: dict) -> Any:
+        if runs == 1:
+            last.update(stats)
+        return progress(dict(last))
+
+    def run(*args, **kwargs):
+        nonlocal runs
+        runs += 1
+        return func(*args, progress=report, **kwargs)
+    return run
+
+def measure_split(func: Callable, *args, repeats: int = 1, warmup: int = 0,
+                  memory_method: str = "tracemalloc", progress: Optional[Callable[[dict], Any]] = None,
+                  **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Đo thời gian (time_run) và RAM (memory_run) trong các lần chạy riêng, để thời gian
+    không bị overhead của tracemalloc. Cùng các khóa như measure_run, mode = 'split'.
+    progress (tùy chọn): callback tiến độ của func; chỉ lần chạy đầu tiên báo số liệu, xem
+    _first_run_progress.
+    """
+    if progress is not None:
+        func = _first_run_progress(func, progress)
+    result, metrics = time_run(func, *args, repeats=repeats, warmup=warmup, **kwargs)
+    _, memory = memory_run(func, *args, method=memory_method, **kwargs)
+    metrics['mode'] = 'split'
+    metrics['peak_memory_mb'] = memory['peak_memory_mb']
+    return result, metrics
+
+def run_with_mode(mode: str, func: Callable, *args, repeats: int = 5, warmup: int = 1,
+                  memory_method: str = "tracemalloc", profile_path: Optional[str] = None,
+                  **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """Chọn chế độ đo theo tên (METRIC_MODES); kwargs còn lại được truyền cho func."""
+    if mode == "full":
+        return measure_run(func, *args, **kwargs)
+    if mode == "time":
+        return time_run(func, *args, repeats=repeats, warmup=warmup, **kwargs)
+    if mode == "memory":
+        return memory_run(func, *args, method=memory_method, **kwargs)
+    if mode == "split":
+        return measure_split(func, *args, repeats=repeats, warmup=warmup, memory_method=memory_method, **kwargs)
+    if mode == "profile":
+        # Warm-up để profile không bị chi phối bởi phần khởi tạo một lần (vd: template của DLX)
+        for _ in range(warmup):
+            func(*args, **kwargs)
+        return profile_run(func, *args, dump_path=profile_path, **kwargs)
+    raise ValueError(f"Chế độ đo không hợp lệ: {mode}. Chọn một trong {METRIC_MODES}")
+
+def measure_performance(func: Callable, *args, **kwargs) -> Tuple[Any, float, float]:
+    """
+    Đo lường thời gian thực thi (Runtime) và bộ nhớ (Memory).
+    Trả về: (Kết_quả_của_hàm, Thời_gian_chạy_giây, Dung_lượng_RAM_đỉnh_MB)
+    (Giữ nguyên để tương thích: chế độ full, thời gian có overhead của tracemalloc.)
+    """
+    result, metrics = measure_run(func, *args, **kwargs)
+    return result, metrics['time_sec'], metrics['peak_memory_mb']
@@ -0,0 +1,105 @@
+import statistics
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .io_utils import load_benchmark
+
+# Các chỉ số được tổng hợp median / p95 qua các lần chạy lặp lại, kèm khóa chứa từng lần đo
+# của record (None: mỗi record là một lần đo). Record cũ không có khóa đó thì dùng giá trị của record.
+TIMED_FIELDS = ("time_sec", "cpu_time_sec", "peak_memory_mb")
+SAMPLE_FIELDS = {"time_sec": "times_sec", "cpu_time_sec": "cpu_times_sec", "peak_memory_mb": None}
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Phân vị p (0-100), nội suy tuyến tính giữa hai giá trị gần nhất."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def samples(record: Dict[str, Any], field: str) -> List[float]:
+    """Các lần đo của `field` trong một record (rỗng nếu chế độ đo không có chỉ số này)."""
+    key = SAMPLE_FIELDS.get(field)
+    if key is not None and record.get(key):
+        return list(record[key])
+    return [record[field]] if record.get(field) is not None else []
+
+
+def aggregate(records: Iterable[Dict[str, Any]], by_revision: bool = False,
+              revision: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Gom các lần chạy theo (thuật toán, puzzle_hash, chế độ đo[, git_revision]) và tính median / p95
+    trên toàn bộ các lần đo (times_sec của mọi record trong nhóm), không phải trên median của record.
+    Tách theo chế độ đo vì thời gian ở chế độ full có overhead của tracemalloc.
+    revision: chỉ lấy các lần chạy của commit này (None = tất cả).
+    Trả về danh sách dòng đã sắp xếp theo puzzle rồi thuật toán.
+    """
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for record in records:
+        if revision is not None and record.get("git_revision") != revision:
+            continue
+        key = (record.get("puzzle_hash"), record.get("algorithm"), record.get("metrics_mode", "full"))
+        if by_revision:
+            key += (record.get("git_revision"),)
+        groups.setdefault(key, []).append(record)
+
+    rows = []
+    for key, runs in groups.items():
+        row: Dict[str, Any] = {
+            "puzzle": runs[0].get("puzzle"),
+            "puzzle_hash": key[0],
+            "algorithm": key[1],
+            "metrics_mode": key[2],
+            "git_revision": key[3] if by_revision else None,
+            "runs": len(runs),
+            "samples": sum(len(samples(r, "time_sec")) for r in runs),
+            "solved": sum(1 for r in runs if r.get("solved")),
+            "nodes_generated": statistics.median(r.get("nodes_generated", 0) for r in runs),
+            "max_memory_nodes": statistics.median(r.get("max_memory_nodes", 0) for r in runs),
+        }
+        for field in TIMED_FIELDS:
+            values = [value for r in runs for value in samples(r, field)]
+            row[field + "_median"] = statistics.median(values) if values else None
+            row[field + "_p95"] = percentile(values, 95) if values else None
+        rows.append(row)
+    rows.sort(key=lambda row: (row["puzzle"] or "", row["algorithm"] or "", row["metrics_mode"],
+                               row["git_revision"] or ""))
+    return rows
+
+
+def _fmt(value: Optional[float], digits: int = 5) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def render_markdown(rows: List[Dict[str, Any]], title: str = "Sudoku Benchmark Report") -> str:
+    """Bảng Markdown từ kết quả của aggregate."""
+    by_revision = any(row["git_revision"] for row in rows)
+    header = ["Algorithm", "Puzzle", "Hash", "Mode"]
+    if by_revision:
+        header.append("Revision")
+    header += ["Runs", "Samples", "Solved", "Nodes", "Max mem nodes", "Time median (s)", "Time p95 (s)",
+               "CPU median (s)", "CPU p95 (s)", "Peak MB median", "Peak MB p95"]
+    lines = [f"## {title}", "", "| " + " | ".join(header) + " |",
+             "|" + "|".join(":---" if i < len(header) - 11 else "---:" for i in range(len(header))) + "|"]
+    for row in rows:
+        cells = [row["algorithm"], row["puzzle"], row["puzzle_hash"], row["metrics_mode"]]
+        if by_revision:
+            cells.append(row["git_revision"] or "-")
+        cells += [str(row["runs"]), str(row["samples"]), str(row["solved"]), f"{row['nodes_generated']:g}", f"{row['max_memory_nodes']:g}",
+                  _fmt(row["time_sec_median"]), _fmt(row["time_sec_p95"]),
+                  _fmt(row["cpu_time_sec_median"]), _fmt(row["cpu_time_sec_p95"]),
+                  _fmt(row["peak_memory_mb_median"], 3), _fmt(row["peak_memory_mb_p95"], 3)]
+        lines.append("| " + " | ".join(str(c) for c in cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(input_path: str, output_path: str, by_revision: bool = False,
+                 revision: Optional[str] = None) -> int:
+    """Đọc file JSON Lines, ghi báo cáo Markdown. Trả về số dòng của bảng."""
+    rows = aggregate(load_benchmark(input_path), by_revision=by_revision, revision=revision)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(rows))
+    return len(rows)
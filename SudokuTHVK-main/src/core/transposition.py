@@ -0,0 +1,4 @@
+# TranspositionTable dùng chung với 7x7-pipes-wrap-main, xem search_common/transposition.py ở thư mục gốc repo
+from search_common.transposition import REPLACEMENT_POLICIES, TT_ENTRY_BYTES, TranspositionTable
+
+__all__ = ["REPLACEMENT_POLICIES", "TT_ENTRY_BYTES", "TranspositionTable"]
@@ -5,6 +5,33 @@ BOX_SIZE = 3
 EMPTY = 0
 DIGITS = list(range(1,10))
 
+# ---------------------------------------------------------------------------
+# Bitboard: mỗi hàng/cột/khối được lưu bằng một mask 9 bit, bit (d-1) bật
+# nghĩa là chữ số d đã xuất hiện trong đơn vị đó. 27 mask được gom vào một
+# tuple `masks`: [0..8] là hàng, [9..17] là cột, [18..26] là khối 3x3.
+# ---------------------------------------------------------------------------
+ALL_DIGITS_MASK = (1 << BOARD_SIZE) - 1
+
+# UNITS_OF_CELL[idx] = (chỉ số mask hàng, cột, khối) của ô idx
+UNITS_OF_CELL: Tuple[Tuple[int, int, int], ...] = tuple(
+    (idx // BOARD_SIZE,
+     BOARD_SIZE + idx % BOARD_SIZE,
+     2 * BOARD_SIZE + (idx // BOARD_SIZE // BOX_SIZE) * BOX_SIZE + (idx % BOARD_SIZE) // BOX_SIZE)
+    for idx in range(BOARD_SIZE * BOARD_SIZE)
+)
+
+# UNIT_CELLS[u] = các ô thuộc đơn vị u (cùng thứ tự chỉ số với `masks`)
+UNIT_CELLS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(idx for idx in range(BOARD_SIZE * BOARD_SIZE) if u in UNITS_OF_CELL[idx])
+    for u in range(3 * BOARD_SIZE)
+)
+
+# Tra bảng thay cho đếm bit / tách bit (mask chỉ có 512 giá trị)
+POPCOUNT: Tuple[int, ...] = tuple(bin(m).count("1") for m in range(ALL_DIGITS_MASK + 1))
+MASK_DIGITS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(d for d in DIGITS if (m >> (d - 1)) & 1) for m in range(ALL_DIGITS_MASK + 1)
+)
+
 def idx_to_rc(idx: int) -> Tuple[int, int]:
     row = idx // BOARD_SIZE
     col = idx % BOARD_SIZE
@@ -44,6 +71,36 @@ def box_values(board: Tuple[int, ...], row: int, col: int) -> Set[int]:
                 values.add(v)
     return values
 
+def digit_bit(val: int) -> int:
+    return 1 << (val - 1)
+
+def compute_unit_masks(board: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Tính 27 mask hàng/cột/khối của bảng (chỉ gọi một lần cho state gốc)."""
+    masks = [0] * (3 * BOARD_SIZE)
+    for idx, v in enumerate(board):
+        if v != EMPTY:
+            bit = 1 << (v - 1)
+            r, c, b = UNITS_OF_CELL[idx]
+            masks[r] |= bit
+            masks[c] |= bit
+            masks[b] |= bit
+    return tuple(masks)
+
+def assign_unit_masks(masks: Tuple[int, ...], idx: int, val: int) -> Tuple[int, ...]:
+    """Trả về bộ mask mới sau khi điền `val` vào ô `idx` (chỉ đổi 3 phần tử)."""
+    bit = 1 << (val - 1)
+    r, c, b = UNITS_OF_CELL[idx]
+    new_masks = list(masks)
+    new_masks[r] |= bit
+    new_masks[c] |= bit
+    new_masks[b] |= bit
+    return tuple(new_masks)
+
+def candidate_mask(masks: Tuple[int, ...], idx: int) -> int:
+    """Mask 9 bit các chữ số còn điền được vào ô idx (ô phải đang trống)."""
+    r, c, b = UNITS_OF_CELL[idx]
+    return ~(masks[r] | masks[c] | masks[b]) & ALL_DIGITS_MASK
+
 def is_valid_assignment(board: Tuple[int, ...], idx: int, val: int) -> bool:
     if val not in DIGITS:
         return False
@@ -68,15 +125,12 @@ def is_valid_assignment(board: Tuple[int, ...], idx: int, val: int) -> bool:
                 return False
     return True
 
-def get_candidates(board: Tuple[int, ...], idx: int) -> List[int]:
+def get_candidates(board: Tuple[int, ...], idx: int, masks: Optional[Tuple[int, ...]] = None) -> List[int]:
     if board[idx] != EMPTY:
         return []
-    row, col = idx_to_rc(idx)
-    used = set()
-    used |= row_values(board, row)
-    used |= col_values(board, col)
-    used |= box_values(board, row, col)
-    return [d for d in DIGITS if d not in used]
+    if masks is None:
+        masks = compute_unit_masks(board)
+    return list(MASK_DIGITS[candidate_mask(masks, idx)])
 
 def find_empty_cells(board: Tuple[int, ...]) -> List[int]:
     empties: List[int] = []
@@ -85,20 +139,23 @@ def find_empty_cells(board: Tuple[int, ...]) -> List[int]:
             empties.append(i)
     return empties
 
-def select_unassigned_cell_mrv(board: Tuple[int, ...]) -> Optional[int]:
+def select_unassigned_cell_mrv(board: Tuple[int, ...], masks: Optional[Tuple[int, ...]] = None) -> Optional[int]:
     empties = find_empty_cells(board)
     if not empties:
         return None
+    if masks is None:
+        masks = compute_unit_masks(board)
     best_idx: Optional[int] = None
     best_count = 10
     
     for idx in empties:
-        cand = get_candidates(board, idx)
-        cnt = len(cand)
+        r, c, b = UNITS_OF_CELL[idx]
+        cnt = POPCOUNT[~(masks[r] | masks[c] | masks[b]) & ALL_DIGITS_MASK]
         if cnt < best_count:
             best_count = cnt
             best_idx = idx
-            if best_count == 1:
+            # Không thể tốt hơn 1 ứng viên (0 ứng viên = nhánh chết, cũng dừng được)
+            if best_count <= 1:
                 break
     return best_idx
 
@@ -108,4 +165,76 @@ def is_board_consistent(board: Tuple[int, ...]) -> bool:
             continue
         if not is_valid_assignment(board, idx, v):
             return False
-    return True
\ No newline at end of file
+    return True
+
+def propagate_singles(board: Tuple[int, ...], masks: Tuple[int, ...],
+                      hidden: bool = True) -> Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    Lan truyền ràng buộc: lặp lại việc điền
+      - naked single: ô trống chỉ còn đúng 1 ứng viên
+      - hidden single: chữ số chỉ còn đúng 1 chỗ đặt được trong một hàng/cột/khối
+        (bỏ qua nếu hidden=False, dùng để chấm độ khó)
+    cho tới khi bảng không đổi nữa.
+    Trả về (board, masks) mới, hoặc None nếu phát hiện mâu thuẫn
+    (ô không còn ứng viên, hoặc chữ số không còn chỗ đặt trong một đơn vị).
+    """
+    cells = list(board)
+    unit_masks = list(masks)
+
+    def place(idx: int, val: int) -> None:
+        bit = 1 << (val - 1)
+        cells[idx] = val
+        for u in UNITS_OF_CELL[idx]:
+            unit_masks[u] |= bit
+
+    changed = True
+    while changed:
+        changed = False
+
+        # 1. Naked singles
+        for idx in range(BOARD_SIZE * BOARD_SIZE):
+            if cells[idx] != EMPTY:
+                continue
+            r, c, b = UNITS_OF_CELL[idx]
+            cand = ~(unit_masks[r] | unit_masks[c] | unit_masks[b]) & ALL_DIGITS_MASK
+            if not cand:
+                return None
+            if not cand & (cand - 1):
+                place(idx, cand.bit_length())
+                changed = True
+
+        if not hidden:
+            continue
+
+        # 2. Hidden singles
+        for u, unit in enumerate(UNIT_CELLS):
+            missing = ALL_DIGITS_MASK & ~unit_masks[u]
+            if not missing:
+                continue
+            seen_once = 0
+            seen_twice = 0
+            for idx in unit:
+                if cells[idx] == EMPTY:
+                    r, c, b = UNITS_OF_CELL[idx]
+                    cand = ~(unit_masks[r] | unit_masks[c] | unit_masks[b]) & ALL_DIGITS_MASK
+                    seen_twice |= seen_once & cand
+                    seen_once |= cand
+            if missing & ~seen_once:
+                return None
+            singles = seen_once & ~seen_twice & missing
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for idx in unit:
+                    if cells[idx] != EMPTY:
+                        continue
+                    r, c, b = UNITS_OF_CELL[idx]
+                    if ~(unit_masks[r] | unit_masks[c] | unit_masks[b]) & bit:
+                        place(idx, bit.bit_length())
+                        changed = True
+                        break
+                else:
+                    # Chỗ duy nhất vừa bị một hidden single khác chiếm mất
+                    return None
+
+    return tuple(cells), tuple(unit_masks)
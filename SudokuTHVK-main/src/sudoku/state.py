@@ -1,33 +1,52 @@
 from typing import List, Tuple, Callable, Optional
-from .rules import get_candidates, find_empty_cells, EMPTY, select_unassigned_cell_mrv
+from .rules import (
+    EMPTY, MASK_DIGITS, assign_unit_masks, candidate_mask, compute_unit_masks,
+    propagate_singles, select_unassigned_cell_mrv,
+)
 
-def select_first_unassigned_cell(board: Tuple[int, ...]) -> Optional[int]:
+def select_first_unassigned_cell(board: Tuple[int, ...], masks: Optional[Tuple[int, ...]] = None) -> Optional[int]:
     """
     Dành cho Blind Search (BFS): Chọn ô trống đầu tiên từ trái sang phải, trên xuống dưới.
     Không dùng bất kỳ heuristic nào.
     """
-    empties = find_empty_cells(board)
-    return empties[0] if empties else None
+    return board.index(EMPTY) if EMPTY in board else None
 
 
 class SudokuState:
-    def __init__(self, board: Tuple[int, ...]):
+    def __init__(self, board: Tuple[int, ...], masks: Optional[Tuple[int, ...]] = None):
         """
         Khởi tạo trạng thái Sudoku.
         board: Một tuple gồm 81 số nguyên (0 biểu diễn ô trống).
         Sử dụng tuple giúp State trở thành bất biến (immutable) và dễ dàng băm (hash).
+        masks: 27 mask 9 bit của hàng/cột/khối (xem rules.py). State con nhận mask
+        đã cập nhật từ cha nên chỉ state gốc phải tính lại từ đầu.
         """
         self.board = board
+        self.masks = masks if masks is not None else compute_unit_masks(board)
 
     def is_goal(self) -> bool:
         """
         Kiểm tra xem trạng thái hiện tại đã là đích chưa.
-        Do hàm sinh successors luôn đảm bảo luật Sudoku (thông qua get_candidates),
+        Do hàm sinh successors luôn đảm bảo luật Sudoku (thông qua mask ứng viên candidate_mask),
         nên trạng thái đích đơn giản là trạng thái không còn ô trống nào.
         """
         return EMPTY not in self.board
 
-    def get_successors(self, select_cell_fn: Callable[[Tuple[int, ...]], Optional[int]] = select_first_unassigned_cell) -> List['SudokuState']:
+    def propagate(self) -> Optional['SudokuState']:
+        """
+        Trả về state đã lan truyền tối đa (naked + hidden singles),
+        hoặc None nếu state này chắc chắn không dẫn tới lời giải.
+        """
+        result = propagate_singles(self.board, self.masks)
+        if result is None:
+            return None
+        board, masks = result
+        if board == self.board:
+            return self
+        return SudokuState(board, masks)
+
+    def get_successors(self, select_cell_fn: Callable[..., Optional[int]] = select_first_unassigned_cell,
+                       propagate: bool = False) -> List['SudokuState']:
         """
         Sinh ra các trạng thái con hợp lệ từ trạng thái hiện tại.
         
@@ -35,18 +54,21 @@ class SudokuState:
             - select_cell_fn: Hàm quyết định xem sẽ chọn ô trống nào để điền tiếp theo.
               + Truền `select_first_unassigned_cell` khi chạy BFS.
               + Truyền `select_unassigned_cell_mrv` khi chạy A* để thu hẹp cây tìm kiếm.
+              Hàm được gọi với (board, masks) để tra ứng viên bằng phép toán bit.
+            - propagate: Nếu True, mỗi state con được lan truyền ràng buộc ngay
+              (xem `propagate`); state con mâu thuẫn bị loại luôn.
         """
         successors: List['SudokuState'] = []
 
         # 1. Chọn ô trống cần điền dựa theo chiến lược truyền vào
-        idx = select_cell_fn(self.board)
+        idx = select_cell_fn(self.board, self.masks)
 
         # Nếu không còn ô trống nào, trạng thái không thể mở rộng thêm
         if idx is None:
             return successors
 
         # 2. Lấy các giá trị hợp lệ có thể điền vào ô `idx` này
-        candidates = get_candidates(self.board, idx)
+        candidates = MASK_DIGITS[candidate_mask(self.masks, idx)]
 
         # 3. Tạo các trạng thái con (child states) cho mỗi ứng viên hợp lệ
         for val in candidates:
@@ -56,8 +78,13 @@ class SudokuState:
             # Chuyển lại thành tuple để giữ tính bất biến
             new_board = tuple(new_board_list)
             
-            # Thêm trạng thái con mới vào danh sách
-            successors.append(SudokuState(new_board))
+            # Thêm trạng thái con mới vào danh sách (mask chỉ cập nhật 3 phần tử)
+            child = SudokuState(new_board, assign_unit_masks(self.masks, idx, val))
+            if propagate:
+                child = child.propagate()
+                if child is None:
+                    continue
+            successors.append(child)
 
         return successors
 
@@ -0,0 +1,343 @@
+"""
+Test hồi quy cho lõi giải Sudoku: DLX / đếm lời giải trên các đề trong input/,
+phát hiện mâu thuẫn của propagate_singles, hủy qua progress (DLX, BFS lan truyền),
+ứng viên tính bằng mask bit, chế độ batch (pool process) cho kết quả như giải tuần tự,
+puzzle sinh ra có lời giải duy nhất và đúng mức độ khó, median / p95 của báo cáo benchmark, số liệu của từng chế độ đo.
+
+Chạy: python -m pytest -q (từ thư mục gốc repo hoặc SudokuTHVK-main)
+"""
+
+import csv
+import glob
+import json
+import os
+
+import pytest
+
+from src.core.batch import run_batch, solve_one
+from src.core.budget import Budget
+from src.core.blind import bfs
+from src.core.dlx import count_solutions, dlx
+from src.core.generator import GRADES, HARD_NODE_LIMIT, generate_puzzles, grade_puzzle, run_generate
+from src.core.heuristic import a_star
+from src.core.metrics import METRIC_MODES, PROGRESS_INTERVAL, run_with_mode
+from src.core.report import aggregate, percentile, render_markdown, write_report
+from src.core.transposition import TranspositionTable
+from src.sudoku.parser import load_puzzle, parse_puzzle
+from src.sudoku.rules import (
+    DIGITS, EMPTY, assign_unit_masks, box_values, col_values, compute_unit_masks, get_candidates, idx_to_rc,
+    is_board_consistent, propagate_singles, row_values,
+)
+from src.sudoku.state import SudokuState
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input")
+PUZZLE_FILES = sorted(glob.glob(os.path.join(INPUT_DIR, "*.txt")))
+
+# Hàng 1 thiếu đúng số 9 nhưng cột cuối đã có 9 ở hàng 2: ô (0, 8) không còn ứng viên
+CONTRADICTION = (
+    "12345678."
+    "........9"
+    + "." * 63
+)
+
+
+def _solve(path):
+    board = load_puzzle(path)
+    goal, nodes_generated, max_memory_nodes = dlx(SudokuState(board))
+    return board, goal, nodes_generated, max_memory_nodes
+
+
+@pytest.mark.parametrize("path", PUZZLE_FILES, ids=os.path.basename)
+def test_dlx_solves_input(path):
+    """Lời giải DLX phải đầy đủ, hợp lệ và giữ nguyên các ô đề cho."""
+    board, goal, nodes_generated, max_memory_nodes = _solve(path)
+    assert goal is not None
+    solved = goal.state.board
+    assert EMPTY not in solved
+    assert is_board_consistent(solved)
+    assert all(given == EMPTY or given == value for given, value in zip(board, solved))
+    assert nodes_generated >= 1 and max_memory_nodes >= 1
+
+
+@pytest.mark.parametrize("path", PUZZLE_FILES, ids=os.path.basename)
+def test_dlx_path_fills_one_cell_per_step(path):
+    """Chuỗi parent của Goal_Node điền đúng một ô mỗi bước, như BFS / A*."""
+    board, goal, _, _ = _solve(path)
+    states = []
+    node = goal
+    while node is not None:
+        states.append(node.state.board)
+        node = node.parent
+    states.reverse()
+    assert states[0] == board
+    assert len(states) - 1 == board.count(EMPTY)
+    for before, after in zip(states, states[1:]):
+        assert sum(1 for a, b in zip(before, after) if a != b) == 1
+
+
+@pytest.mark.parametrize("path", PUZZLE_FILES, ids=os.path.basename)
+def test_count_solutions_unique(path):
+    """Các đề trong input/ đều có đúng một lời giải."""
+    assert count_solutions(SudokuState(load_puzzle(path)), limit=2) == 1
+
+
+def test_count_solutions_multiple_and_none():
+    """Bảng trống có nhiều lời giải (dừng ở limit); bảng mâu thuẫn có 0 lời giải."""
+    empty = SudokuState(tuple([EMPTY] * 81))
+    assert count_solutions(empty, limit=3) == 3
+    assert count_solutions(SudokuState(parse_puzzle(CONTRADICTION)), limit=2) == 0
+
+
+def test_propagate_singles_detects_contradiction():
+    """Ô không còn ứng viên -> None, cả khi tắt hidden singles."""
+    board = parse_puzzle(CONTRADICTION)
+    masks = compute_unit_masks(board)
+    assert propagate_singles(board, masks) is None
+    assert propagate_singles(board, masks, hidden=False) is None
+    assert SudokuState(board).propagate() is None
+
+
+def test_propagate_singles_detects_hidden_contradiction():
+    """Chữ số không còn chỗ đặt trong một đơn vị -> None dù ô nào cũng còn ứng viên."""
+    # Hàng 1 có sẵn 7 8 9, sáu ô còn lại đều bị chặn số 1 (khối trái bởi ô (1, 0),
+    # khối giữa bởi ô (2, 3)) nhưng vẫn còn ứng viên 2..6: chỉ hidden single phát hiện được
+    cells = [EMPTY] * 81
+    cells[6], cells[7], cells[8] = 7, 8, 9
+    cells[1 * 9 + 0] = 1
+    cells[2 * 9 + 3] = 1
+    board = tuple(cells)
+    masks = compute_unit_masks(board)
+    assert is_board_consistent(board)
+    assert propagate_singles(board, masks) is None
+    assert propagate_singles(board, masks, hidden=False) is not None
+    assert count_solutions(SudokuState(board), limit=1) == 0
+
+
+def test_propagate_singles_solves_easy_input():
+    """Trên đề dễ, lan truyền không báo mâu thuẫn và mọi ô điền thêm đều hợp lệ."""
+    board = load_puzzle(os.path.join(INPUT_DIR, "easy.txt"))
+    result = propagate_singles(board, compute_unit_masks(board))
+    assert result is not None
+    filled, masks = result
+    assert is_board_consistent(filled)
+    assert masks == compute_unit_masks(filled)
+    assert all(given == EMPTY or given == value for given, value in zip(board, filled))
+
+
+# Đề DLX cần ~1800 node; đề còn lại BFS có lan truyền cần ~226000 node
+DLX_HARD = "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4.."
+PROPAGATE_HARD = ".....6....59.....82....8....45........3........6..3.54...325..6.................."
+
+
+@pytest.mark.parametrize("search,puzzle,kwargs", [
+    (dlx, DLX_HARD, {}),
+    (bfs, PROPAGATE_HARD, {"propagate": True}),
+], ids=["dlx", "bfs-propagate"])
+def test_progress_cancel_stops_search(search, puzzle, kwargs):
+    """progress trả về True ở lần gọi đầu -> dừng ngay, không có lời giải."""
+    state = SudokuState(parse_puzzle(puzzle))
+    reports = []
+    goal, nodes_generated, _ = search(state, progress=lambda stats: reports.append(stats) or True, **kwargs)
+    assert goal is None
+    assert len(reports) == 1
+    assert nodes_generated <= 4 * PROGRESS_INTERVAL
+
+
+def test_progress_with_full_table():
+    """Khi table đầy, len(explored) đứng yên nhưng progress vẫn được gọi theo số node mở rộng."""
+    state = SudokuState(parse_puzzle(PROPAGATE_HARD))
+    reports = []
+    budget = Budget(max_nodes=50 * PROGRESS_INTERVAL)
+    bfs(state, propagate=True, progress=lambda stats: reports.append(stats) or False, budget=budget,
+        table=TranspositionTable(max_entries=50))
+    assert budget.reason == "node_limit"
+    assert len(reports) >= 5
+    assert [stats["explored_states"] for stats in reports] == [
+        PROGRESS_INTERVAL * (i + 1) for i in range(len(reports))]
+
+
+def _set_candidates(board, idx):
+    """Ứng viên tính theo cách cũ: các chữ số chưa có trong tập giá trị của hàng / cột / khối."""
+    row, col = idx_to_rc(idx)
+    used = row_values(board, row) | col_values(board, col) | box_values(board, row, col)
+    return [d for d in DIGITS if d not in used]
+
+
+@pytest.mark.parametrize("path", PUZZLE_FILES, ids=os.path.basename)
+def test_mask_candidates_match_set_candidates(path):
+    """
+    Dọc theo lời giải DLX (bảng ngày càng đầy): ứng viên từ mask khớp với ứng viên tính bằng set
+    ở mọi ô trống, và mask cập nhật tăng dần khớp với mask tính lại từ đầu.
+    """
+    _, goal, _, _ = _solve(path)
+    nodes = []
+    node = goal
+    while node is not None:
+        nodes.append(node)
+        node = node.parent
+    nodes.reverse()
+
+    masks = nodes[0].state.masks
+    for before, after in zip(nodes, nodes[1:]):
+        board = before.state.board
+        assert masks == compute_unit_masks(board)
+        for idx in range(len(board)):
+            if board[idx] == EMPTY:
+                assert get_candidates(board, idx, masks) == _set_candidates(board, idx)
+                assert get_candidates(board, idx) == _set_candidates(board, idx)
+        idx = next(i for i, (a, b) in enumerate(zip(board, after.state.board)) if a != b)
+        masks = assign_unit_masks(masks, idx, after.state.board[idx])
+    assert masks == compute_unit_masks(goal.state.board)
+
+
+@pytest.mark.parametrize("algo,propagate", [("dlx", False), ("astar", True)])
+def test_batch_matches_serial(tmp_path, algo, propagate):
+    """run_batch (2 process) ghi đúng thứ tự input, cùng lời giải và số node như solve_one tuần tự."""
+    lines = ["# dòng chú thích bị bỏ qua", ""]
+    for path in PUZZLE_FILES:
+        lines.append("".join(str(v) if v != EMPTY else "." for v in load_puzzle(path)))
+    lines.append("12345")    # puzzle lỗi: ghi cột error, không làm hỏng cả lô
+    input_path = tmp_path / "puzzles.txt"
+    input_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    output_path = tmp_path / "results.csv"
+
+    summary = run_batch(str(input_path), str(output_path), algo=algo, workers=2, propagate=propagate, chunksize=1)
+    with open(output_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    assert summary["puzzles"] == len(PUZZLE_FILES) + 1 == len(rows)
+    assert summary["solved"] == len(PUZZLE_FILES)
+    assert summary["errors"] == 1
+    for row in rows:
+        expected = solve_one((int(row["index"]), row["puzzle"], algo, propagate, None, None))
+        for field in ("index", "puzzle", "solved", "solution", "nodes_generated", "max_memory_nodes", "error"):
+            assert row[field] == str(expected[field]), field
+
+
+def _assert_grade(board, grade):
+    """Mức độ khó đúng với định nghĩa trong generator.py (kỹ thuật cần dùng / số node A*)."""
+    naked = propagate_singles(board, compute_unit_masks(board), hidden=False)
+    full = propagate_singles(board, compute_unit_masks(board))
+    naked_solves = naked is not None and EMPTY not in naked[0]
+    full_solves = full is not None and EMPTY not in full[0]
+    assert naked_solves == (grade == "easy")
+    assert full_solves == (grade in ("easy", "medium"))
+    if grade in ("hard", "expert"):
+        _, nodes_generated, _ = a_star(SudokuState(board), propagate=True)
+        assert (nodes_generated <= HARD_NODE_LIMIT) == (grade == "hard")
+
+
+def test_generated_puzzles_unique_and_graded():
+    """Puzzle sinh ra: có đúng một lời giải, tái lập theo seed, mức độ khó đúng định nghĩa."""
+    results = generate_puzzles(8, seed=0)
+    again = generate_puzzles(8, seed=0)
+    assert [(r["puzzle"], r["grade"]) for r in results] == [(r["puzzle"], r["grade"]) for r in again]
+    assert len({r["grade"] for r in results}) >= 2
+    for row in results:
+        board = parse_puzzle(row["puzzle"])
+        assert count_solutions(SudokuState(board), limit=2) == 1
+        assert row["clues"] == 81 - board.count(EMPTY)
+        assert grade_puzzle(board) == (row["grade"], row["nodes_generated"])
+        _assert_grade(board, row["grade"])
+
+
+def test_run_generate_files_by_grade(tmp_path):
+    """run_generate (pool process) ghi mỗi puzzle vào đúng file <grade>.txt của nó."""
+    summary = run_generate(6, str(tmp_path), workers=2, seed=100, chunksize=1)
+    assert summary["puzzles"] == 6 == sum(summary["grades"].values())
+    for grade in GRADES:
+        lines = (tmp_path / f"{grade}.txt").read_text(encoding="utf-8").split()
+        assert len(lines) == summary["grades"][grade]
+        for line in lines:
+            board = parse_puzzle(line)
+            assert count_solutions(SudokuState(board), limit=2) == 1
+            _assert_grade(board, grade)
+
+
+def test_percentile_known_samples():
+    """Nội suy tuyến tính: 1..20 có p95 = 19.05, p50 = 10.5 (bằng median); không phụ thuộc thứ tự."""
+    values = list(range(20, 0, -1))
+    assert percentile(values, 95) == pytest.approx(19.05)
+    assert percentile(values, 50) == pytest.approx(10.5)
+    assert percentile(values, 0) == 1 and percentile(values, 100) == 20
+    assert percentile([7.0], 95) == 7.0
+
+
+def test_aggregate_over_raw_samples(tmp_path):
+    """Median / p95 tính trên mọi lần đo của nhóm (times_sec), không phải trên median của từng record."""
+    base = {"puzzle": "hard.txt", "puzzle_hash": "abc", "algorithm": "A*", "metrics_mode": "time", "solved": True,
+            "nodes_generated": 100, "max_memory_nodes": 50}
+    records = [
+        dict(base, time_sec=2.0, times_sec=[1.0, 2.0, 3.0], cpu_time_sec=2.0, cpu_times_sec=[1.0, 2.0, 3.0]),
+        dict(base, time_sec=4.5, times_sec=[4.0, 5.0], cpu_time_sec=4.5, cpu_times_sec=[4.0, 5.0]),
+        # Record cũ chỉ có time_sec: tính là một lần đo
+        dict(base, time_sec=10.0, cpu_time_sec=10.0),
+        # Khác chế độ đo -> nhóm riêng
+        dict(base, metrics_mode="memory", peak_memory_mb=3.0),
+    ]
+    rows = aggregate(records)
+    assert [row["metrics_mode"] for row in rows] == ["memory", "time"]
+    memory, timed = rows
+    assert timed["runs"] == 3 and timed["samples"] == 6 and timed["solved"] == 3
+    assert timed["time_sec_median"] == pytest.approx(3.5)
+    assert timed["time_sec_p95"] == pytest.approx(percentile([1, 2, 3, 4, 5, 10], 95)) == pytest.approx(8.75)
+    assert timed["cpu_time_sec_median"] == pytest.approx(3.5)
+    assert timed["peak_memory_mb_median"] is None
+    assert memory["peak_memory_mb_median"] == 3.0 and memory["time_sec_median"] is None
+
+    path = tmp_path / "benchmark.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    assert write_report(str(path), str(tmp_path / "report.md")) == 2
+    assert (tmp_path / "report.md").read_text(encoding="utf-8") == render_markdown(rows)
+    assert "| 3.50000 | 8.75000 |" in render_markdown(rows)
+
+
+# Các khóa mà từng chế độ đo trả về (xem docstring trong metrics.py)
+MODE_FIELDS = {
+    "full": {"mode", "time_sec", "cpu_time_sec", "peak_memory_mb"},
+    "time": {"mode", "time_sec", "time_min_sec", "cpu_time_sec", "repeats", "warmup", "times_sec", "cpu_times_sec"},
+    "memory": {"mode", "method", "peak_memory_mb"},
+    "split": {"mode", "time_sec", "time_min_sec", "cpu_time_sec", "repeats", "warmup", "times_sec", "cpu_times_sec",
+              "peak_memory_mb"},
+    "profile": {"mode", "time_sec", "report", "dump_path"},
+}
+
+
+@pytest.mark.parametrize("mode", METRIC_MODES)
+def test_metrics_mode_fields(mode, tmp_path):
+    """Mỗi chế độ trả về đúng các khóa đã ghi, kết quả của hàm, và chạy hàm đúng số lần (warm-up + lặp)."""
+    state = SudokuState(load_puzzle(os.path.join(INPUT_DIR, "hard.txt")))
+    calls = []
+
+    def solve(initial_state):
+        calls.append(1)
+        return dlx(initial_state)
+
+    profile_path = str(tmp_path / "run.prof")
+    result, metrics = run_with_mode(mode, solve, state, repeats=3, warmup=1, profile_path=profile_path)
+    assert set(metrics) == MODE_FIELDS[mode]
+    assert metrics["mode"] == mode
+    assert result[0] is not None and result[0].state.is_goal()
+    assert len(calls) == {"full": 1, "time": 4, "memory": 1, "split": 5, "profile": 2}[mode]
+    if "times_sec" in metrics:
+        assert metrics["repeats"] == len(metrics["times_sec"]) == len(metrics["cpu_times_sec"]) == 3
+        assert metrics["time_min_sec"] == min(metrics["times_sec"]) <= metrics["time_sec"]
+    if "peak_memory_mb" in metrics:
+        assert metrics["peak_memory_mb"] > 0
+    if mode == "profile":
+        assert "dlx" in metrics["report"]
+        assert os.path.isfile(profile_path)
+
+
+def test_metrics_memory_rss_and_invalid_mode():
+    """memory với method='rss' báo thêm RSS nền; tên chế độ / method sai -> ValueError."""
+    state = SudokuState(load_puzzle(os.path.join(INPUT_DIR, "easy.txt")))
+    if not os.path.exists("/proc/self/statm"):
+        pytest.skip("RSS chỉ đọc được trên Linux")
+    _, metrics = run_with_mode("memory", dlx, state, memory_method="rss")
+    assert set(metrics) == {"mode", "method", "peak_memory_mb", "rss_baseline_mb"}
+    assert metrics["method"] == "rss" and metrics["peak_memory_mb"] >= 0
+    with pytest.raises(ValueError):
+        run_with_mode("fast", dlx, state)
+    with pytest.raises(ValueError):
+        run_with_mode("memory", dlx, state, memory_method="psutil")
@@ -0,0 +1,9 @@
+"""
+Các thành phần dùng chung cho bộ giải SudokuTHVK-main và 7x7-pipes-wrap-main.
+Hai thư mục đó tự thêm thư mục gốc repo vào sys.path trước khi import package này.
+"""
+from .budget import Budget
+from .instrument import Instrumentation
+from .transposition import REPLACEMENT_POLICIES, TT_ENTRY_BYTES, TranspositionTable
+
+__all__ = ["Budget", "Instrumentation", "REPLACEMENT_POLICIES", "TT_ENTRY_BYTES", "TranspositionTable"]
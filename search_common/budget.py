@@ -0,0 +1,43 @@
+import time
+from typing import Optional
+
+
+class Budget:
+    """
+    Giới hạn tài nguyên cho một lần tìm kiếm, được kiểm tra ngay trong vòng lặp:
+      - time_limit: số giây tối đa, deadline tính từ lúc tạo Budget
+      - max_nodes: số node tối đa (Sudoku: node được tạo, cùng đơn vị với nodes_generated;
+        pipes: node được mở rộng / state được đánh giá, cùng đơn vị với nodes_explored)
+      - max_memory_nodes: số node / state lưu cùng lúc tối đa (frontier + explored / visited)
+      - cancel(): yêu cầu dừng từ luồng khác (vd: nút Cancel của UI)
+    Khi hết ngân sách, thuật toán trả về kết quả "không tìm thấy" như bình thường và
+    budget.reason là một trong 'time_limit', 'node_limit', 'memory_limit', 'cancelled'.
+    """
+
+    __slots__ = ('deadline', 'max_nodes', 'max_memory_nodes', 'reason', '_cancelled')
+
+    def __init__(self, time_limit: Optional[float] = None, max_nodes: Optional[int] = None,
+                 max_memory_nodes: Optional[int] = None):
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.max_nodes = max_nodes
+        self.max_memory_nodes = max_memory_nodes
+        self.reason: Optional[str] = None
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def check(self, nodes: int, memory_nodes: int) -> Optional[str]:
+        """Trả về lý do dừng (và lưu vào self.reason) nếu đã hết ngân sách, ngược lại None."""
+        if self._cancelled:
+            reason = 'cancelled'
+        elif self.max_nodes is not None and nodes >= self.max_nodes:
+            reason = 'node_limit'
+        elif self.max_memory_nodes is not None and memory_nodes > self.max_memory_nodes:
+            reason = 'memory_limit'
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            reason = 'time_limit'
+        else:
+            return None
+        self.reason = reason
+        return reason
@@ -0,0 +1,122 @@
+"""
+Test hồi quy cho TranspositionTable: giới hạn kích thước, thứ tự bỏ phần tử của
+policy 'lru' và 'depth', fingerprint.
+
+Chạy: python -m pytest -q search_common
+"""
+
+import pytest
+
+from search_common import TT_ENTRY_BYTES, TranspositionTable
+
+
+class _Key:
+    """Key có hash tự chọn, để ép nhiều key rơi vào cùng một bucket của policy 'depth'."""
+
+    def __init__(self, name, hash_value=0):
+        self.name = name
+        self.hash_value = hash_value
+
+    def __hash__(self):
+        return self.hash_value
+
+    def __eq__(self, other):
+        return isinstance(other, _Key) and self.name == other.name
+
+    def __repr__(self):
+        return f"_Key({self.name!r})"
+
+
+def test_unbounded_table_never_evicts():
+    table = TranspositionTable()
+    for i in range(1000):
+        table.store(i, i * i)
+    assert len(table) == 1000
+    assert table.get(999) == 999 * 999
+    assert table.evictions == 0
+
+
+def test_lru_evicts_least_recently_used():
+    """Đầy thì bỏ phần tử lâu nhất chưa được tra cứu / ghi; tra cứu làm phần tử 'mới' lại."""
+    table = TranspositionTable(max_entries=3)
+    for key in "abc":
+        table.add(key)
+    assert "a" in table          # a thành mới nhất, b là cũ nhất
+    table.add("d")
+    assert "b" not in table
+    assert all(key in table for key in "acd")
+    table.store("c", 5)          # ghi đè cũng làm mới
+    table.add("e")
+    assert "a" not in table
+    assert table.get("c") == 5
+    assert len(table) == 3
+    assert table.evictions == 2
+
+
+def test_max_bytes_limits_capacity():
+    table = TranspositionTable(max_bytes=10 * TT_ENTRY_BYTES)
+    assert table.capacity == 10
+    table = TranspositionTable(max_entries=4, max_bytes=10 * TT_ENTRY_BYTES)
+    assert table.capacity == 4
+    for i in range(100):
+        table.add(i)
+    assert len(table) == 4
+
+
+def test_depth_keeps_deepest_entry_in_bucket():
+    """Policy 'depth', một bucket (2 ô): ô sâu giữ depth lớn nhất, ô còn lại luôn bị ghi đè."""
+    table = TranspositionTable(max_entries=2, policy="depth")
+    deep, shallow, newer, deeper = (_Key(name) for name in ("deep", "shallow", "newer", "deeper"))
+    table.store(deep, 1, depth=10)
+    table.store(shallow, 2, depth=1)
+    assert len(table) == 2
+    table.store(newer, 3, depth=2)        # nông hơn ô sâu: đè ô mới nhất
+    assert deep in table and newer in table
+    assert shallow not in table
+    table.store(deeper, 4, depth=20)      # sâu hơn: chiếm ô sâu, phần tử sâu cũ xuống ô mới nhất
+    assert deeper in table and deep in table
+    assert newer not in table
+    assert len(table) == 2
+    assert table.evictions == 2
+
+
+def test_depth_update_keeps_max_depth():
+    """Ghi lại key đang ở ô sâu không làm giảm depth của nó."""
+    table = TranspositionTable(max_entries=2, policy="depth")
+    a, b, c = _Key("a"), _Key("b"), _Key("c")
+    table.store(a, 1, depth=10)
+    table.store(a, 2, depth=0)
+    assert table.get(a) == 2
+    table.store(b, 3, depth=5)
+    table.store(c, 4, depth=5)            # 5 < 10: a vẫn ở ô sâu
+    assert a in table and c in table and b not in table
+
+
+def test_depth_capacity_is_even():
+    assert TranspositionTable(max_entries=5, policy="depth").capacity == 4
+    assert TranspositionTable(max_entries=1, policy="depth").capacity == 2
+
+
+def test_fingerprint_stores_hash_only():
+    table = TranspositionTable(max_entries=2, fingerprint=True)
+    table.store((1, 2), "x")
+    assert (1, 2) in table
+    assert table.get((1, 2)) == "x"
+    assert all(not isinstance(key, tuple) for key in table._data)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        TranspositionTable(policy="fifo")
+    with pytest.raises(ValueError):
+        TranspositionTable(max_entries=0)
+
+
+def test_clear_keeps_counters():
+    table = TranspositionTable(max_entries=2, policy="depth")
+    table.store(_Key("a"), depth=1)
+    assert _Key("a") in table
+    table.clear()
+    assert len(table) == 0
+    assert _Key("a") not in table
+    assert table.stats()["hits"] == 1 and table.stats()["misses"] == 1
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Chính sách thay thế khi bảng đầy:
+#   lru   - bỏ phần tử lâu nhất chưa được tra cứu / ghi
+#   depth - bảng băm hai ô mỗi bucket: ô "sâu" giữ phần tử có depth (công sức tìm kiếm
+#           phía dưới state, vd: ngưỡng - g ở IDA*) lớn nhất, ô còn lại luôn bị ghi đè
+#           bởi phần tử mới nhất (nên state gần đây vẫn được nhớ)
+REPLACEMENT_POLICIES = ("lru", "depth")
+
+# Ước lượng số byte của một phần tử khi dùng fingerprint (ô của dict / list, số nguyên
+# fingerprint, giá trị), dùng để đổi max_bytes ra số phần tử. Không tính object state.
+TT_ENTRY_BYTES = 120
+
+# Nhân hash với hằng số Fibonacci (2^64 / tỉ lệ vàng) rồi lấy 32 bit cao làm chỉ số ô:
+# hash của state là hash(int) / hash(tuple) nên các bit thấp phân bố kém, dùng thẳng
+# `hash % capacity` thì nhiều state rơi vào cùng ô dù bảng còn gần như trống.
+_FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """
+    Bảng chuyển vị có giới hạn bộ nhớ, dùng thay cho set explored / dict state -> g
+    trong các thuật toán tìm kiếm: hỗ trợ `in`, add (như set) và get / store (như dict).
+
+    max_entries / max_bytes: giới hạn số phần tử (max_bytes được đổi ra số phần tử theo
+    TT_ENTRY_BYTES); không đặt giới hạn nào thì bảng là một dict bình thường, không bao giờ bỏ.
+    policy: chính sách thay thế khi đầy, xem REPLACEMENT_POLICIES ('depth' làm tròn số phần tử
+    xuống số chẵn, tối thiểu 2).
+    fingerprint=True: chỉ lưu hash(state) thay vì chính state (nhỏ hơn nhiều và không giữ
+    state sống trong RAM); hai state khác nhau trùng hash thì state sau bị coi là đã gặp,
+    xác suất cỡ số_phần_tử / 2^61.
+
+    Phần tử bị bỏ chỉ làm tìm kiếm mở rộng lại state đó (tốn thời gian), không làm sai kết quả.
+    Dùng thay tập explored / visited thì bộ nhớ không tăng vô hạn. Đồ thị state không có chu
+    trình (Sudoku: mỗi bước điền thêm ít nhất một ô) thì tìm kiếm vẫn luôn dừng; có chu trình
+    (pipes: xoay ô) thì bảng có giới hạn có thể làm tìm kiếm duyệt mãi, phải đi kèm Budget.
+    """
+
+    __slots__ = ('capacity', 'policy', 'fingerprint', '_data', '_slots', '_size',
+                 'hits', 'misses', 'stores', 'evictions')
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 policy: str = "lru", fingerprint: bool = False):
+        if policy not in REPLACEMENT_POLICIES:
+            raise ValueError(f"policy phải là một trong {REPLACEMENT_POLICIES}: {policy}")
+        capacity = max_entries
+        if max_bytes is not None:
+            by_bytes = max(1, max_bytes // TT_ENTRY_BYTES)
+            capacity = by_bytes if capacity is None else min(capacity, by_bytes)
+        if capacity is not None and capacity < 1:
+            raise ValueError("max_entries phải >= 1")
+        if capacity is not None and policy == "depth":
+            capacity = max(2, capacity - capacity % 2)
+        self.capacity = capacity
+        self.policy = policy
+        self.fingerprint = fingerprint
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._data: Dict[Hashable, Any] = {}
+        self._slots = None
+        self._size = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Xoá toàn bộ phần tử (giữ nguyên giới hạn và bộ đếm)."""
+        if self.capacity is None:
+            self._data = {}
+        elif self.policy == "lru":
+            self._data = OrderedDict()
+        elif self._slots is None or self._size:
+            self._slots = [None] * self.capacity
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size if self._slots is not None else len(self._data)
+
+    def _index(self, k: Hashable) -> int:
+        """Chỉ số ô sâu của bucket chứa k (ô luôn ghi đè là ô kế tiếp)."""
+        return 2 * ((((hash(k) * _FIBONACCI_MULTIPLIER) & _MASK64) >> 32) % (self.capacity // 2))
+
+    def _lookup(self, key: Hashable):
+        """(True, giá trị) nếu có key trong bảng, ngược lại (False, None)."""
+        k = hash(key) if self.fingerprint else key
+        if self._slots is not None:
+            index = self._index(k)
+            for slot in (self._slots[index], self._slots[index + 1]):
+                if slot is not None and slot[0] == k:
+                    self.hits += 1
+                    return True, slot[1]
+        elif k in self._data:
+            self.hits += 1
+            if self.capacity is not None:
+                self._data.move_to_end(k)
+            return True, self._data[k]
+        self.misses += 1
+        return False, None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key)[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def store(self, key: Hashable, value: Any = True, depth: int = 0) -> None:
+        """Ghi key -> value. depth chỉ dùng cho policy 'depth'."""
+        k = hash(key) if self.fingerprint else key
+        self.stores += 1
+        if self._slots is not None:
+            slots = self._slots
+            index = self._index(k)
+            deep, recent = slots[index], slots[index + 1]
+            entry = (k, value, depth)
+            if deep is not None and deep[0] == k:
+                slots[index] = (k, value, max(depth, deep[2]))
+                return
+            if recent is not None and recent[0] == k:
+                slots[index + 1] = entry
+                return
+            if deep is None:
+                slots[index] = entry
+                self._size += 1
+                return
+            if depth >= deep[2]:
+                # Phần tử sâu cũ chuyển xuống ô ghi đè, phần tử đang ở đó bị bỏ
+                slots[index], slots[index + 1] = entry, deep
+            else:
+                slots[index + 1] = entry
+            if recent is None:
+                self._size += 1
+            else:
+                self.evictions += 1
+            return
+
+        data = self._data
+        if self.capacity is not None:
+            if k in data:
+                data.move_to_end(k)
+            elif len(data) >= self.capacity:
+                data.popitem(last=False)
+                self.evictions += 1
+        data[k] = value
+
+    def add(self, key: Hashable) -> None:
+        """Như set.add."""
+        self.store(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Số liệu để ghi vào stats / benchmark."""
+        return {
+            'entries': len(self),
+            'capacity': self.capacity,
+            'policy': self.policy,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
@@ -1,7 +1,7 @@
 import os
 import importlib.util
 from dataclasses import dataclass
-from typing import Optional, Tuple, Any, List, Dict
+from typing import Optional, Tuple, Any, List, Dict, Callable
 
 
 @dataclass
@@ -11,12 +11,19 @@ class PipesRunResult:
     stats: Dict[str, Any]
 
 
+# Anytime A* improves its answer until stopped; cap it so Solve always returns.
+ANYTIME_TIME_LIMIT = 10.0
+
+
 class PipesAdapter:
     """
     Adapter (wrapper) to call the group's 7x7 Wrap Pipes solver without modifying their code.
     We load the solver module from 7x7-pipes-wrap-main/main.py via importlib to avoid name clashes.
     """
 
+    # Algorithms that accept `instrument` (weighted A* and greedy run through astar)
+    INSTRUMENTED_ALGORITHMS = frozenset({"BFS", "A*", "WEIGHTED A*", "GREEDY"})
+
     def __init__(self, pipes_root: str):
         self.pipes_root = pipes_root
         main_py = os.path.join(pipes_root, "main.py")
@@ -36,16 +43,52 @@ class PipesAdapter:
             content = f.read()
         return self.PipeState.from_string(content)
 
-    #bfs, dfs, a*, hill climbing
-    def solve(self, initial_state, algo: str) -> PipesRunResult:
+    #bfs, dfs, a* (+ weighted, greedy, anytime), ida*, hill climbing, local search, csp
+    def solve(self, initial_state, algo: str, progress: Optional[Callable[[dict], bool]] = None,
+              instrument: bool = False) -> PipesRunResult:
+        """Run one solver. `progress(stats)` is called periodically by the searches; returning True cancels.
+
+        instrument=True adds per-operation call counts and times as stats["instrumentation"] for the
+        algorithms in INSTRUMENTED_ALGORITHMS; it is ignored for the others.
+        """
         algo_norm = algo.strip().upper()
+        counters = self.mod.Instrumentation() if instrument and algo_norm in self.INSTRUMENTED_ALGORITHMS else None
         if algo_norm == "BFS":
-            goal, path, stats = self.mod.bfs(initial_state)
+            goal, path, stats = self.mod.bfs(initial_state, progress=progress, instrument=counters)
         elif algo_norm == "A*":
-            goal, path, stats = self.mod.astar(initial_state)
+            # Per-puzzle pattern-database heuristic (admissible, built in milliseconds)
+            h = self.mod.make_pattern_heuristic(initial_state)
+            goal, path, stats = self.mod.astar(initial_state, progress=progress, heuristic_fn=h, instrument=counters)
+        elif algo_norm == "WEIGHTED A*":
+            h = self.mod.make_pattern_heuristic(initial_state)
+            goal, path, stats = self.mod.weighted_astar(initial_state, progress=progress, heuristic_fn=h,
+                                                        instrument=counters)
+        elif algo_norm == "GREEDY":
+            h = self.mod.make_pattern_heuristic(initial_state)
+            goal, path, stats = self.mod.greedy_best_first(initial_state, progress=progress, heuristic_fn=h,
+                                                           instrument=counters)
+        elif algo_norm == "ANYTIME A*":
+            # Cancel keeps the best solution found so far
+            h = self.mod.make_pattern_heuristic(initial_state)
+            budget = self.mod.Budget(time_limit=ANYTIME_TIME_LIMIT)
+            goal, path, stats = self.mod.anytime_astar(initial_state, progress=progress, budget=budget,
+                                                       heuristic_fn=h)
+        elif algo_norm == "IDA*":
+            h = self.mod.make_pattern_heuristic(initial_state)
+            goal, path, stats = self.mod.ida_star(initial_state, progress=progress, heuristic_fn=h)
         elif algo_norm == "HILL CLIMBING":
-            goal, path, stats = self.mod.hill_climbing(initial_state)
+            goal, path, stats = self.mod.hill_climbing(initial_state, progress=progress)
+        elif algo_norm == "RANDOM RESTART":
+            goal, path, stats = self.mod.random_restart_hill_climbing(initial_state, progress=progress)
+        elif algo_norm == "SIMULATED ANNEALING":
+            goal, path, stats = self.mod.simulated_annealing(initial_state, progress=progress)
+        elif algo_norm == "TABU":
+            goal, path, stats = self.mod.tabu_search(initial_state, progress=progress)
+        elif algo_norm == "CSP":
+            goal, path, stats = self.mod.csp_solve(initial_state, progress=progress)
         else:
             # DFS has optional show_progress
-            goal, path, stats = self.mod.dfs(initial_state)
+            goal, path, stats = self.mod.dfs(initial_state, progress=progress)
+        if counters is not None:
+            stats["instrumentation"] = counters.summary()
         return PipesRunResult(goal, path, stats)
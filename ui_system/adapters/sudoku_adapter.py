@@ -1,7 +1,7 @@
 import os
 import sys
 from dataclasses import dataclass
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 @dataclass
@@ -13,6 +13,8 @@ class SudokuRunResult:
     memory_mb: float
     skipped: bool = False
     message: str = ""
+    cancelled: bool = False
+    instrumentation: Optional[Dict[str, Dict[str, Any]]] = None
 
 
 class SudokuAdapter:
@@ -21,6 +23,9 @@ class SudokuAdapter:
     It imports and calls the original functions so BFS/A*/metrics/benchmark remain identical.
     """
 
+    # Algorithms that accept `instrument` (DLX does not)
+    INSTRUMENTED_ALGORITHMS = frozenset({"BFS", "A*"})
+
     def __init__(self, sudoku_root: str):
         sudoku_root = os.path.abspath(sudoku_root)
         if not os.path.isdir(sudoku_root):
@@ -31,35 +36,59 @@ class SudokuAdapter:
             sys.path.insert(0, sudoku_root)
 
         #fix extra positional argument
-        self.benchmark_file = os.path.join(sudoku_root, 'benchmark.md')
+        self.benchmark_file = os.path.join(sudoku_root, 'benchmark.jsonl')
 
         from src.sudoku.parser import load_puzzle
         from src.sudoku.state import SudokuState
         from src.core.blind import bfs
         from src.core.heuristic import a_star
-        from src.core.metrics import measure_performance
-        from src.core.io_utils import append_to_benchmark
+        from src.core.dlx import dlx
+        from src.core.metrics import measure_split
+        from src.core.io_utils import record_benchmark
+        from src.core.instrument import Instrumentation
 
         self.load_puzzle = load_puzzle
         self.SudokuState = SudokuState
         self.bfs = bfs
         self.a_star = a_star
-        self.measure_performance = measure_performance
-        self.append_to_benchmark = append_to_benchmark
-
-    def solve(self, input_path: str, algo: str, write_benchmark: bool = True) -> SudokuRunResult:
+        self.dlx = dlx
+        self.measure_split = measure_split
+        self.record_benchmark = record_benchmark
+        self.Instrumentation = Instrumentation
+
+    def solve(self, input_path: str, algo: str, write_benchmark: bool = True, propagate: bool = False,
+              progress: Optional[Callable[[dict], bool]] = None, instrument: bool = False) -> SudokuRunResult:
+        """Run one solver. `progress(stats)` is called periodically by BFS/A*/DLX; returning True cancels.
+
+        instrument=True runs BFS/A* once more with per-operation counters, so the measured
+        time above is not skewed by the counting overhead.
+        """
         algo_up = algo.strip().upper()
-        if algo_up not in {"BFS", "A*", "ASTAR", "A STAR"}:
-            raise ValueError("algo must be 'BFS' or 'A*'")
-        algo_norm = "BFS" if algo_up == "BFS" else "A*"
+        if algo_up not in {"BFS", "A*", "ASTAR", "A STAR", "DLX"}:
+            raise ValueError("algo must be 'BFS', 'A*' or 'DLX'")
+        algo_norm = algo_up if algo_up in {"BFS", "DLX"} else "A*"
 
         board = self.load_puzzle(input_path)
         init_state = self.SudokuState(board)
 
+        cancelled = False
+        last_stats: Dict[str, Any] = {}
+
+        def on_progress(stats: dict) -> bool:
+            nonlocal cancelled
+            last_stats.update(stats)
+            cancelled = bool(progress(stats))
+            return cancelled
+
+        # measure_split runs the solver twice (time, then memory); only the first run reports progress
+        progress_kwargs = {"progress": on_progress} if progress is not None else {}
+        search_kwargs = {"propagate": propagate, **progress_kwargs}
+
         # Keep the exact behavior from SudokuTHVK-main's main.py: skip BFS if too many empty cells.
+        # With constraint propagation BFS branches very little, so the limit does not apply.
         if algo_norm == "BFS":
             empty_count = sum(1 for x in board if x == 0)
-            if empty_count > 50:
+            if empty_count > 50 and not propagate:
                 return SudokuRunResult(
                     goal_node=None,
                     nodes_generated=0,
@@ -70,26 +99,47 @@ class SudokuAdapter:
                     message="BFS skipped (more than 50 empty cells).",
                 )
 
-            (res, t, mem) = self.measure_performance(self.bfs, init_state)
-            goal_node, nodes_gen, max_mem_nodes = res
+            (res, metrics) = self.measure_split(self.bfs, init_state, **search_kwargs)
+        elif algo_norm == "DLX":
+            (res, metrics) = self.measure_split(self.dlx, init_state, **progress_kwargs)
         else:
-            (res, t, mem) = self.measure_performance(self.a_star, init_state)
-            goal_node, nodes_gen, max_mem_nodes = res
+            (res, metrics) = self.measure_split(self.a_star, init_state, **search_kwargs)
+        goal_node, nodes_gen, max_mem_nodes = res
+        t, mem = metrics["time_sec"], metrics["peak_memory_mb"]
+
+        if cancelled:
+            return SudokuRunResult(None, nodes_gen, max_mem_nodes, t, mem, message="Cancelled", cancelled=True)
+
+        instrumentation = None
+        if instrument and algo_norm in self.INSTRUMENTED_ALGORITHMS:
+            counters = self.Instrumentation()
+            search = self.bfs if algo_norm == "BFS" else self.a_star
+            # Counting run: keep showing the measured run's numbers, only poll for Cancel
+            if progress is not None:
+                search_kwargs["progress"] = lambda stats: on_progress(dict(last_stats))
+            search(init_state, instrument=counters, **search_kwargs)
+            if cancelled:
+                return SudokuRunResult(None, nodes_gen, max_mem_nodes, t, mem, message="Cancelled", cancelled=True)
+            instrumentation = counters.summary()
 
         if write_benchmark:
             puzzle_name = os.path.basename(input_path)
-            #fix extra positional argument
-            self.append_to_benchmark(
+            self.record_benchmark(
                 self.benchmark_file,
-                algo_norm,
+                algo_norm + ("+CP" if propagate and algo_norm != "DLX" else ""),
                 puzzle_name,
-                t,
-                mem,
-                nodes_gen,            
+                board,
+                metrics,
+                nodes_gen,
+                max_mem_nodes,
+                goal_node is not None,
+                propagate=propagate and algo_norm != "DLX",
+                **({"instrumentation": instrumentation} if instrumentation else {}),
             )
 
         msg = "Solved" if goal_node else "No solution found"
-        return SudokuRunResult(goal_node, nodes_gen, max_mem_nodes, t, mem, skipped=False, message=msg)
+        return SudokuRunResult(goal_node, nodes_gen, max_mem_nodes, t, mem, skipped=False, message=msg,
+                               instrumentation=instrumentation)
 
     @staticmethod
     def reconstruct_nodes(goal_node: Any) -> List[Any]:
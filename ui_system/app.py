@@ -1,4 +1,7 @@
 import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
@@ -8,6 +11,93 @@ from widgets.sudoku_board import SudokuBoard
 from widgets.pipes_board import PipesBoard
 
 
+class SolveWorker:
+    """Runs a solver call on a background thread so the Tk main loop stays responsive.
+
+    `run(progress)` executes on the worker thread. The solver calls `progress(stats)`
+    every few hundred nodes; it only touches a queue and a cancel flag, never Tk widgets.
+    The Tk side polls the queue with `after()` and dispatches to the callbacks.
+    """
+
+    POLL_MS = 100
+
+    def __init__(self, widget, run, on_progress, on_done, on_error):
+        self.widget = widget
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.started = time.perf_counter()
+        self.last_stats = {}
+        self._last_post = 0.0
+        self._job = None
+        self._thread = threading.Thread(target=self._target, args=(run,), daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._job = self.widget.after(self.POLL_MS, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def detach(self):
+        """Cancel the search and stop polling (used when the screen goes away)."""
+        self.cancel()
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except Exception:
+                pass
+        self._job = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def progress(self, stats: dict) -> bool:
+        # Called on the worker thread: throttle to ~10 updates per second.
+        now = time.perf_counter()
+        if now - self._last_post >= 0.1:
+            self._last_post = now
+            self.queue.put(("progress", dict(stats)))
+        return self.cancel_event.is_set()
+
+    def _target(self, run):
+        try:
+            self.queue.put(("done", run(self.progress)))
+        except Exception as e:
+            self.queue.put(("error", e))
+
+    def _poll(self):
+        self._job = None
+        try:
+            while True:
+                kind, payload = self.queue.get_nowait()
+                if kind == "progress":
+                    self.last_stats = payload
+                elif kind == "done":
+                    self.on_done(payload)
+                    return
+                else:
+                    self.on_error(payload)
+                    return
+        except queue.Empty:
+            pass
+        # Refresh even without new stats so the elapsed time keeps ticking.
+        self.on_progress(self.last_stats)
+        self._job = self.widget.after(self.POLL_MS, self._poll)
+
+
+def format_instrumentation(summary: dict) -> str:
+    """One line per instrumented operation: calls, total time and share of the measured time."""
+    total = sum(entry["time_sec"] for entry in summary.values()) or 1.0
+    return "\n".join(
+        f"- {name}: {entry['calls']:,} calls, {entry['time_sec']:.4f}s ({100 * entry['time_sec'] / total:.0f}%)"
+        for name, entry in summary.items()
+    )
+
+
 class MainMenu(tk.Frame):
     def __init__(self, master, on_select_game):
         super().__init__(master)
@@ -51,6 +141,7 @@ class SudokuScreen(tk.Frame):
         self.steps = []  # list[tuple[int,...]]
         self.step_idx = 0
         self._auto_job = None
+        self._worker = None
 
         self._build_ui()
         self._init_adapter()
@@ -91,8 +182,15 @@ class SudokuScreen(tk.Frame):
         row2.pack(fill="x", pady=(0, 8))
         tk.Label(row2, text="Algorithm:").pack(side="left")
         self.algo_var = tk.StringVar(value="A*")
-        algo_box = ttk.Combobox(row2, textvariable=self.algo_var, values=["A*", "BFS"], state="readonly", width=8)
+        algo_box = ttk.Combobox(row2, textvariable=self.algo_var, values=["A*", "BFS", "DLX"], state="readonly", width=8)
         algo_box.pack(side="left", padx=6)
+        algo_box.bind("<<ComboboxSelected>>", lambda _event: self._update_counters())
+        self.propagate_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(row2, text="Propagation", variable=self.propagate_var).pack(side="left")
+        self.instrument_var = tk.BooleanVar(value=False)
+        self.instrument_check = tk.Checkbutton(row2, text="Counters", variable=self.instrument_var)
+        self.instrument_check.pack(side="left")
+        self._update_counters()
 
         # Delay
         row3 = tk.Frame(ctrl)
@@ -120,11 +218,14 @@ class SudokuScreen(tk.Frame):
         self.btn_clear = tk.Button(btns, text="Clear", width=10, command=self._clear)
         self.btn_clear.grid(row=1, column=1, padx=3, pady=3)
 
+        self.btn_cancel = tk.Button(btns, text="Cancel", width=10, command=self._cancel_solve, state="disabled")
+        self.btn_cancel.grid(row=1, column=2, padx=3, pady=3)
+
         # Stats
         stats = tk.LabelFrame(left, text="Stats", padx=10, pady=10)
         stats.pack(fill="x", pady=(12, 0))
 
-        self.stats_text = tk.Text(stats, width=38, height=12, wrap="word")
+        self.stats_text = tk.Text(stats, width=38, height=18, wrap="word")
         self.stats_text.pack(fill="both", expand=True)
         self._set_stats("Choose an input file, then click Solve.")
 
@@ -145,6 +246,13 @@ class SudokuScreen(tk.Frame):
             messagebox.showerror("Sudoku Adapter Error", str(e))
             self.adapter = None
 
+    def _update_counters(self):
+        """Counters are only collected by BFS/A*; grey the box out for DLX."""
+        supported = self.algo_var.get().strip().upper() in SudokuAdapter.INSTRUMENTED_ALGORITHMS
+        if not supported:
+            self.instrument_var.set(False)
+        self.instrument_check.configure(state="normal" if supported else "disabled")
+
     def _browse(self):
         path = filedialog.askopenfilename(
             title="Choose Sudoku .txt",
@@ -184,16 +292,69 @@ class SudokuScreen(tk.Frame):
             messagebox.showwarning("Invalid input", "Selected input file does not exist.")
             return
 
+        if self._worker is not None:
+            return
+
         algo = self.algo_var.get().strip()
+        propagate = self.propagate_var.get()
+        instrument = self.instrument_var.get()
         self._stop_auto()
         self._set_stats("Running...")
-        self.update_idletasks()
 
-        try:
-            res = self.adapter.solve(path, algo, write_benchmark=True)
-        except Exception as e:
-            messagebox.showerror("Solve Error", str(e))
-            self._set_stats("Solve failed.")
+        self._worker = SolveWorker(
+            self,
+            run=lambda progress: self.adapter.solve(path, algo, write_benchmark=True, propagate=propagate,
+                                                    progress=progress, instrument=instrument),
+            on_progress=lambda stats: self._show_progress(algo, stats),
+            on_done=lambda res: self._on_solved(algo, res),
+            on_error=self._on_solve_error,
+        )
+        self._set_running(True)
+        self._worker.start()
+
+    def _set_running(self, running: bool):
+        self.btn_solve.configure(state="disabled" if running else "normal")
+        self.btn_cancel.configure(state="normal" if running else "disabled")
+
+    def _cancel_solve(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self.btn_cancel.configure(state="disabled")
+
+    def _detach_worker(self):
+        if self._worker is not None:
+            self._worker.detach()
+            self._worker = None
+            self._set_running(False)
+
+    def _show_progress(self, algo: str, stats: dict):
+        cancelling = "\nCancelling..." if self._worker.cancel_event.is_set() else ""
+        self._set_stats(
+            f"Running {algo}...{cancelling}\n\n"
+            f"Elapsed: {self._worker.elapsed():.1f}s\n"
+            f"Nodes generated: {stats.get('nodes_generated', 0)}\n"
+            f"Frontier size: {stats.get('frontier_size', 0)}\n"
+            f"Explored states: {stats.get('explored_states', 0)}\n"
+        )
+
+    def _on_solve_error(self, e: Exception):
+        self._worker = None
+        self._set_running(False)
+        messagebox.showerror("Solve Error", str(e))
+        self._set_stats("Solve failed.")
+
+    def _on_solved(self, algo: str, res):
+        self._worker = None
+        self._set_running(False)
+
+        if res.cancelled:
+            self._set_stats(
+                f"Cancelled.\n\n"
+                f"Algorithm: {algo}\n"
+                f"Time: {res.time_sec:.6f}s\n"
+                f"Nodes generated: {res.nodes_generated}\n"
+                f"Max memory nodes: {res.max_memory_nodes}\n"
+            )
             return
 
         if res.skipped:
@@ -207,6 +368,8 @@ class SudokuScreen(tk.Frame):
             )
             return
 
+        counters = f"\nCounters:\n{format_instrumentation(res.instrumentation)}\n" if res.instrumentation else ""
+
         if not res.goal_node:
             self._set_stats(
                 f"No solution found.\n\n"
@@ -215,6 +378,7 @@ class SudokuScreen(tk.Frame):
                 f"Peak memory: {res.memory_mb:.3f} MB\n"
                 f"Nodes generated: {res.nodes_generated}\n"
                 f"Max memory nodes: {res.max_memory_nodes}\n"
+                f"{counters}"
             )
             return
 
@@ -237,8 +401,9 @@ class SudokuScreen(tk.Frame):
             f"Time: {res.time_sec:.6f}s\n"
             f"Peak memory: {res.memory_mb:.3f} MB\n"
             f"Nodes generated: {res.nodes_generated}\n"
-            f"Max memory nodes: {res.max_memory_nodes}\n\n"
-            f"Benchmark appended in SudokuTHVK-main/benchmark.md"
+            f"Max memory nodes: {res.max_memory_nodes}\n"
+            f"{counters}\n"
+            f"Benchmark recorded in SudokuTHVK-main/benchmark.jsonl"
         )
 
     def _step(self):
@@ -295,6 +460,7 @@ class SudokuScreen(tk.Frame):
 
     def _clear(self):
         self._stop_auto()
+        self._detach_worker()
         self.steps = []
         self.step_idx = 0
         self.board.delete("numbers")
@@ -312,6 +478,7 @@ class SudokuScreen(tk.Frame):
 
     def _back(self):
         self._stop_auto()
+        self._detach_worker()
         self.on_back()
 
 
@@ -329,6 +496,7 @@ class PipesScreen(tk.Frame):
         self.steps = []  # list[PipeState]
         self.step_idx = 0
         self._auto_job = None
+        self._worker = None
 
         self._build_ui()
         self._init_adapter()
@@ -339,7 +507,7 @@ class PipesScreen(tk.Frame):
         top.pack(fill="x", padx=12, pady=10)
 
         tk.Button(top, text="← Back", command=self._back).pack(side="left")
-        tk.Label(top, text="Wrap Pipes (7x7)", font=("Arial", 16, "bold")).pack(side="left", padx=12)
+        tk.Label(top, text="Wrap Pipes", font=("Arial", 16, "bold")).pack(side="left", padx=12)
 
         # Body split
         body = tk.Frame(self)
@@ -367,8 +535,15 @@ class PipesScreen(tk.Frame):
         row2.pack(fill="x", pady=(0, 8))
         tk.Label(row2, text="Algorithm:").pack(side="left")
         self.algo_var = tk.StringVar(value="BFS")
-        algo_box = ttk.Combobox(row2, textvariable=self.algo_var, values=["A*", "BFS", "DFS", "Hill Climbing"], state="readonly", width=8)
+        algo_box = ttk.Combobox(row2, textvariable=self.algo_var, values=["A*", "Weighted A*", "Greedy", "Anytime A*", "IDA*", "BFS", "DFS", "Hill Climbing",
+                                        "Random Restart", "Simulated Annealing", "Tabu", "CSP"],
+                                state="readonly", width=18)
         algo_box.pack(side="left", padx=6)
+        algo_box.bind("<<ComboboxSelected>>", lambda _event: self._update_counters())
+        self.instrument_var = tk.BooleanVar(value=False)
+        self.instrument_check = tk.Checkbutton(row2, text="Counters", variable=self.instrument_var)
+        self.instrument_check.pack(side="left")
+        self._update_counters()
 
         row3 = tk.Frame(ctrl)
         row3.pack(fill="x", pady=(0, 8))
@@ -394,10 +569,13 @@ class PipesScreen(tk.Frame):
         self.btn_clear = tk.Button(btns, text="Clear", width=10, command=self._clear)
         self.btn_clear.grid(row=1, column=1, padx=3, pady=3)
 
+        self.btn_cancel = tk.Button(btns, text="Cancel", width=10, command=self._cancel_solve, state="disabled")
+        self.btn_cancel.grid(row=1, column=2, padx=3, pady=3)
+
         stats = tk.LabelFrame(left, text="Stats", padx=10, pady=10)
         stats.pack(fill="x", pady=(12, 0))
 
-        self.stats_text = tk.Text(stats, width=38, height=12, wrap="word")
+        self.stats_text = tk.Text(stats, width=38, height=18, wrap="word")
         self.stats_text.pack(fill="both", expand=True)
         self._set_stats("Choose an input file, then click Solve.")
 
@@ -420,6 +598,13 @@ class PipesScreen(tk.Frame):
             messagebox.showerror("Pipes Adapter Error", str(e))
             self.adapter = None
 
+    def _update_counters(self):
+        """Counters are only collected by the BFS/A* family; grey the box out for the other algorithms."""
+        supported = self._algo_norm() in PipesAdapter.INSTRUMENTED_ALGORITHMS
+        if not supported:
+            self.instrument_var.set(False)
+        self.instrument_check.configure(state="normal" if supported else "disabled")
+
     def _browse(self):
         path = filedialog.askopenfilename(
             title="Choose Pipes .txt",
@@ -446,6 +631,35 @@ class PipesScreen(tk.Frame):
         self.btn_reset.configure(state="disabled")
         self._set_stats("Loaded puzzle. Click Solve to run the algorithm.")
 
+    def _algo_norm(self) -> str:
+        """Map the combobox label to the algorithm name PipesAdapter.solve expects."""
+        algo = self.algo_var.get().strip()
+        # algo_norm = "DFS" if algo.upper().startswith("D") else "BFS"
+        if algo.upper().startswith("ANYTIME"):
+            return "ANYTIME A*"
+        elif algo.upper().startswith("W"):
+            return "WEIGHTED A*"
+        elif algo.upper().startswith("G"):
+            return "GREEDY"
+        elif algo.upper().startswith("A"):
+            return "A*"
+        elif algo.upper().startswith("H"):
+            return "HILL CLIMBING"
+        elif algo.upper().startswith("B"):
+            return "BFS"
+        elif algo.upper().startswith("C"):
+            return "CSP"
+        elif algo.upper().startswith("I"):
+            return "IDA*"
+        elif algo.upper().startswith("R"):
+            return "RANDOM RESTART"
+        elif algo.upper().startswith("S"):
+            return "SIMULATED ANNEALING"
+        elif algo.upper().startswith("T"):
+            return "TABU"
+        else:
+            return "DFS"
+
     def _solve(self):
         if not self.adapter:
             return
@@ -460,25 +674,68 @@ class PipesScreen(tk.Frame):
             messagebox.showerror("Input Error", f"Failed to load pipes:\n{e}")
             return
 
-        algo = self.algo_var.get().strip()
-        # algo_norm = "DFS" if algo.upper().startswith("D") else "BFS"
-        if algo.upper().startswith("A"):
-            algo_norm = "A*"
-        elif algo.upper().startswith("H"):
-            algo_norm = "HILL CLIMBING"
-        elif algo.upper().startswith("B"):
-            algo_norm = "BFS"
-        else:
-            algo_norm = "DFS"
+        algo_norm = self._algo_norm()
 
+        if self._worker is not None:
+            return
+
+        instrument = self.instrument_var.get()
         self._stop_auto()
         self._set_stats("Solving...")
 
-        try:
-            res = self.adapter.solve(init_state, algo_norm)
-        except Exception as e:
-            messagebox.showerror("Solve Error", str(e))
-            self._set_stats("Solve failed.")
+        self._worker = SolveWorker(
+            self,
+            run=lambda progress: self.adapter.solve(init_state, algo_norm, progress=progress, instrument=instrument),
+            on_progress=lambda stats: self._show_progress(algo_norm, stats),
+            on_done=lambda res: self._on_solved(init_state, res),
+            on_error=self._on_solve_error,
+        )
+        self._set_running(True)
+        self._worker.start()
+
+    def _set_running(self, running: bool):
+        self.btn_solve.configure(state="disabled" if running else "normal")
+        self.btn_cancel.configure(state="normal" if running else "disabled")
+
+    def _cancel_solve(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self.btn_cancel.configure(state="disabled")
+
+    def _detach_worker(self):
+        if self._worker is not None:
+            self._worker.detach()
+            self._worker = None
+            self._set_running(False)
+
+    def _show_progress(self, algo: str, stats: dict):
+        cancelling = "\nCancelling..." if self._worker.cancel_event.is_set() else ""
+        self._set_stats(
+            f"Solving with {algo}...{cancelling}\n\n"
+            f"Elapsed: {self._worker.elapsed():.1f}s\n"
+            f"Nodes explored: {stats.get('nodes_explored', 0)}\n"
+            + (
+                # Local search keeps a single state: it reports moves made and its best score instead
+                f"Iterations: {stats.get('iterations', 0)}\n"
+                f"Best open ends: {stats['best_open_ends']}\n"
+                if "best_open_ends" in stats else
+                f"Frontier size: {stats.get('frontier_size', 0)}\n"
+                f"Visited states: {stats.get('visited_states', 0)}\n"
+            )
+        )
+
+    def _on_solve_error(self, e: Exception):
+        self._worker = None
+        self._set_running(False)
+        messagebox.showerror("Solve Error", str(e))
+        self._set_stats("Solve failed.")
+
+    def _on_solved(self, init_state, res):
+        self._worker = None
+        self._set_running(False)
+
+        if res.stats.get("cancelled"):
+            self._set_stats(f"Cancelled.\n\nStats:\n{self._format_pipes_stats(res.stats)}")
             return
 
         if not res.path_states:
@@ -502,13 +759,20 @@ class PipesScreen(tk.Frame):
     def _format_pipes_stats(self, stats: dict) -> str:
         # stats keys depend on the group's code; handle missing keys safely
         lines = []
-        for k in ["nodes_explored", "nodes_generated", "max_frontier_size", "visited_states"]:
+        for k in ["nodes_explored", "nodes_generated", "max_frontier_size", "visited_states",
+                  "iterations", "restarts", "best_open_ends", "transposition_size", "path_cost", "weight",
+                  "suboptimality", "reason"]:
             if k in stats:
                 lines.append(f"- {k}: {stats[k]}")
+        if stats.get("solutions"):
+            lines.append(f"- solutions: {len(stats['solutions'])} (first after {stats['solutions'][0]['time_sec']:.2f}s)")
         # Some versions may include time/memory; show if present
         for k in ["time_sec", "memory_mb"]:
             if k in stats:
                 lines.append(f"- {k}: {stats[k]}")
+        if stats.get("instrumentation"):
+            lines.append("Counters:")
+            lines.append(format_instrumentation(stats["instrumentation"]))
         if not lines:
             lines.append(str(stats))
         return "\n".join(lines)
@@ -560,6 +824,7 @@ class PipesScreen(tk.Frame):
 
     def _clear(self):
         self._stop_auto()
+        self._detach_worker()
         self.steps = []
         self.step_idx = 0
         self.input_var.set("")
@@ -592,6 +857,7 @@ class PipesScreen(tk.Frame):
 
     def _back(self):
         self._stop_auto()
+        self._detach_worker()
         self.on_back()
 
 
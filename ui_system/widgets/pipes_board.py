@@ -4,20 +4,30 @@ from typing import Any, Optional, Tuple
 
 class PipesBoard(tk.Canvas):
     """
-    Simple renderer for the 7x7 Wrap Pipes board.
+    Simple renderer for an NxN Wrap Pipes board.
     Expects a PipeState with:
       - state.grid: 2D list of Tile objects
       - tile.to_char(): returns a unicode char representing the pipe shape
+
+    The canvas keeps the size of a 7x7 board at `cell_size`; larger boards
+    shrink their cells to fit that area (down to MIN_CELL_SIZE pixels).
     """
+    BOARD_CELLS = 7
+    MIN_CELL_SIZE = 6
+
     def __init__(self, master, cell_size: int = 60, pad: int = 10):
         self.cell_size = cell_size
         self.pad = pad
-        # 7x7 default
-        w = pad * 2 + cell_size * 7
-        h = pad * 2 + cell_size * 7
+        self.board_px = cell_size * self.BOARD_CELLS
+        w = pad * 2 + self.board_px
+        h = pad * 2 + self.board_px
         super().__init__(master, width=w, height=h, bg="white", highlightthickness=0)
         self._last_state = None
 
+    def cell_size_for(self, n: int) -> int:
+        """Cell size (pixels) used to draw an n x n board."""
+        return max(self.MIN_CELL_SIZE, min(self.cell_size, self.board_px // max(n, 1)))
+
     def clear(self):
         self.delete("all")
         self._last_state = None
@@ -29,30 +39,35 @@ class PipesBoard(tk.Canvas):
 
         grid = state.grid
         n = len(grid)
+        cell = self.cell_size_for(n)
+        board = n * cell
+        # Boards too large even at MIN_CELL_SIZE grow the canvas instead of clipping
+        side = self.pad * 2 + max(board, self.board_px)
+        self.configure(width=side, height=side)
 
         # grid lines
         for r in range(n + 1):
-            y = self.pad + r * self.cell_size
-            self.create_line(self.pad, y, self.pad + n * self.cell_size, y)
+            y = self.pad + r * cell
+            self.create_line(self.pad, y, self.pad + board, y)
         for c in range(n + 1):
-            x = self.pad + c * self.cell_size
-            self.create_line(x, self.pad, x, self.pad + n * self.cell_size)
+            x = self.pad + c * cell
+            self.create_line(x, self.pad, x, self.pad + board)
 
         # highlight cell (changed tile)
         if highlight is not None:
             r, c = highlight
-            x0 = self.pad + c * self.cell_size
-            y0 = self.pad + r * self.cell_size
-            x1 = x0 + self.cell_size
-            y1 = y0 + self.cell_size
+            x0 = self.pad + c * cell
+            y0 = self.pad + r * cell
+            x1 = x0 + cell
+            y1 = y0 + cell
             self.create_rectangle(x0, y0, x1, y1, outline="", fill="#fff2a8")
 
         # draw tiles
-        font_size = max(12, int(self.cell_size * 0.55))
+        font_size = max(4, int(cell * 0.55))
         for r in range(n):
             for c in range(n):
                 tile = grid[r][c]
                 ch = tile.to_char() if hasattr(tile, "to_char") else str(tile)
-                x = self.pad + c * self.cell_size + self.cell_size / 2
-                y = self.pad + r * self.cell_size + self.cell_size / 2
+                x = self.pad + c * cell + cell / 2
+                y = self.pad + r * cell + cell / 2
                 self.create_text(x, y, text=ch, font=("Arial", font_size))